@@ -0,0 +1,87 @@
+"""Benchmark audio-thread CPU per second of welcome playback
+
+Compares the old per-frame path (PCMVolumeTransformer over raw PCM, plus
+Opus encoding when libopus is available) with replaying a cached clip
+whose gain was baked in at build time.
+
+Usage:
+    python -m benchmarks.audio_gain_bench [--seconds 30] [--file welcome.mp3]
+"""
+import argparse
+import io
+import math
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import discord
+from discord.opus import Encoder as OpusEncoder
+
+from utils.audio_cache import CachedOpusAudio, decode_pcm
+from utils.loudness import LoudnessProfile, MODE_LUFS
+
+def synth_pcm(seconds: float) -> bytes:
+    """Generate a stereo 440Hz tone"""
+    from array import array
+    samples = array('h')
+    for i in range(int(OpusEncoder.SAMPLING_RATE * seconds)):
+        value = int(12000 * math.sin(2 * math.pi * 440 * i / OpusEncoder.SAMPLING_RATE))
+        samples.append(value)
+        samples.append(value)
+    return samples.tobytes()
+
+def drain(source: discord.AudioSource, per_frame=None) -> float:
+    """Read a source to the end, returning thread CPU seconds spent"""
+    start = time.thread_time()
+    while True:
+        frame = source.read()
+        if not frame:
+            break
+        if per_frame:
+            per_frame(frame)
+    return time.thread_time() - start
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--seconds', type=float, default=30.0, help='Length of synthetic audio when no file is given')
+    parser.add_argument('--file', help='Sound file to decode with FFmpeg instead of a synthetic tone')
+    parser.add_argument('--ffmpeg', default='ffmpeg', help='FFmpeg executable')
+    args = parser.parse_args()
+
+    pcm = decode_pcm(args.file, args.ffmpeg) if args.file else synth_pcm(args.seconds)
+    seconds = len(pcm) / OpusEncoder.FRAME_SIZE * OpusEncoder.FRAME_LENGTH / 1000
+
+    try:
+        encoder = OpusEncoder()
+    except Exception:
+        encoder = None
+        print("libopus not available, per-frame encoding is left out of the old path")
+
+    def encode(frame: bytes) -> None:
+        encoder.encode(frame, OpusEncoder.SAMPLES_PER_FRAME)
+
+    # Old path: volume scaled per frame on the audio thread, then encoded
+    old = discord.PCMVolumeTransformer(discord.PCMAudio(io.BytesIO(pcm)), volume=1.0)
+    old_cpu = drain(old, encode if encoder else None)
+
+    # New path: gain measured and applied once, packets replayed as-is
+    build_start = time.process_time()
+    normalized = LoudnessProfile(mode=MODE_LUFS).apply(pcm)
+    if encoder:
+        frames = [encoder.encode(normalized[i:i + OpusEncoder.FRAME_SIZE], OpusEncoder.SAMPLES_PER_FRAME)
+                  for i in range(0, len(normalized) - OpusEncoder.FRAME_SIZE + 1, OpusEncoder.FRAME_SIZE)]
+    else:
+        frames = [normalized[i:i + OpusEncoder.FRAME_SIZE]
+                  for i in range(0, len(normalized) - OpusEncoder.FRAME_SIZE + 1, OpusEncoder.FRAME_SIZE)]
+    build_cpu = time.process_time() - build_start
+    new_cpu = drain(CachedOpusAudio(frames))
+
+    print(f"Audio length:             {seconds:.1f}s")
+    print(f"Old path (per-frame):     {old_cpu / seconds * 1000:.3f} ms CPU per second of playback")
+    print(f"New path (cached):        {new_cpu / seconds * 1000:.3f} ms CPU per second of playback")
+    print(f"One-off build (measure + gain{' + encode' if encoder else ''}): {build_cpu * 1000:.1f} ms")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,186 @@
+"""Benchmark the database performance profiles with the bot's query mix
+
+Each profile gets a fresh database with the bot schema, seeded with role
+and usage history, then concurrent tasks replay a weighted mix of the
+queries the bot runs: role change flushes (RoleCommands), usage batches
+(CommandUsageWriter), role job checkpoints (RoleJobEngine), and the
+welcome channel, reconciler, /usagestats and health check reads.
+
+Usage:
+    python -m benchmarks.db_profile_bench [--ops 5000] [--concurrency 16] [--profiles durable,balanced,throughput]
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from cogs.role_commands import RoleCommands
+from utils.database import Database, PROFILES
+from utils.usage_log import _INSERT as INSERT_USAGE
+from utils.usage_rollup import UsageCompactor
+
+GUILD_ID = 1
+USERS = 20000
+ROLES = list(range(100, 120))
+COMMANDS = ("rolejob", "rolejob_status", "usagestats", "accept", "reject")
+
+async def seed(db: Database) -> None:
+    """Fill the tables the mix touches"""
+    async with db.transaction() as cursor:
+        await cursor.execute(
+            "INSERT INTO guilds (id, name, owner_id, member_count) VALUES (?, 'bench', 0, ?)",
+            (GUILD_ID, USERS)
+        )
+        await cursor.execute(
+            "INSERT INTO bot_settings (guild_id, welcome_channel_id) VALUES (?, 42)", (GUILD_ID,)
+        )
+        await cursor.executemany(
+            "INSERT OR IGNORE INTO user_roles (guild_id, user_id, role_id, assigned_by) VALUES (?, ?, ?, 0)",
+            [(GUILD_ID, user_id, random.choice(ROLES)) for user_id in range(USERS) for _ in range(2)]
+        )
+        await cursor.executemany(
+            "INSERT INTO command_usage (guild_id, user_id, command_name, success, used_at) VALUES (?, ?, ?, 1, datetime('now', ?))",
+            [(GUILD_ID, random.randrange(USERS), random.choice(COMMANDS), f"-{random.randrange(30 * 86400)} seconds")
+             for _ in range(USERS)]
+        )
+        await cursor.execute(
+            "INSERT INTO role_jobs (guild_id, role_id, action, selector, created_by, total) VALUES (?, ?, 'add', '{}', 0, ?)",
+            (GUILD_ID, ROLES[0], USERS)
+        )
+        await cursor.executemany(
+            "INSERT INTO role_job_members (job_id, user_id) VALUES (1, ?)",
+            [(user_id,) for user_id in range(USERS)]
+        )
+    await UsageCompactor(db).run_once()
+
+async def role_change_flush(db: Database) -> None:
+    batch = {
+        (GUILD_ID, random.randrange(USERS), random.choice(ROLES)): (0, random.random() < 0.7)
+        for _ in range(random.randint(1, 10))
+    }
+    async with db.transaction() as cursor:
+        await RoleCommands._write_role_changes(cursor, batch)
+
+async def usage_flush(db: Database) -> None:
+    rows = [(GUILD_ID, random.randrange(USERS), random.choice(COMMANDS), True, None) for _ in range(20)]
+    async with db.transaction() as cursor:
+        await cursor.executemany(INSERT_USAGE, rows)
+
+async def job_checkpoint(db: Database) -> None:
+    start = random.randrange(USERS - 100)
+    async with db.transaction() as cursor:
+        await cursor.executemany(
+            "UPDATE role_job_members SET state = ?, error = ? WHERE job_id = ? AND user_id = ?",
+            [('succeeded', None, 1, user_id) for user_id in range(start, start + 100)]
+        )
+        await cursor.execute(
+            "UPDATE role_jobs SET succeeded = succeeded + ?, updated_at = CURRENT_TIMESTAMP WHERE id = ?", (100, 1)
+        )
+
+async def welcome_lookup(db: Database) -> None:
+    async with db.read() as cursor:
+        await cursor.execute("SELECT welcome_channel_id FROM bot_settings WHERE guild_id = ?", (GUILD_ID,))
+        await cursor.fetchone()
+
+async def reconcile_range(db: Database) -> None:
+    low = random.randrange(USERS - 1000)
+    async with db.read() as cursor:
+        await cursor.execute(
+            "SELECT user_id, role_id FROM user_roles WHERE guild_id = ? AND user_id >= ? AND user_id < ?",
+            (GUILD_ID, low, low + 1000)
+        )
+        await cursor.fetchall()
+
+async def usage_totals(db: Database, compactor: UsageCompactor) -> None:
+    await compactor.command_totals(GUILD_ID, 30)
+
+async def health(db: Database) -> None:
+    async with db.read() as cursor:
+        await cursor.execute("SELECT 1")
+
+# (name, weight, is_write)
+MIX = (
+    ("role_change_flush", 25, True),
+    ("usage_flush", 15, True),
+    ("job_checkpoint", 5, True),
+    ("welcome_lookup", 25, False),
+    ("reconcile_range", 10, False),
+    ("usage_totals", 5, False),
+    ("health", 15, False)
+)
+
+def p99(samples: List[float]) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))] if ordered else 0.0
+
+async def run_profile(profile: str, args: argparse.Namespace) -> Dict[str, float]:
+    with tempfile.TemporaryDirectory() as directory:
+        db = Database(os.path.join(directory, 'bot.db'), readers=args.readers, profile=profile)
+        await db.init()
+        try:
+            await seed(db)
+            compactor = UsageCompactor(db)
+            operations = {
+                "role_change_flush": role_change_flush,
+                "usage_flush": usage_flush,
+                "job_checkpoint": job_checkpoint,
+                "welcome_lookup": welcome_lookup,
+                "reconcile_range": reconcile_range,
+                "usage_totals": lambda db: usage_totals(db, compactor),
+                "health": health
+            }
+            names = [name for name, _, _ in MIX]
+            weights = [weight for _, weight, _ in MIX]
+            writes = {name for name, _, is_write in MIX if is_write}
+            plan = random.Random(args.seed).choices(names, weights, k=args.ops)
+            latencies: Dict[bool, List[float]] = {True: [], False: []}
+
+            async def worker(ops: List[str]) -> None:
+                for name in ops:
+                    start = time.perf_counter()
+                    await operations[name](db)
+                    latencies[name in writes].append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            await asyncio.gather(*(worker(plan[i::args.concurrency]) for i in range(args.concurrency)))
+            elapsed = time.perf_counter() - start
+        finally:
+            await db.close()
+
+    return {
+        "ops": args.ops / elapsed,
+        "p99": p99(latencies[True] + latencies[False]),
+        "write_p99": p99(latencies[True]),
+        "read_p99": p99(latencies[False])
+    }
+
+async def run(args: argparse.Namespace) -> None:
+    print(f"{args.ops} ops, {args.concurrency} tasks, {args.readers} readers")
+    print(f"{'profile':<12}{'ops/sec':>10}{'p99 ms':>10}{'write p99':>12}{'read p99':>11}")
+    for profile in args.profiles.split(','):
+        random.seed(args.seed)
+        result = await run_profile(profile, args)
+        print(f"{profile:<12}{result['ops']:>10,.0f}{result['p99'] * 1000:>10.2f}"
+              f"{result['write_p99'] * 1000:>12.2f}{result['read_p99'] * 1000:>11.2f}")
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--ops', type=int, default=5000, help='Operations per profile')
+    parser.add_argument('--concurrency', type=int, default=16, help='Concurrent tasks issuing operations')
+    parser.add_argument('--readers', type=int, default=4, help='Read-only connections')
+    parser.add_argument('--profiles', default=','.join(PROFILES), help='Comma-separated profiles to run')
+    parser.add_argument('--seed', type=int, default=1, help='Random seed for the operation mix')
+    args = parser.parse_args()
+    # Database.init reads utils/schema.sql relative to the bot directory
+    os.chdir(ROOT)
+    asyncio.run(run(args))
+
+if __name__ == '__main__':
+    main()
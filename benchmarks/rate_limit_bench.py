@@ -0,0 +1,98 @@
+"""Benchmark role command rate limit checks per second
+
+Compares the old check, a COUNT over command_usage for the last minute
+followed by an INSERT and a commit on every call, with the in-memory
+sliding window limiter plus batched usage writes.
+
+Usage:
+    python -m benchmarks.rate_limit_bench [--checks 5000] [--users 200] [--history 50000]
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import aiosqlite
+
+from utils.database import Database
+from utils.rate_limiter import SlidingWindowLimiter
+from utils.usage_log import CommandUsageWriter
+
+SCHEMA = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'utils', 'schema.sql')
+COMMANDS = ("give", "remove")
+
+async def open_database(path: str, history: int, users: int) -> Database:
+    """Create a database with the bot schema and some usage history"""
+    db = Database()
+    db.db_path = path
+    db._connection = await aiosqlite.connect(path)
+    with open(SCHEMA) as f:
+        await db._connection.executescript(f.read())
+    await db._connection.executemany(
+        "INSERT INTO command_usage (guild_id, user_id, command_name, used_at) VALUES (?, ?, ?, datetime('now', ?))",
+        [(1, random.randrange(users), random.choice(COMMANDS), f"-{random.randrange(86400)} seconds")
+         for _ in range(history)]
+    )
+    await db._connection.commit()
+    return db
+
+async def old_check(db: Database, guild_id: int, user_id: int, command_name: str, limit: int) -> bool:
+    """The SQL rate limit check RoleCommands used to run"""
+    async with db.transaction() as cursor:
+        await cursor.execute("""
+            SELECT COUNT(*) FROM command_usage
+            WHERE guild_id = ? AND user_id = ? AND command_name = ?
+            AND used_at > datetime('now', '-1 minute')
+        """, (guild_id, user_id, command_name))
+        count = (await cursor.fetchone())[0]
+        await cursor.execute("""
+            INSERT INTO command_usage (guild_id, user_id, command_name)
+            VALUES (?, ?, ?)
+        """, (guild_id, user_id, command_name))
+        return count < limit
+
+async def run(args: argparse.Namespace) -> None:
+    calls = [(1, random.randrange(args.users), random.choice(COMMANDS)) for _ in range(args.checks)]
+
+    with tempfile.TemporaryDirectory() as directory:
+        db = await open_database(os.path.join(directory, 'old.db'), args.history, args.users)
+        start = time.perf_counter()
+        for guild_id, user_id, command_name in calls:
+            await old_check(db, guild_id, user_id, command_name, args.limit)
+        old_elapsed = time.perf_counter() - start
+        await db.close()
+
+        db = await open_database(os.path.join(directory, 'new.db'), args.history, args.users)
+        limiter = SlidingWindowLimiter(limit=args.limit, window=60)
+        writer = CommandUsageWriter(db)
+        writer.start()
+        start = time.perf_counter()
+        for key in calls:
+            allowed = limiter.check(key)
+            writer.record(*key, success=allowed)
+        check_elapsed = time.perf_counter() - start
+        await writer.close()
+        new_elapsed = time.perf_counter() - start
+        await db.close()
+
+    print(f"Checks:                   {args.checks} over {args.users} users, {args.history} history rows")
+    print(f"Old path (SQL per call):  {args.checks / old_elapsed:,.0f} checks/s")
+    print(f"New path (in memory):     {args.checks / check_elapsed:,.0f} checks/s")
+    print(f"New path incl. writes:    {args.checks / new_elapsed:,.0f} checks/s ({writer.flushes} batch writes)")
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--checks', type=int, default=5000, help='Rate limit checks to run')
+    parser.add_argument('--users', type=int, default=200, help='Distinct users issuing commands')
+    parser.add_argument('--history', type=int, default=50000, help='Existing command_usage rows')
+    parser.add_argument('--limit', type=int, default=60, help='Calls allowed per minute')
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+if __name__ == '__main__':
+    main()
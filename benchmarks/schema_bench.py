@@ -0,0 +1,210 @@
+"""Benchmark the integer snowflake schema against the old TEXT one
+
+Builds a database in the old layout (TEXT snowflakes, rowid tables,
+single-column indexes), times its upgrade through Database.init, and
+compares file size and the latency of the bot's lookups before and after.
+Both files are vacuumed before they are measured.
+
+Usage:
+    python -m benchmarks.schema_bench [--users 50000] [--usage 200000] [--queries 2000] [--batch 5000]
+"""
+import argparse
+import asyncio
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Sequence, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import aiosqlite
+
+from utils.database import Database
+
+# Snowflake-sized IDs, the text form is 18-19 characters like on Discord
+BASE = 700_000_000_000_000_000
+GUILDS = [BASE + guild for guild in range(5)]
+ROLES = [BASE + 10_000 + role for role in range(30)]
+COMMANDS = ("rolejob", "rolejob_status", "usagestats", "accept", "reject")
+
+# Tables as they were before schema version 1
+LEGACY_SCHEMA = """
+CREATE TABLE guilds (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    owner_id TEXT NOT NULL,
+    member_count INTEGER NOT NULL,
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE bot_settings (
+    guild_id TEXT PRIMARY KEY,
+    prefix TEXT DEFAULT '!',
+    welcome_channel_id TEXT,
+    audit_log_channel_id TEXT,
+    role_log_channel_id TEXT
+);
+CREATE TABLE user_roles (
+    guild_id TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    role_id TEXT NOT NULL,
+    assigned_by TEXT NOT NULL,
+    assigned_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (guild_id, user_id, role_id)
+);
+CREATE INDEX idx_user_roles_guild ON user_roles(guild_id);
+CREATE TABLE command_usage (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    guild_id TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    command_name TEXT NOT NULL,
+    used_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    success BOOLEAN DEFAULT 1,
+    error_message TEXT
+);
+CREATE INDEX idx_command_usage_guild ON command_usage(guild_id);
+CREATE INDEX idx_command_usage_user ON command_usage(user_id);
+CREATE TABLE role_jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    guild_id TEXT NOT NULL,
+    role_id TEXT NOT NULL,
+    action TEXT NOT NULL,
+    selector TEXT NOT NULL,
+    created_by TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'running',
+    total INTEGER NOT NULL DEFAULT 0,
+    succeeded INTEGER NOT NULL DEFAULT 0,
+    skipped INTEGER NOT NULL DEFAULT 0,
+    failed INTEGER NOT NULL DEFAULT 0,
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX idx_role_jobs_status ON role_jobs(status);
+CREATE INDEX idx_role_jobs_guild ON role_jobs(guild_id);
+CREATE TABLE role_job_members (
+    job_id INTEGER NOT NULL,
+    user_id TEXT NOT NULL,
+    state TEXT NOT NULL DEFAULT 'pending',
+    error TEXT,
+    PRIMARY KEY (job_id, user_id)
+);
+CREATE INDEX idx_role_job_members_state ON role_job_members(job_id, state);
+"""
+
+def user_id(index: int) -> int:
+    return BASE + 1_000_000 + index * 7919
+
+async def build_legacy(path: str, args: argparse.Namespace) -> None:
+    """Create and fill a database in the old layout"""
+    rng = random.Random(args.seed)
+    async with aiosqlite.connect(path) as connection:
+        # Already in the vacuum mode Database.init expects, so only the migration is timed
+        await connection.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        await connection.executescript(LEGACY_SCHEMA)
+        await connection.executemany(
+            "INSERT INTO guilds (id, name, owner_id, member_count) VALUES (?, 'bench', ?, ?)",
+            [(str(guild), str(user_id(0)), args.users) for guild in GUILDS]
+        )
+        await connection.executemany(
+            "INSERT INTO bot_settings (guild_id, welcome_channel_id) VALUES (?, ?)",
+            [(str(guild), str(guild + 1)) for guild in GUILDS]
+        )
+        await connection.executemany(
+            "INSERT OR IGNORE INTO user_roles (guild_id, user_id, role_id, assigned_by) VALUES (?, ?, ?, '0')",
+            [(str(rng.choice(GUILDS)), str(user_id(index)), str(rng.choice(ROLES)))
+             for index in range(args.users) for _ in range(2)]
+        )
+        await connection.executemany(
+            "INSERT INTO command_usage (guild_id, user_id, command_name, success, used_at) VALUES (?, ?, ?, 1, datetime('now', ?))",
+            [(str(rng.choice(GUILDS)), str(user_id(rng.randrange(args.users))), rng.choice(COMMANDS),
+              f"-{rng.randrange(7 * 86400)} seconds") for _ in range(args.usage)]
+        )
+        await connection.execute(
+            "INSERT INTO role_jobs (guild_id, role_id, action, selector, created_by, total) VALUES (?, ?, 'add', '{}', '0', ?)",
+            (str(GUILDS[0]), str(ROLES[0]), args.users)
+        )
+        await connection.executemany(
+            "INSERT INTO role_job_members (job_id, user_id, state) VALUES (1, ?, ?)",
+            [(str(user_id(index)), 'pending' if index % 2 else 'succeeded') for index in range(args.users)]
+        )
+        await connection.commit()
+
+async def vacuumed_size(path: str) -> int:
+    async with aiosqlite.connect(path) as connection:
+        await connection.execute("VACUUM")
+    return os.path.getsize(path)
+
+# (name, SQL, params for a random draw given an ID formatter)
+Query = Tuple[str, str, Callable[[random.Random, Callable[[int], Any]], Sequence[Any]]]
+
+QUERIES: List[Query] = [
+    ("welcome_lookup", "SELECT welcome_channel_id FROM bot_settings WHERE guild_id = ?",
+     lambda rng, fmt: (fmt(rng.choice(GUILDS)),)),
+    ("reconcile_range", "SELECT user_id, role_id FROM user_roles WHERE guild_id = ? AND user_id >= ? AND user_id < ?",
+     lambda rng, fmt: (lambda low: (fmt(rng.choice(GUILDS)), fmt(user_id(low)), fmt(user_id(low + 1000))))(rng.randrange(1000, 40000))),
+    ("role_holders", "SELECT COUNT(*) FROM user_roles WHERE guild_id = ? AND role_id = ?",
+     lambda rng, fmt: (fmt(rng.choice(GUILDS)), fmt(rng.choice(ROLES)))),
+    ("user_history", """SELECT COUNT(*) FROM command_usage
+        WHERE guild_id = ? AND user_id = ? AND command_name = ? AND used_at > datetime('now', '-1 day')""",
+     lambda rng, fmt: (fmt(rng.choice(GUILDS)), fmt(user_id(rng.randrange(40000))), rng.choice(COMMANDS))),
+    ("job_pending", "SELECT user_id FROM role_job_members WHERE job_id = 1 AND state = 'pending' LIMIT 100",
+     lambda rng, fmt: ()),
+    ("job_member_update", "SELECT state FROM role_job_members WHERE job_id = 1 AND user_id = ?",
+     lambda rng, fmt: (fmt(user_id(rng.randrange(40000))),))
+]
+
+async def time_queries(path: str, fmt: Callable[[int], Any], args: argparse.Namespace) -> Dict[str, float]:
+    """Mean latency in microseconds per query"""
+    results = {}
+    async with aiosqlite.connect(path) as connection:
+        for name, sql, params in QUERIES:
+            rng = random.Random(args.seed)
+            draws = [params(rng, fmt) for _ in range(args.queries)]
+            start = time.perf_counter()
+            for draw in draws:
+                async with connection.execute(sql, draw) as cursor:
+                    await cursor.fetchall()
+            results[name] = (time.perf_counter() - start) / args.queries * 1e6
+    return results
+
+async def run(args: argparse.Namespace) -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        legacy = os.path.join(directory, 'legacy.db')
+        upgraded = os.path.join(directory, 'bot.db')
+        await build_legacy(legacy, args)
+        shutil.copy(legacy, upgraded)
+
+        db = Database(upgraded, readers=1, migration_batch=args.batch)
+        start = time.perf_counter()
+        await db.init()
+        migration = time.perf_counter() - start
+        await db.close()
+
+        sizes = (await vacuumed_size(legacy), await vacuumed_size(upgraded))
+        before = await time_queries(legacy, str, args)
+        after = await time_queries(upgraded, int, args)
+
+    print(f"{args.users} users, {args.usage} usage rows; upgrade took {migration:.2f}s ({args.batch} rows per commit)")
+    print(f"{'':<20}{'TEXT':>12}{'INTEGER':>12}{'change':>9}")
+    print(f"{'file size (KiB)':<20}{sizes[0] / 1024:>12,.0f}{sizes[1] / 1024:>12,.0f}{(sizes[1] / sizes[0] - 1) * 100:>8.0f}%")
+    for name, _, _ in QUERIES:
+        print(f"{name + ' (us)':<20}{before[name]:>12.1f}{after[name]:>12.1f}{(after[name] / before[name] - 1) * 100:>8.0f}%")
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=50000, help='Members with two roles each')
+    parser.add_argument('--usage', type=int, default=200000, help='Raw command usage rows')
+    parser.add_argument('--queries', type=int, default=2000, help='Runs per query')
+    parser.add_argument('--batch', type=int, default=5000, help='Rows copied per commit during the upgrade')
+    parser.add_argument('--seed', type=int, default=1, help='Random seed')
+    args = parser.parse_args()
+    # Database.init reads utils/schema.sql relative to the bot directory
+    os.chdir(ROOT)
+    asyncio.run(run(args))
+
+if __name__ == '__main__':
+    main()
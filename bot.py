@@ -5,6 +5,10 @@ import os
 import asyncio
 from config import Config
 from utils.bot_logger import get_logger, update_logger
+from utils.database import db
+from utils.metrics import registry
+from utils.permission_cache import permissions
+from utils.usage_rollup import UsageCompactor
 
 # Get logger instance
 logger = get_logger()
@@ -37,6 +41,19 @@ class ArabLifeBot(commands.Bot):
         
         # Clear existing commands to remove stale ones
         self._clear_commands = True
+        
+        # Shared database handle used by the cogs
+        self.db = db
+        
+        # Rolls command_usage up per minute/day and purges old raw rows
+        self.usage_compactor = UsageCompactor(
+            db,
+            interval=Config.USAGE_COMPACTION_INTERVAL,
+            rollup_after=Config.USAGE_ROLLUP_AFTER_HOURS,
+            raw_retention=Config.USAGE_RAW_RETENTION_DAYS,
+            minute_retention=Config.USAGE_MINUTE_RETENTION_DAYS,
+            batch_size=Config.USAGE_COMPACTION_BATCH
+        )
 
     async def setup_hook(self) -> None:
         """Initialize bot setup"""
@@ -50,6 +67,18 @@ class ArabLifeBot(commands.Bot):
         discord.VoiceClient.default_timeout = Config.VOICE_TIMEOUT
         discord.VoiceClient.default_reconnect = True
         
+        # Open the database before any cog needs it
+        await self.db.init()
+        registry.register('database', self.db.stats)
+        registry.register('queries', self.db.queries.stats)
+        
+        # Shared permission cache, kept fresh by member/role/channel events
+        permissions.attach(self)
+        registry.register('permissions', permissions.stats)
+        
+        self.usage_compactor.start()
+        registry.register('usage_compaction', self.usage_compactor.stats)
+        
         # Load extensions
         try:
             for extension in self.initial_extensions:
@@ -58,6 +87,12 @@ class ArabLifeBot(commands.Bot):
         except Exception as e:
             logger.error(f'Failed to load extensions: {str(e)}')
 
+    async def close(self) -> None:
+        """Close the database after the gateway connection"""
+        await super().close()
+        await self.usage_compactor.close()
+        await self.db.close()
+
     async def on_error(self, event_method: str, *args, **kwargs) -> None:
         """Global error handler for all events"""
         logger.error(f'Error in {event_method}: {args} {kwargs}')
@@ -2,6 +2,7 @@ import discord
 from discord.ext import commands
 from discord import app_commands
 import re
+from utils.permission_cache import permissions
 
 class AnnouncementCommands(commands.Cog):
     def __init__(self, bot):
@@ -22,7 +23,7 @@ class AnnouncementCommands(commands.Cog):
         channel: discord.TextChannel
     ):
         # Check if bot has permission to send messages in the target channel
-        if not channel.permissions_for(interaction.guild.me).send_messages:
+        if not permissions.channel_permissions(channel, interaction.guild.me).send_messages:
             await interaction.response.send_message(
                 f"Error: I don't have permission to send messages in {channel.mention}",
                 ephemeral=True
@@ -30,7 +31,7 @@ class AnnouncementCommands(commands.Cog):
             return
 
         # Check if user has administrator permission
-        if not interaction.user.guild_permissions.administrator:
+        if not permissions.is_admin(interaction.user):
             await interaction.response.send_message(
                 "Error: You need 'Administrator' permission to send announcements",
                 ephemeral=True
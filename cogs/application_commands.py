@@ -1,8 +1,20 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
+import io
 import os
-from typing import Optional
+from typing import List, Optional
+from config import Config
+from utils.attachment_cache import AttachmentCache
+from utils.bulk import BulkResult, chunked, parse_ids, run_bulk
+from utils.metrics import registry
+from utils.permission_cache import permissions
+from utils.visa_renderer import VisaRenderer, DECISION_ACCEPTED, DECISION_REJECTED
+
+# Mentions per bulk announcement embed, well inside the description limit
+ANNOUNCEMENT_CHUNK = 40
+# Failures listed in the bulk summary before truncating
+SUMMARY_FAILURES = 15
 
 class ApplicationCommands(commands.Cog):
     def __init__(self, bot):
@@ -10,10 +22,66 @@ class ApplicationCommands(commands.Cog):
         self.staff_role_id = 1287486561914589346
         self.citizen_role_id = 1309555494586683474
         self.response_channel_id = 1309556312027430922
+        # Visa images are uploaded once and reused by URL afterwards
+        self.attachments = AttachmentCache(storage=lambda: self.bot.get_channel(Config.ATTACHMENT_STORAGE_CHANNEL_ID))
+        self.attachments.register("accept.png", "assets/accept.png")
+        self.attachments.register("reject.png", "assets/reject.png")
+        registry.register('attachments', self.attachments.stats)
+        self.renderer = VisaRenderer(max_workers=Config.VISA_RENDER_WORKERS) if Config.VISA_CARD_RENDER else None
+        if self.renderer:
+            registry.register('visa_cards', self.renderer.stats)
+
+    def cog_unload(self):
+        registry.unregister('attachments')
+        if self.renderer:
+            registry.unregister('visa_cards')
+            self.renderer.close()
+
+    @commands.Cog.listener()
+    async def on_raw_message_delete(self, payload: discord.RawMessageDeleteEvent):
+        # Raw events also cover messages that fell out of the message cache
+        self.attachments.message_deleted(payload.message_id)
+
+    @commands.Cog.listener()
+    async def on_raw_bulk_message_delete(self, payload: discord.RawBulkMessageDeleteEvent):
+        for message_id in payload.message_ids:
+            self.attachments.message_deleted(message_id)
+
+    async def render_visa(self, user: discord.Member, reviewer: discord.Member, decision: str, reason: Optional[str] = None) -> Optional[discord.File]:
+        """Render a personalized visa card for a decision
+
+        Returns:
+            The card as a file, or None to fall back to the static image
+        """
+        if not self.renderer or not self.renderer.available:
+            return None
+        try:
+            avatar = await user.display_avatar.replace(size=256, format='png').read()
+        except discord.HTTPException:
+            avatar = None
+        card = await self.renderer.render(
+            decision,
+            user.display_name,
+            reviewer.display_name,
+            discord.utils.utcnow().strftime('%Y-%m-%d'),
+            reason,
+            avatar
+        )
+        if card is None:
+            return None
+        return discord.File(io.BytesIO(card), filename="visa.png")
+
+    async def send_decision(self, channel, embed: discord.Embed, card: Optional[discord.File], image: str) -> None:
+        """Send a decision embed with the rendered card, or the cached static image"""
+        if card:
+            embed.set_image(url="attachment://visa.png")
+            await channel.send(embed=embed, file=card)
+        else:
+            await self.attachments.send(channel, image, embed)
 
     def has_staff_role(self, member: discord.Member) -> bool:
         """Check if member has the required staff role."""
-        return any(role.id == self.staff_role_id for role in member.roles)
+        return permissions.has_role(member, self.staff_role_id)
 
     @app_commands.command(name="accept", description="Accept a user's application")
     async def accept(self, interaction: discord.Interaction, user: discord.Member):
@@ -48,12 +116,9 @@ class ApplicationCommands(commands.Cog):
                 color=discord.Color.green()
             )
 
-            # Attach the approved visa image
-            file = discord.File("assets/accept.png", filename="accept.png")
-            embed.set_image(url="attachment://accept.png")
-            
-            # Send the embed to the response channel
-            await response_channel.send(embed=embed, file=file)
+            # Send the embed with the applicant's visa card to the response channel
+            card = await self.render_visa(user, interaction.user, DECISION_ACCEPTED)
+            await self.send_decision(response_channel, embed, card, "accept.png")
             
             # Send followup to original interaction
             await interaction.followup.send(f"Successfully approved {user.mention}'s application.", ephemeral=True)
@@ -105,12 +170,9 @@ class ApplicationCommands(commands.Cog):
                     color=discord.Color.red()
                 )
 
-                # Attach the rejected visa image
-                file = discord.File("assets/reject.png", filename="reject.png")
-                embed.set_image(url="attachment://reject.png")
-                
-                # Send the embed to the response channel
-                await response_channel.send(embed=embed, file=file)
+                # Send the embed with the applicant's visa card to the response channel
+                card = await self.render_visa(user, interaction.user, DECISION_REJECTED, reason)
+                await self.send_decision(response_channel, embed, card, "reject.png")
             except Exception as e:
                 print(f"Error creating/sending embed: {str(e)}")
                 try:
@@ -134,5 +196,154 @@ class ApplicationCommands(commands.Cog):
             except:
                 pass
 
+    async def resolve_members(self, guild: discord.Guild, role: Optional[discord.Role], members: Optional[str]) -> List[discord.Member]:
+        """Collect bulk targets from a role and/or a list of mentions or IDs"""
+        targets = {}
+        if role:
+            for member in role.members:
+                targets[member.id] = member
+        for member_id in parse_ids(members):
+            if member_id in targets:
+                continue
+            member = guild.get_member(member_id)
+            if member is None:
+                try:
+                    member = await guild.fetch_member(member_id)
+                except discord.HTTPException:
+                    continue
+            targets[member.id] = member
+        return [member for member in targets.values() if not member.bot]
+
+    def format_progress(self, verb: str, result: BulkResult) -> str:
+        """Format the bulk progress line"""
+        return (
+            f"{verb} applications: {result.done}/{result.total} processed "
+            f"({len(result.succeeded)} done, {len(result.skipped)} skipped, {len(result.failed)} failed)"
+        )
+
+    def format_summary(self, verb: str, result: BulkResult) -> str:
+        """Format the final bulk summary with per-member failures"""
+        lines = [f"{self.format_progress(verb, result)} in {result.elapsed:.1f}s."]
+        if result.failed:
+            lines.append("\nFailed:")
+            for member, error in result.failed[:SUMMARY_FAILURES]:
+                lines.append(f"- {member.mention}: {error}")
+            if len(result.failed) > SUMMARY_FAILURES:
+                lines.append(f"...and {len(result.failed) - SUMMARY_FAILURES} more")
+        return "\n".join(lines)[:2000]
+
+    async def announce_bulk(self, channel, members: List[discord.Member], title: str, description: str, color: discord.Color, image: str) -> None:
+        """Announce bulk decisions in a few chunked embeds instead of one per member"""
+        for chunk in chunked(members, ANNOUNCEMENT_CHUNK):
+            embed = discord.Embed(
+                title="Application Response",
+                description=f"{' '.join(member.mention for member in chunk)}\n{title}\n\n{description}",
+                color=color
+            )
+            await self.attachments.send(channel, image, embed)
+
+    async def run_bulk_decision(self, interaction: discord.Interaction, role: Optional[discord.Role], members: Optional[str], verb: str, action) -> Optional[BulkResult]:
+        """Shared flow for bulk commands: validate, run with progress, summarize
+
+        Returns:
+            The bulk result, or None if the command was refused
+        """
+        await interaction.response.defer(ephemeral=True)
+
+        if not self.has_staff_role(interaction.user):
+            await interaction.followup.send("You don't have permission to use this command.", ephemeral=True)
+            return None
+
+        targets = await self.resolve_members(interaction.guild, role, members)
+        if not targets:
+            await interaction.followup.send("No members selected. Pass a role and/or member mentions.", ephemeral=True)
+            return None
+
+        # One progress message, edited in place while the run goes
+        result = BulkResult(len(targets))
+        progress = await interaction.followup.send(self.format_progress(verb, result), ephemeral=True, wait=True)
+
+        async def on_progress(result: BulkResult) -> None:
+            await progress.edit(content=self.format_progress(verb, result))
+
+        result = await run_bulk(
+            targets,
+            action,
+            concurrency=Config.BULK_CONCURRENCY,
+            on_progress=on_progress,
+            progress_interval=Config.BULK_PROGRESS_INTERVAL
+        )
+        await progress.edit(content=self.format_summary(verb, result))
+        return result
+
+    @app_commands.command(name="accept_bulk", description="Accept many applications at once")
+    @app_commands.describe(role="Accept every member with this role", members="Member mentions or IDs to accept")
+    async def accept_bulk(self, interaction: discord.Interaction, role: Optional[discord.Role] = None, members: Optional[str] = None):
+        try:
+            response_channel = self.bot.get_channel(self.response_channel_id)
+            citizen_role = interaction.guild.get_role(self.citizen_role_id)
+            if not response_channel or not citizen_role:
+                await interaction.response.send_message("Could not find the response channel or citizen role.", ephemeral=True)
+                return
+
+            async def accept_member(member: discord.Member) -> bool:
+                if citizen_role in member.roles:
+                    return False
+                await member.add_roles(citizen_role, reason=f"Application accepted by {interaction.user}")
+                return True
+
+            result = await self.run_bulk_decision(interaction, role, members, "Accepting", accept_member)
+            if result and result.succeeded:
+                await self.announce_bulk(
+                    response_channel,
+                    result.succeeded,
+                    "Visa Applications Have Been Approved!",
+                    f"Accepted By: {interaction.user.mention}",
+                    discord.Color.green(),
+                    "accept.png"
+                )
+
+        except discord.NotFound:
+            print("Interaction expired")
+        except Exception as e:
+            print(f"Error in accept_bulk command: {str(e)}")
+            try:
+                await interaction.followup.send("An error occurred while processing the command.", ephemeral=True)
+            except:
+                pass
+
+    @app_commands.command(name="reject_bulk", description="Reject many applications at once")
+    @app_commands.describe(reason="Reason shown for every rejection", role="Reject every member with this role", members="Member mentions or IDs to reject")
+    async def reject_bulk(self, interaction: discord.Interaction, reason: str, role: Optional[discord.Role] = None, members: Optional[str] = None):
+        try:
+            response_channel = self.bot.get_channel(self.response_channel_id)
+            if not response_channel:
+                await interaction.response.send_message("Could not find the response channel.", ephemeral=True)
+                return
+
+            async def reject_member(member: discord.Member) -> bool:
+                # Rejections only change the announcement, nothing to do per member
+                return True
+
+            result = await self.run_bulk_decision(interaction, role, members, "Rejecting", reject_member)
+            if result and result.succeeded:
+                await self.announce_bulk(
+                    response_channel,
+                    result.succeeded,
+                    "Visa Applications Have Been Rejected!",
+                    f"Rejected By: {interaction.user.mention}\nReason: {reason}",
+                    discord.Color.red(),
+                    "reject.png"
+                )
+
+        except discord.NotFound:
+            print("Interaction expired")
+        except Exception as e:
+            print(f"Error in reject_bulk command: {str(e)}")
+            try:
+                await interaction.followup.send("An error occurred while processing the command.", ephemeral=True)
+            except:
+                pass
+
 async def setup(bot):
     await bot.add_cog(ApplicationCommands(bot))
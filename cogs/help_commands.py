@@ -155,7 +155,9 @@ class HelpCommands(Cog, LoggerMixin):
             value=(
                 "• `/apply` - بدء عملية التقديم\n"
                 "• `/accept [member]` - قبول عضو\n"
-                "• `/reject [member]` - رفض عضو"
+                "• `/reject [member]` - رفض عضو\n"
+                "• `/accept_bulk [role] [members]` - قبول عدة أعضاء دفعة واحدة\n"
+                "• `/reject_bulk [reason] [role] [members]` - رفض عدة أعضاء دفعة واحدة"
             ),
             inline=False
         )
@@ -2,63 +2,278 @@ import discord
 from discord.ext import commands
 from discord import app_commands
 from discord.ext.commands import Cog, cooldown, BucketType
+import asyncio
 import logging
+import time
+from typing import Optional
 from config import Config
+from utils.metrics import registry
+from utils.permission_cache import permissions
+from utils.rate_limiter import SlidingWindowLimiter
+from utils.role_reconciler import RoleReconciler
+from utils.role_jobs import ACTION_ADD, ACTION_REMOVE, STATUS_RUNNING, RoleJob, RoleJobEngine, RoleSelector, parse_date
+from utils.usage_log import CommandUsageWriter
+from utils.write_behind import WriteBehindBuffer
 
 logger = logging.getLogger('discord')
 
+# assigned_by stored for role changes made outside the bot
+EXTERNAL_ASSIGNER = 0
+
+# How long /rolejob_status keeps editing its message, inside the 15 minute interaction window
+STATUS_WATCH_SECONDS = 600
+
 class RoleCommands(Cog):
     """Cog for role management commands"""
     
     def __init__(self, bot):
         self.bot = bot
-        self._role_cache = {}
+        # Usage per (guild, user, command) over the last minute, checked in memory
+        self.rate_limiter = SlidingWindowLimiter(
+            limit=Config.ROLE_COMMAND_COOLDOWN,
+            window=60,
+            max_keys=Config.ROLE_RATE_LIMIT_KEYS
+        )
+        self.usage = CommandUsageWriter(
+            bot.db,
+            batch_size=Config.USAGE_BATCH_SIZE,
+            flush_interval=Config.USAGE_FLUSH_INTERVAL
+        )
+        # Role changes are collapsed per (guild, user, role) and written in batches
+        self.role_changes = WriteBehindBuffer(
+            bot.db,
+            self._write_role_changes,
+            flush_interval=Config.ROLE_TRACK_FLUSH_MS / 1000,
+            max_batch=Config.ROLE_TRACK_BATCH,
+            merge=self._merge_role_change
+        )
+        # Mirrors roles changed outside the bot into user_roles
+        self.reconciler = RoleReconciler(bot.db, self.role_changes, chunk_size=Config.ROLE_RECONCILE_CHUNK)
+        # Bulk role jobs, checkpointed so they resume after a restart
+        self.jobs = RoleJobEngine(
+            bot,
+            bot.db,
+            max_concurrency=Config.ROLE_JOB_CONCURRENCY,
+            checkpoint_size=Config.ROLE_JOB_CHECKPOINT,
+            on_change=self._track_role_change
+        )
+        self._jobs_resumed = False
+        registry.register('role_rate_limit', self.rate_limiter.stats)
+        registry.register('command_usage', self.usage.stats)
+        registry.register('role_changes', self.role_changes.stats)
+        registry.register('role_jobs', self.jobs.stats)
+        registry.register('role_reconciler', self.reconciler.stats)
+
+    async def cog_load(self):
+        self.usage.start()
+        self.role_changes.start()
+
+    async def cog_unload(self):
+        registry.unregister('role_rate_limit')
+        registry.unregister('command_usage')
+        registry.unregister('role_changes')
+        registry.unregister('role_jobs')
+        registry.unregister('role_reconciler')
+        await self.jobs.close()
+        await self.usage.close()
+        await self.role_changes.close()
+
+    @commands.Cog.listener()
+    async def on_ready(self):
+        """Reconcile user_roles and resume bulk role jobs once the guild cache is filled"""
+        # Events may have been missed while disconnected, so this runs on every ready
+        for guild in self.bot.guilds:
+            try:
+                await self.reconciler.reconcile(guild)
+            except Exception as e:
+                logger.error(f"Failed to reconcile user_roles for {guild.id}: {e}")
+
+        if self._jobs_resumed:
+            return
+        self._jobs_resumed = True
+        try:
+            await self.jobs.resume()
+        except Exception as e:
+            logger.error(f"Failed to resume role jobs: {e}")
+
+    @commands.Cog.listener()
+    async def on_member_update(self, before, after):
+        await self.reconciler.on_member_update(before, after)
+
+    @commands.Cog.listener()
+    async def on_member_remove(self, member):
+        await self.reconciler.on_member_remove(member)
+
+    @commands.Cog.listener()
+    async def on_guild_role_delete(self, role):
+        try:
+            await self.reconciler.on_guild_role_delete(role)
+        except Exception as e:
+            logger.error(f"Failed to clear deleted role {role.id} from user_roles: {e}")
         
     async def _check_rate_limit(self, interaction: discord.Interaction) -> bool:
         """Check if user has exceeded rate limit"""
-        async with self.bot.db.transaction() as cursor:
-            # Get recent command usage
-            await cursor.execute("""
-                SELECT COUNT(*) FROM command_usage 
-                WHERE guild_id = ? AND user_id = ? AND command_name = ? 
-                AND used_at > datetime('now', '-1 minute')
-            """, (str(interaction.guild_id), str(interaction.user.id), interaction.command.name))
-            count = (await cursor.fetchone())[0]
-            
-            # Log command usage
-            await cursor.execute("""
-                INSERT INTO command_usage (guild_id, user_id, command_name)
-                VALUES (?, ?, ?)
-            """, (str(interaction.guild_id), str(interaction.user.id), interaction.command.name))
-            
-            return count < Config.ROLE_COMMAND_COOLDOWN
+        command_name = interaction.command.name
+        allowed = self.rate_limiter.check((interaction.guild_id, interaction.user.id, command_name))
+
+        # Usage rows are persisted in batches, off the command path
+        self.usage.record(interaction.guild_id, interaction.user.id, command_name, success=allowed)
+        return allowed
             
     async def _track_role_change(self, guild_id: int, user_id: int, role_id: int, assigned_by: int, is_add: bool):
         """Track role changes in database"""
-        async with self.bot.db.transaction() as cursor:
-            if is_add:
-                await cursor.execute("""
-                    INSERT OR REPLACE INTO user_roles (guild_id, user_id, role_id, assigned_by)
-                    VALUES (?, ?, ?, ?)
-                """, (str(guild_id), str(user_id), str(role_id), str(assigned_by)))
+        self.role_changes.put((guild_id, user_id, role_id), (assigned_by, is_add))
+
+    @staticmethod
+    def _merge_role_change(pending, new):
+        """Keep the bot's own assigner when the same add is also observed from an event"""
+        if pending[1] and new[1] and new[0] is None:
+            return pending
+        return new
+
+    @staticmethod
+    async def _write_role_changes(cursor, batch):
+        """Write the latest change per (guild, user, role) in one transaction
+
+        Adds with no assigner were observed from guild state and never
+        replace an assigner already stored.
+        """
+        added = []
+        observed = []
+        removed = []
+        for (guild_id, user_id, role_id), (assigned_by, is_add) in batch.items():
+            if not is_add:
+                removed.append((guild_id, user_id, role_id))
+            elif assigned_by is None:
+                observed.append((guild_id, user_id, role_id, EXTERNAL_ASSIGNER))
             else:
-                await cursor.execute("""
-                    DELETE FROM user_roles 
-                    WHERE guild_id = ? AND user_id = ? AND role_id = ?
-                """, (str(guild_id), str(user_id), str(role_id)))
+                added.append((guild_id, user_id, role_id, assigned_by))
+        if observed:
+            await cursor.executemany("""
+                INSERT OR IGNORE INTO user_roles (guild_id, user_id, role_id, assigned_by)
+                VALUES (?, ?, ?, ?)
+            """, observed)
+        if added:
+            await cursor.executemany("""
+                INSERT INTO user_roles (guild_id, user_id, role_id, assigned_by)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT (guild_id, user_id, role_id) DO UPDATE SET
+                    assigned_by = excluded.assigned_by,
+                    assigned_at = CURRENT_TIMESTAMP
+            """, added)
+        if removed:
+            await cursor.executemany("""
+                DELETE FROM user_roles 
+                WHERE guild_id = ? AND user_id = ? AND role_id = ?
+            """, removed)
 
     async def _check_role_hierarchy(self, interaction: discord.Interaction, member: discord.Member) -> bool:
         """Check if the bot's role is high enough to manage the target member's roles"""
-        bot_member = interaction.guild.get_member(self.bot.user.id)
-        return bot_member.top_role > member.top_role
+        return permissions.outranks(interaction.guild.me, member)
 
     def _get_role(self, guild_id):
-        """Get role from cache or fetch and cache it"""
-        if guild_id not in self._role_cache:
-            role = discord.utils.get(self.bot.get_guild(guild_id).roles, id=Config.ROLE_ID_TO_GIVE)
-            if role:
-                self._role_cache[guild_id] = role
-        return self._role_cache.get(guild_id)
+        """Get the role to give, cached until it is updated or deleted"""
+        return permissions.get_role(self.bot.get_guild(guild_id), Config.ROLE_ID_TO_GIVE)
+
+    def _job_embed(self, job: RoleJob) -> discord.Embed:
+        """Build the progress embed for a bulk role job"""
+        verb = "إضافة" if job.action == ACTION_ADD else "إزالة"
+        embed = discord.Embed(
+            title=f"مهمة الرتب #{job.id}",
+            description=f"{verb} <@&{job.role_id}>\n{job.selector.describe()}",
+            color=discord.Color.blue() if job.status == STATUS_RUNNING else discord.Color.green()
+        )
+        embed.add_field(name="الحالة", value=job.status)
+        embed.add_field(name="التقدم", value=f"{job.done}/{job.total}")
+        embed.add_field(name="تم", value=str(job.succeeded))
+        embed.add_field(name="تم التخطي", value=str(job.skipped))
+        embed.add_field(name="فشل", value=str(job.failed))
+        embed.add_field(name="السرعة", value=f"{job.rate:.1f}/s")
+        if job.eta is not None:
+            embed.add_field(name="الوقت المتبقي", value=f"{job.eta:.0f}s")
+        return embed
+
+    @app_commands.command(name="rolejob", description="Add or remove a role for every matching member")
+    @app_commands.describe(
+        action="Add or remove the role",
+        role="Role to change (default: the configured member role)",
+        has_role="Only members with this role",
+        without_role="Only members without this role",
+        joined_before="Only members who joined before this date (YYYY-MM-DD)",
+        joined_after="Only members who joined on or after this date (YYYY-MM-DD)"
+    )
+    @app_commands.choices(action=[
+        app_commands.Choice(name="Add", value=ACTION_ADD),
+        app_commands.Choice(name="Remove", value=ACTION_REMOVE)
+    ])
+    @app_commands.checks.has_permissions(manage_roles=True)
+    async def role_job(
+        self,
+        interaction: discord.Interaction,
+        action: str,
+        role: Optional[discord.Role] = None,
+        has_role: Optional[discord.Role] = None,
+        without_role: Optional[discord.Role] = None,
+        joined_before: Optional[str] = None,
+        joined_after: Optional[str] = None
+    ):
+        """Start a checkpointed bulk role job"""
+        if not await self._check_rate_limit(interaction):
+            await interaction.response.send_message("*الرجاء الانتظار قبل استخدام هذا الأمر مرة أخرى.*", ephemeral=True)
+            return
+
+        role = role or self._get_role(interaction.guild_id)
+        if role is None or role.managed or role >= interaction.guild.me.top_role:
+            await interaction.response.send_message("*لا يمكن للبوت إدارة هذه الرتبة.*", ephemeral=True)
+            return
+
+        try:
+            selector = RoleSelector(
+                [has_role.id] if has_role else (),
+                [without_role.id] if without_role else (),
+                parse_date(joined_before),
+                parse_date(joined_after)
+            )
+        except ValueError:
+            await interaction.response.send_message("*تاريخ غير صالح، استخدم الصيغة YYYY-MM-DD.*", ephemeral=True)
+            return
+
+        await interaction.response.defer(ephemeral=True)
+        job = await self.jobs.create(interaction.guild, role, action, selector, interaction.user.id)
+        if not job.total:
+            await interaction.followup.send("*لا يوجد أعضاء مطابقين.*", ephemeral=True)
+            return
+        await interaction.followup.send(embed=self._job_embed(job), ephemeral=True)
+
+    @app_commands.command(name="rolejob_status", description="Watch the progress of a bulk role job")
+    @app_commands.describe(job_id="Job number (default: the latest job)")
+    @app_commands.checks.has_permissions(manage_roles=True)
+    async def role_job_status(self, interaction: discord.Interaction, job_id: Optional[int] = None):
+        """Show a job's progress and keep it updated while it runs"""
+        job = await (self.jobs.get(job_id) if job_id else self.jobs.latest(interaction.guild_id))
+        if job is None or job.guild_id != interaction.guild_id:
+            await interaction.response.send_message("*لم يتم العثور على المهمة.*", ephemeral=True)
+            return
+
+        await interaction.response.send_message(embed=self._job_embed(job), ephemeral=True)
+        deadline = time.monotonic() + STATUS_WATCH_SECONDS
+        while job.status == STATUS_RUNNING and time.monotonic() < deadline:
+            await asyncio.sleep(Config.BULK_PROGRESS_INTERVAL)
+            try:
+                await interaction.edit_original_response(embed=self._job_embed(job))
+            except discord.HTTPException:
+                break
+
+    @app_commands.command(name="rolejob_cancel", description="Stop a running bulk role job")
+    @app_commands.describe(job_id="Job number")
+    @app_commands.checks.has_permissions(manage_roles=True)
+    async def role_job_cancel(self, interaction: discord.Interaction, job_id: int):
+        """Stop a job after its current chunk"""
+        job = self.jobs.jobs.get(job_id)
+        if job is None or job.guild_id != interaction.guild_id or not self.jobs.cancel(job_id):
+            await interaction.response.send_message("*لم يتم العثور على مهمة قيد التشغيل.*", ephemeral=True)
+            return
+        await interaction.response.send_message(f"*سيتم إيقاف المهمة #{job_id} بعد الدفعة الحالية.*", ephemeral=True)
 
     async def cog_check(self, ctx):
         """Check if user has required permissions for any command in this cog"""
@@ -92,3 +307,13 @@ async def setup(bot):
     
     # Add cog to bot
     await bot.add_cog(cog)
+    
+    try:
+        # Register app commands to guild
+        guild = discord.Object(id=Config.GUILD_ID)
+        bot.tree.add_command(cog.role_job, guild=guild)
+        bot.tree.add_command(cog.role_job_status, guild=guild)
+        bot.tree.add_command(cog.role_job_cancel, guild=guild)
+        print("Registered role commands to guild")
+    except Exception as e:
+        print(f"Failed to register role commands: {e}")
@@ -88,6 +88,32 @@ class StatusCommands(Cog):
             )
             logger.error(f"Error changing status: {str(e)}")
 
+    @app_commands.command(
+        name="usagestats",
+        description="Show command usage for this server"
+    )
+    @app_commands.describe(days="Number of days to include (default 30)")
+    @app_commands.checks.has_permissions(administrator=True)
+    async def usage_stats(self, interaction: discord.Interaction, days: app_commands.Range[int, 1, 365] = 30):
+        """Show per-command usage from the daily rollups"""
+        totals = await self.bot.usage_compactor.command_totals(interaction.guild_id, days)
+        if not totals:
+            await interaction.response.send_message(
+                "*لا توجد أوامر مستخدمة في هذه الفترة.*",
+                ephemeral=True
+            )
+            return
+
+        embed = discord.Embed(
+            title=f"استخدام الأوامر - آخر {days} يوم",
+            description="\n".join(
+                f"`/{name}`: {succeeded + failed} ({failed} مرفوض)"
+                for name, succeeded, failed in totals[:25]
+            ),
+            color=discord.Color.blue()
+        )
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
     async def cog_app_command_error(self, interaction: discord.Interaction, error: app_commands.AppCommandError):
         """Error handler for application commands"""
         if isinstance(error, app_commands.CommandOnCooldown):
@@ -119,6 +145,7 @@ async def setup(bot):
         # Register app commands to guild
         guild = discord.Object(id=Config.GUILD_ID)
         bot.tree.add_command(cog.set_status, guild=guild)
+        bot.tree.add_command(cog.usage_stats, guild=guild)
         print("Registered status commands to guild")
     except Exception as e:
         print(f"Failed to register status commands: {e}")
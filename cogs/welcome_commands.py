@@ -1,153 +1,431 @@
 import discord
-import os
+import aiohttp
 import asyncio
+import io
+import os
+import time
+from typing import Dict, List, Optional, Set
+from discord import app_commands
 from discord.ext import commands
 from config import Config
+from utils.audio_cache import OpusClipCache, AudioCacheError
+from utils.audio_assets import AudioAssetCatalog
+from utils.loudness import LoudnessProfile
+from utils.voice_telemetry import VoiceTelemetry
+from utils.welcome_scheduler import WelcomeScheduler
+from utils.voice_manager import VoiceConnectionManager
+from utils.voice_presence import VoicePresencePolicy
+from utils.voice_worker import VoiceWorkerClient
+from utils.welcome_banner import BannerJob, WelcomeBannerPipeline, normalize_background
+from utils.metrics import registry, LatencyBudget, Histogram
+from utils.permission_cache import permissions
 import logging
 
 class WelcomeCommands(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.logger = logging.getLogger(__name__)
-        self.voice_client = None
-        self.reconnect_task = None
+        self.voice_manager = VoiceConnectionManager(
+            bot,
+            timeout=Config.VOICE_TIMEOUT,
+            base_delay=Config.RECONNECT_DELAY,
+            max_delay=Config.MAX_RECONNECT_DELAY,
+            max_attempts=Config.MAX_RECONNECT_ATTEMPTS
+        )
+        self.assets = AudioAssetCatalog(
+            OpusClipCache(
+                executable=Config.FFMPEG_PATH,
+                loudness=LoudnessProfile(
+                    mode=Config.WELCOME_SOUND_NORMALIZE,
+                    volume=Config.WELCOME_SOUND_VOLUME * 2.0,  # Double the volume for better audibility
+                    target_lufs=Config.WELCOME_SOUND_TARGET_LUFS,
+                    peak_db=Config.WELCOME_SOUND_PEAK_DB
+                ),
+                max_bytes=Config.WELCOME_SOUND_CACHE_BYTES
+            ),
+            default_path=Config.WELCOME_SOUND_PATH,
+            directory=Config.WELCOME_SOUND_DIR,
+            watch_interval=Config.WELCOME_SOUND_WATCH_INTERVAL
+        )
+        self.scheduler = WelcomeScheduler(
+            self.start_welcome_sound,
+            debounce=Config.WELCOME_DEBOUNCE_MS / 1000,
+            max_delay=Config.WELCOME_DEBOUNCE_MAX_MS / 1000,
+            max_queue=Config.WELCOME_MAX_QUEUE,
+            policy=Config.WELCOME_BURST_POLICY
+        )
+        self.first_audio_latency = LatencyBudget(Config.WELCOME_LATENCY_TARGET_MS / 1000)
+        self.connect_latency = Histogram()
+        self.telemetry = VoiceTelemetry(
+            interval=Config.VOICE_HEALTH_CHECK_INTERVAL,
+            jitter_warn=Config.VOICE_JITTER_WARN_MS / 1000,
+            late_threshold=Config.VOICE_LATE_FRAME_MS / 1000
+        )
+        self.presence = VoicePresencePolicy(
+            idle_timeout=Config.WELCOME_IDLE_DISCONNECT,
+            prewarm_window=Config.WELCOME_PREWARM_WINDOW
+        )
+        self._presence_task: Optional[asyncio.Task] = None
+        self.banners = WelcomeBannerPipeline(
+            workers=Config.WELCOME_BANNER_WORKERS,
+            queue_size=Config.WELCOME_BANNER_QUEUE
+        )
+        # Welcome text channel per guild as stored in bot_settings, None when unset
+        self._welcome_text_channels: Dict[int, Optional[int]] = {}
+        registry.register('welcome_scheduler', self.scheduler.stats)
+        registry.register('voice_connections', self.voice_manager.stats)
+        registry.register('welcome_latency', self.latency_stats)
+        registry.register('welcome_assets', self.assets.stats)
+        registry.register('voice_playback', self.telemetry.stats)
+        registry.register('voice_presence', self.presence.stats)
+        registry.register('welcome_banners', self.banners.stats)
 
-    async def ensure_voice_connection(self):
-        """Ensure bot is connected to welcome channel"""
-        try:
-            channel = self.bot.get_channel(Config.WELCOME_VOICE_CHANNEL_ID)
-            if not channel:
-                self.logger.error(f"Could not find welcome channel with ID {Config.WELCOME_VOICE_CHANNEL_ID}")
-                return False
+        # In worker mode playback runs in a separate process and this cog only dispatches
+        self.worker = None
+        if Config.VOICE_WORKER_ENABLED:
+            self._worker_connected: Set[int] = set()
+            self.worker = VoiceWorkerClient(on_first_audio=self._observe_first_audio, start_timeout=Config.VOICE_TIMEOUT)
+            registry.register('voice_worker', self.worker.stats)
 
+    async def cog_load(self):
+        """Load welcome sounds and pre-encode the default clip so the first join doesn't pay for it"""
+        self.banners.start()
+        if self.presence.enabled:
+            self._presence_task = asyncio.create_task(self.maintain_presence())
+        if self.worker:
+            self.worker.start()
+            return
+        asyncio.create_task(self.assets.load())
+        self.assets.start()
+        self.telemetry.start(lambda: self.bot.voice_clients)
+
+    def register_welcome_channels(self):
+        """Index configured welcome channels by guild"""
+        for channel_id in Config.WELCOME_VOICE_CHANNEL_IDS:
+            channel = self.bot.get_channel(channel_id)
+            if not channel:
+                self.logger.error(f"Could not find welcome channel with ID {channel_id}")
+                continue
             if not isinstance(channel, discord.VoiceChannel):
-                self.logger.error(f"Channel with ID {Config.WELCOME_VOICE_CHANNEL_ID} is not a voice channel")
-                return False
+                self.logger.error(f"Channel with ID {channel_id} is not a voice channel")
+                continue
+            self.voice_manager.register_channel(channel.guild.id, channel.id)
 
-            # If we're already connected to the right channel, return True
-            if self.voice_client and self.voice_client.is_connected():
-                if self.voice_client.channel.id == Config.WELCOME_VOICE_CHANNEL_ID:
-                    return True
-                else:
-                    # Only disconnect if connected to wrong channel
-                    try:
-                        await self.voice_client.disconnect(force=True)
-                        self.voice_client = None
-                    except Exception:
-                        pass
+    async def ensure_voice_connection(self, channel_id: int) -> Optional[discord.VoiceClient]:
+        """Ensure bot is connected to a welcome channel"""
+        try:
+            channel = self.bot.get_channel(channel_id)
+            if not isinstance(channel, discord.VoiceChannel):
+                self.logger.error(f"Could not find welcome voice channel with ID {channel_id}")
+                return None
 
-            try:
-                # Connect to welcome channel
-                self.voice_client = await channel.connect(
-                    timeout=Config.VOICE_TIMEOUT,
-                    reconnect=True,
+            # Returns once the voice handshake completes, no settle delay needed
+            voice_client = await self.voice_manager.acquire(channel)
+            
+            # Only undeafen when actually deafened or muted
+            voice_state = channel.guild.me.voice if channel.guild.me else None
+            if voice_state and (voice_state.self_deaf or voice_state.self_mute):
+                await channel.guild.change_voice_state(
+                    channel=channel,
                     self_deaf=False,
                     self_mute=False
                 )
-            except discord.ClientException as e:
-                if "already connected to a voice channel" in str(e):
-                    # Force disconnect all voice clients for this guild
-                    for vc in self.bot.voice_clients:
-                        if vc.guild == channel.guild:
-                            try:
-                                await vc.disconnect(force=True)
-                            except Exception:
-                                pass
-                    # Try connecting again
-                    self.voice_client = await channel.connect(
-                        timeout=Config.VOICE_TIMEOUT,
-                        reconnect=True,
-                        self_deaf=False,
-                        self_mute=False
-                    )
-            
-            # Ensure we're not deafened
-            await asyncio.sleep(1)
-            await channel.guild.change_voice_state(
-                channel=channel,
-                self_deaf=False,
-                self_mute=False
-            )
             
-            self.logger.info(f"Connected to welcome channel: {channel.name}")
-            return True
+            return voice_client
 
         except Exception as e:
             self.logger.error(f"Error ensuring voice connection: {str(e)}")
+            return None
+
+    def is_connected(self, guild_id: int) -> bool:
+        """Check if the welcome connection for a guild is up (or being set up)"""
+        if self.worker:
+            return guild_id in self._worker_connected
+        return self.voice_manager.get(guild_id) is not None or self.voice_manager.is_connecting(guild_id)
+
+    def is_neighbor_channel(self, channel: discord.abc.GuildChannel) -> bool:
+        """Check if a voice channel sits in the same category as a welcome channel"""
+        if not isinstance(channel, discord.VoiceChannel) or self.voice_manager.is_welcome_channel(channel.id):
             return False
+        for channel_id in self.voice_manager.guild_channels(channel.guild.id):
+            welcome_channel = self.bot.get_channel(channel_id)
+            if welcome_channel and welcome_channel.category_id == channel.category_id:
+                return True
+        return False
+
+    async def prewarm(self, guild_id: int, reason: str) -> None:
+        """Connect ahead of a predicted welcome join"""
+        channel_id = self.voice_manager.primary_channel(guild_id)
+        if channel_id is None or not self.presence.enabled:
+            return
+        if not self.presence.prewarm(guild_id, self.is_connected(guild_id)):
+            return
+
+        self.logger.info(f"Pre-warming welcome voice connection in guild {guild_id} ({reason})")
+        if self.worker:
+            self._worker_connected.add(guild_id)
+            self.worker.connect(channel_id)
+        else:
+            await self.ensure_voice_connection(channel_id)
+
+    async def disconnect_idle(self, guild_id: int) -> None:
+        """Leave voice in a guild that has gone idle"""
+        self.logger.info(f"Welcome voice idle for {self.presence.idle_timeout}s in guild {guild_id}, disconnecting")
+        self.presence.disconnected(guild_id)
+        if self.worker:
+            self._worker_connected.discard(guild_id)
+            self.worker.disconnect(guild_id)
+        else:
+            await self.voice_manager.release(guild_id)
+
+    async def maintain_presence(self):
+        """Close expired pre-warm windows and drop idle connections"""
+        interval = min(30.0, max(1.0, min(self.presence.idle_timeout, self.presence.prewarm_window) / 4))
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                for guild_id in self.presence.expire():
+                    self.logger.debug(f"Pre-warm in guild {guild_id} expired without a join")
+
+                if self.worker:
+                    connected = set(self._worker_connected)
+                else:
+                    connected = {
+                        guild_id for guild_id in self.voice_manager.guild_ids
+                        if (voice_client := self.voice_manager.get(guild_id)) and not voice_client.is_playing()
+                    }
+                for guild_id in self.presence.idle_guilds(connected):
+                    await self.disconnect_idle(guild_id)
+            except Exception as e:
+                self.logger.error(f"Error maintaining welcome voice presence: {str(e)}")
+
+    async def play_welcome_sound(self, member: discord.Member, channel_id: int, received_at: Optional[float] = None):
+        """Queue welcome sound for member, merged with other joins in the same burst"""
+        self.logger.debug(f"Queued welcome sound for {member.name}")
+        role_ids = [role.id for role in reversed(getattr(member, 'roles', []))]
+        self.scheduler.request(channel_id, received_at, role_ids)
+
+    def latency_stats(self) -> dict:
+        """Get join-to-first-audio latency metrics"""
+        return {
+            "join_to_first_audio": self.first_audio_latency.snapshot(),
+            "connect": self.connect_latency.snapshot()
+        }
+
+    def _record_first_audio(self, received_at: float) -> None:
+        """Record join-to-first-audio latency (called from the player thread)"""
+        self._observe_first_audio(time.perf_counter() - received_at)
+
+    def _observe_first_audio(self, latency: float) -> None:
+        """Check a join-to-first-audio latency against the budget"""
+        if not self.first_audio_latency.observe(latency):
+            self.logger.warning(f"Welcome audio started {latency * 1000:.0f}ms after join, over the {Config.WELCOME_LATENCY_TARGET_MS}ms target")
+
+    async def start_welcome_sound(self, channel_id: int, received_at: float, role_ids: List[int]) -> Optional[asyncio.Future]:
+        """Start welcome sound playback
+
+        Args:
+            channel_id: Welcome voice channel to play in
+            received_at: ``time.perf_counter()`` when the first join of the burst arrived
+            role_ids: Roles of the first member in the burst, highest first
+
+        Returns:
+            Future completed when the clip finishes, or None if nothing played
+        """
+        guild_id = self.voice_manager.guild_for(channel_id)
+        if self.worker:
+            self._worker_connected.add(guild_id)
+            finished = await self.worker.play(channel_id, role_ids, received_at)
+            if finished:
+                finished.add_done_callback(lambda _: self.presence.touch(guild_id))
+            return finished
 
-    async def play_welcome_sound(self, member_name: str):
-        """Play welcome sound for member"""
         try:
-            if not await self.ensure_voice_connection():
-                return
+            connect_started = time.perf_counter()
+            voice_client = await self.ensure_voice_connection(channel_id)
+            if not voice_client:
+                return None
+            self.connect_latency.observe(time.perf_counter() - connect_started)
 
-            if self.voice_client.is_playing():
-                self.voice_client.stop()
+            # Get the pre-encoded clip for this channel or role, building it on first use
+            try:
+                clip = await self.assets.get_clip(channel_id, role_ids)
+            except AudioCacheError as e:
+                self.logger.error(f"Welcome sound unavailable: {str(e)}")
+                return None
+            if clip is None:
+                self.logger.error("No welcome sound configured")
+                return None
 
-            # Verify welcome sound file exists and is readable
-            welcome_sound_absolute = os.path.abspath(Config.WELCOME_SOUND_PATH)
-            self.logger.info(f"Looking for welcome sound at: {welcome_sound_absolute}")
-            
-            if not os.path.exists(welcome_sound_absolute):
-                self.logger.error(f"Welcome sound file not found: {welcome_sound_absolute}")
-                return
-                
-            if not os.access(welcome_sound_absolute, os.R_OK):
-                self.logger.error(f"Welcome sound file not readable: {welcome_sound_absolute}")
-                return
+            # Replay cached Opus frames, no FFmpeg process or encoding per join
+            audio_source = clip.source(on_first_frame=lambda: self._record_first_audio(received_at))
+            audio_source = self.telemetry.wrap(audio_source)
 
-            self.logger.info(f"Found welcome sound file: {welcome_sound_absolute}")
-            self.logger.info(f"File size: {os.path.getsize(welcome_sound_absolute)} bytes")
-            self.logger.info(f"Creating audio source with FFmpeg at: {Config.FFMPEG_PATH}")
-            
-            # Create FFmpeg audio source with enhanced options for mono->stereo conversion
-            audio_source = discord.FFmpegPCMAudio(
-                welcome_sound_absolute,  # Use absolute path
-                executable=Config.FFMPEG_PATH,
-                options='-loglevel debug -af "aresample=async=1:first_pts=0,pan=stereo|c0=c0|c1=c0"'  # Proper mono to stereo conversion
-            )
-            
-            # Add volume transformation with higher initial volume
-            audio_source = discord.PCMVolumeTransformer(
-                audio_source,
-                volume=Config.WELCOME_SOUND_VOLUME * 2.0  # Double the volume for better audibility
-            )
+            if voice_client.is_playing():
+                voice_client.stop()
+
+            loop = asyncio.get_running_loop()
+            finished = loop.create_future()
 
             def after_play(error):
                 if error:
                     self.logger.error(f"Error playing welcome sound: {str(error)}")
                 else:
                     self.logger.info("Welcome sound finished playing successfully")
+                loop.call_soon_threadsafe(lambda: finished.done() or finished.set_result(None))
 
-            self.logger.info(f"Starting welcome sound playback for {member_name}")
-            self.voice_client.play(audio_source, after=after_play)
-            self.logger.info(f"Welcome sound playback initiated for {member_name}")
+            # The idle clock starts once the clip is done
+            finished.add_done_callback(lambda _: self.presence.touch(guild_id))
+
+            voice_client.play(audio_source, after=after_play)
+            self.logger.info(f"Welcome sound playback started in {channel_id}")
+            return finished
 
         except Exception as e:
             self.logger.error(f"Error playing welcome sound: {str(e)}")
+            return None
 
-    async def maintain_voice_connection(self):
-        """Task to maintain voice connection"""
-        while True:
-            try:
-                # Only try to connect if we're not already connected
-                if not (self.voice_client and self.voice_client.is_connected()):
-                    await self.ensure_voice_connection()
-                await asyncio.sleep(60)  # Check less frequently
-            except Exception as e:
-                self.logger.error(f"Error in maintain_voice_connection task: {str(e)}")
-                await asyncio.sleep(30)  # Longer delay on error
+    def background_path(self, guild_id: int) -> str:
+        """Get where a guild's welcome background is stored"""
+        return os.path.join(Config.WELCOME_BACKGROUND_DIR, f"{guild_id}.png")
+
+    async def get_welcome_text_channel(self, guild_id: int) -> Optional[int]:
+        """Get the configured welcome text channel, cached after the first lookup"""
+        if guild_id not in self._welcome_text_channels:
+            async with self.bot.db.read() as cursor:
+                await cursor.execute(
+                    "SELECT welcome_channel_id FROM bot_settings WHERE guild_id = ?",
+                    (guild_id,)
+                )
+                row = await cursor.fetchone()
+            self._welcome_text_channels[guild_id] = row[0] if row and row[0] else None
+        return self._welcome_text_channels[guild_id]
+
+    async def set_welcome_text_channel(self, guild: discord.Guild, channel_id: int) -> None:
+        """Store the welcome text channel for a guild"""
+        # Both rows ride along in the next group commit
+        await asyncio.gather(
+            self.bot.db.submit("""
+                INSERT INTO guilds (id, name, owner_id, member_count)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(id) DO UPDATE SET
+                    name = excluded.name,
+                    member_count = excluded.member_count,
+                    updated_at = CURRENT_TIMESTAMP
+            """, (guild.id, guild.name, guild.owner_id, guild.member_count or 0)),
+            self.bot.db.submit("""
+                INSERT INTO bot_settings (guild_id, welcome_channel_id)
+                VALUES (?, ?)
+                ON CONFLICT(guild_id) DO UPDATE SET welcome_channel_id = excluded.welcome_channel_id
+            """, (guild.id, channel_id))
+        )
+        self._welcome_text_channels[guild.id] = channel_id
+
+    async def send_welcome_banner(self, member: discord.Member) -> None:
+        """Queue a welcome banner for the guild's welcome text channel"""
+        channel_id = await self.get_welcome_text_channel(member.guild.id)
+        channel = self.bot.get_channel(channel_id) if channel_id else None
+        if not isinstance(channel, discord.TextChannel):
+            return
+
+        async def deliver(png: bytes) -> None:
+            embed = discord.Embed(description=f"Welcome {member.mention}!", color=discord.Color.green())
+            embed.set_image(url="attachment://welcome.png")
+            await channel.send(embed=embed, file=discord.File(io.BytesIO(png), filename="welcome.png"))
+
+        background = self.background_path(member.guild.id)
+        job = BannerJob(
+            background=background if os.path.exists(background) else None,
+            title=f"Welcome to {member.guild.name}",
+            name=member.display_name,
+            subtitle=f"Member #{member.guild.member_count:,}" if member.guild.member_count else "",
+            avatar=member.display_avatar.replace(size=256, format='png'),
+            deliver=deliver
+        )
+        if self.banners.submit(job):
+            return
+
+        if self.banners.available:
+            self.logger.warning(f"Welcome banner queue full, skipping banner for {member.name}")
+            return
+        # Without Pillow, fall back to a plain text welcome
+        await channel.send(embed=discord.Embed(description=f"Welcome {member.mention}!", color=discord.Color.green()))
+
+    @app_commands.command(name="setwelcomechannel", description="Set the channel welcome banners are posted in")
+    @app_commands.describe(channel="Text channel for welcome banners")
+    @app_commands.checks.has_permissions(administrator=True)
+    async def set_welcome_channel(self, interaction: discord.Interaction, channel: discord.TextChannel):
+        """Set the welcome text channel"""
+        if not permissions.channel_permissions(channel, interaction.guild.me).attach_files:
+            await interaction.response.send_message(
+                f"Error: I can't send images in {channel.mention}",
+                ephemeral=True
+            )
+            return
+
+        await self.set_welcome_text_channel(interaction.guild, channel.id)
+        await interaction.response.send_message(f"✅ Welcome banners will be posted in {channel.mention}", ephemeral=True)
+
+    @app_commands.command(name="setwelcomebackground", description="Set the welcome banner background image")
+    @app_commands.describe(url="Direct link to a PNG or JPEG image")
+    @app_commands.checks.has_permissions(administrator=True)
+    async def set_welcome_background(self, interaction: discord.Interaction, url: str):
+        """Download, crop and store the guild's welcome background"""
+        if not self.banners.available:
+            await interaction.response.send_message("Error: Image rendering is not available on this bot", ephemeral=True)
+            return
+        await interaction.response.defer(ephemeral=True)
+
+        try:
+            async with aiohttp.ClientSession() as session:
+                async with session.get(url, timeout=aiohttp.ClientTimeout(total=15)) as response:
+                    response.raise_for_status()
+                    data = await response.content.read(Config.WELCOME_BACKGROUND_MAX_BYTES + 1)
+            if len(data) > Config.WELCOME_BACKGROUND_MAX_BYTES:
+                await interaction.followup.send("Error: That image is too large", ephemeral=True)
+                return
+
+            # Crop once here, so joins only ever load a banner-sized PNG
+            loop = asyncio.get_running_loop()
+            png = await loop.run_in_executor(None, normalize_background, data)
+            path = self.background_path(interaction.guild_id)
+            await loop.run_in_executor(None, self._write_background, path, png)
+            self.banners.background_changed(path)
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+            await interaction.followup.send(f"Error: Could not download that image ({e})", ephemeral=True)
+            return
+        except OSError:
+            await interaction.followup.send("Error: That link is not an image I can read", ephemeral=True)
+            return
+
+        await interaction.followup.send("✅ Welcome background updated", ephemeral=True)
+
+    @staticmethod
+    def _write_background(path: str, png: bytes) -> None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write then rename, a render never sees a half-written file
+        temp_path = f"{path}.tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(png)
+        os.replace(temp_path, path)
 
     @commands.Cog.listener()
     async def on_ready(self):
         """Initialize welcome channel connection when bot starts"""
         try:
-            # Start connection maintenance task
-            if self.reconnect_task is None or self.reconnect_task.done():
-                self.reconnect_task = asyncio.create_task(self.maintain_voice_connection())
-                
-            await self.ensure_voice_connection()
+            self.register_welcome_channels()
+            if self.worker:
+                # The worker connects from its own gateway session
+                self.logger.info("Welcome system initialized (voice worker mode)")
+                return
+
+            if self.presence.enabled:
+                # Connections are made on demand and pre-warmed from join signals
+                self.logger.info("Welcome system initialized (idle disconnect enabled)")
+                return
+
+            for guild_id in self.voice_manager.guild_ids:
+                await self.ensure_voice_connection(self.voice_manager.primary_channel(guild_id))
             self.logger.info("Welcome system initialized")
                 
         except Exception as e:
@@ -156,40 +434,76 @@ class WelcomeCommands(commands.Cog):
     @commands.Cog.listener()
     async def on_voice_state_update(self, member, before, after):
         """Handle member joining voice channel"""
+        received_at = time.perf_counter()
+        if member.id == self.bot.user.id:
+            # Reconnect when our own connection is dropped
+            if not self.worker and before.channel and after.channel is None:
+                self.logger.warning(f"Disconnected from voice in {member.guild.name}")
+                self.voice_manager.handle_disconnect(member.guild.id)
+            return
+
         if member.bot:
             return
 
         try:
-            # Check if member joined the welcome channel
+            # Check if member joined a welcome channel
             if (before.channel != after.channel and 
                 after.channel and 
-                after.channel.id == Config.WELCOME_VOICE_CHANNEL_ID):
+                self.voice_manager.is_welcome_channel(after.channel.id)):
                 self.logger.info(f"Member {member.name} joined welcome channel")
-                await self.play_welcome_sound(member.name)
+                self.presence.join(member.guild.id, self.is_connected(member.guild.id))
+                await self.play_welcome_sound(member, after.channel.id, received_at)
+            elif (before.channel != after.channel and
+                  after.channel and
+                  self.presence.enabled and
+                  self.is_neighbor_channel(after.channel)):
+                # Activity next door tends to spill into the welcome channel
+                await self.prewarm(member.guild.id, f"{member.name} joined {after.channel.name}")
         except Exception as e:
             self.logger.error(f"Error handling voice state update: {str(e)}")
 
     @commands.Cog.listener()
     async def on_member_join(self, member):
         """Play welcome sound when a member joins the server"""
+        received_at = time.perf_counter()
         if member.bot:
             return
 
         try:
-            # Wait a moment for voice connection to stabilize
-            await asyncio.sleep(1)
-            
+            await self.send_welcome_banner(member)
+        except Exception as e:
+            self.logger.error(f"Error sending welcome banner: {str(e)}")
+
+        channel_id = self.voice_manager.primary_channel(member.guild.id)
+        if channel_id is None:
+            return
+
+        try:
             self.logger.info(f"Member {member.name} joined server, playing welcome sound")
-            await self.play_welcome_sound(member.name)
+            # Playback connects and keeps the guild active, no separate pre-warm needed
+            await self.play_welcome_sound(member, channel_id, received_at)
         except Exception as e:
             self.logger.error(f"Error handling member join: {str(e)}")
 
     def cog_unload(self):
         """Cleanup when cog is unloaded"""
-        if self.reconnect_task:
-            self.reconnect_task.cancel()
-        if self.voice_client:
-            asyncio.create_task(self.voice_client.disconnect(force=True))
+        self.scheduler.cancel()
+        self.assets.stop()
+        self.telemetry.stop()
+        self.banners.stop()
+        if self._presence_task:
+            self._presence_task.cancel()
+        registry.unregister('welcome_scheduler')
+        registry.unregister('voice_connections')
+        registry.unregister('welcome_latency')
+        registry.unregister('welcome_assets')
+        registry.unregister('voice_playback')
+        registry.unregister('voice_presence')
+        registry.unregister('welcome_banners')
+        if self.worker:
+            registry.unregister('voice_worker')
+            asyncio.get_running_loop().run_in_executor(None, self.worker.stop)
+        asyncio.create_task(self.voice_manager.close())
         
 async def setup(bot):
     """Setup function for loading the cog"""
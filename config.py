@@ -5,6 +5,19 @@ from dotenv import load_dotenv
 # Load environment variables
 load_dotenv()
 
+def parse_channel_ids(primary: int, extra: str) -> list:
+    """Combine the primary channel with a comma-separated list of more
+
+    Keeps the first occurrence of each ID in order and drops unset (0) ones.
+    """
+    channel_ids = [primary]
+    for part in extra.split(','):
+        part = part.strip()
+        if part:
+            channel_ids.append(int(part))
+    unique_ids = dict.fromkeys(channel_ids)
+    return [channel_id for channel_id in unique_ids if channel_id]
+
 class Config:
     """Configuration settings for the bot"""
     
@@ -15,8 +28,23 @@ class Config:
     
     # Welcome settings
     WELCOME_VOICE_CHANNEL_ID = int(os.getenv('WELCOME_VOICE_CHANNEL_ID', '0'))
+    # Extra welcome channels, possibly in other guilds (comma-separated)
+    WELCOME_VOICE_CHANNEL_IDS = parse_channel_ids(WELCOME_VOICE_CHANNEL_ID, os.getenv('WELCOME_VOICE_CHANNEL_IDS', ''))
     WELCOME_SOUND_PATH = os.getenv('WELCOME_SOUND_PATH', 'welcome.mp3')
     WELCOME_SOUND_VOLUME = float(os.getenv('WELCOME_SOUND_VOLUME', '0.5'))
+    WELCOME_SOUND_NORMALIZE = os.getenv('WELCOME_SOUND_NORMALIZE', 'volume')  # volume, peak or lufs
+    WELCOME_SOUND_TARGET_LUFS = float(os.getenv('WELCOME_SOUND_TARGET_LUFS', '-16'))
+    WELCOME_SOUND_PEAK_DB = float(os.getenv('WELCOME_SOUND_PEAK_DB', '-1'))  # Peak target / ceiling in dBFS
+    WELCOME_SOUND_DIR = os.getenv('WELCOME_SOUND_DIR', '')  # Optional default/channel_<id>/role_<id> clips
+    WELCOME_SOUND_WATCH_INTERVAL = float(os.getenv('WELCOME_SOUND_WATCH_INTERVAL', '5'))  # Seconds, 0 disables hot reload
+    WELCOME_SOUND_CACHE_BYTES = int(os.getenv('WELCOME_SOUND_CACHE_BYTES', str(8 * 1024 * 1024)))  # Decoded clip memory bound
+    WELCOME_BURST_POLICY = os.getenv('WELCOME_BURST_POLICY', 'finish')  # once, finish or restart
+    WELCOME_DEBOUNCE_MS = int(os.getenv('WELCOME_DEBOUNCE_MS', '750'))  # Quiet period that closes a join burst
+    WELCOME_DEBOUNCE_MAX_MS = int(os.getenv('WELCOME_DEBOUNCE_MAX_MS', '2000'))  # Longest a burst is held open
+    WELCOME_MAX_QUEUE = int(os.getenv('WELCOME_MAX_QUEUE', '2'))  # Pending bursts per channel
+    WELCOME_IDLE_DISCONNECT = int(os.getenv('WELCOME_IDLE_DISCONNECT', '0'))  # Seconds without joins before leaving voice, 0 stays 24/7
+    WELCOME_PREWARM_WINDOW = int(os.getenv('WELCOME_PREWARM_WINDOW', '120'))  # Seconds a pre-warmed connection waits for a join
+    WELCOME_LATENCY_TARGET_MS = int(os.getenv('WELCOME_LATENCY_TARGET_MS', '300'))  # Join-to-first-audio budget
     
     # Voice System Settings
     FFMPEG_PATH = os.getenv('FFMPEG_PATH', shutil.which('ffmpeg') or '/usr/bin/ffmpeg')
@@ -26,16 +54,59 @@ class Config:
     RECONNECT_DELAY = int(os.getenv('RECONNECT_DELAY', '5'))  # Initial delay
     MAX_RECONNECT_DELAY = int(os.getenv('MAX_RECONNECT_DELAY', '60'))  # Increased max delay
     
+    # Run welcome playback in a separate worker process with its own gateway session
+    VOICE_WORKER_ENABLED = os.getenv('VOICE_WORKER_ENABLED', 'false').lower() == 'true'
+    VOICE_WORKER_TOKEN = os.getenv('VOICE_WORKER_TOKEN') or TOKEN
+    
     # Voice State Settings
     VOICE_DEAF_CHECK_INTERVAL = 2  # More frequent deafen checks
-    VOICE_HEALTH_CHECK_INTERVAL = 5  # More frequent health checks
+    VOICE_HEALTH_CHECK_INTERVAL = float(os.getenv('VOICE_HEALTH_CHECK_INTERVAL', '5'))  # Playback telemetry sample interval
+    VOICE_JITTER_WARN_MS = float(os.getenv('VOICE_JITTER_WARN_MS', '10'))  # Mean frame jitter that logs a warning
+    VOICE_LATE_FRAME_MS = float(os.getenv('VOICE_LATE_FRAME_MS', '10'))  # Delay past 20ms before a frame counts as late
     VOICE_CLEANUP_DELAY = 2  # Delay before cleaning up old connections
     VOICE_STABILIZATION_DELAY = 2  # Delay to let connection stabilize
     
+    # Database settings
+    DB_READERS = int(os.getenv('DB_READERS', '4'))  # Read-only connections next to the single writer
+    DB_PROFILE = os.getenv('DB_PROFILE', 'balanced')  # durable, balanced or throughput
+    DB_GROUP_COMMIT_MS = float(os.getenv('DB_GROUP_COMMIT_MS', '5'))  # Longest a submitted write waits to share a commit
+    DB_GROUP_COMMIT_MAX = int(os.getenv('DB_GROUP_COMMIT_MAX', '200'))  # Submitted writes that trigger an immediate commit
+    DB_MIGRATION_BATCH = int(os.getenv('DB_MIGRATION_BATCH', '5000'))  # Rows copied per commit when upgrading the schema
+    DB_SLOW_QUERY_MS = float(os.getenv('DB_SLOW_QUERY_MS', '100'))  # Statements slower than this are logged with their plan
+    DB_QUERY_STATS_MAX = int(os.getenv('DB_QUERY_STATS_MAX', '500'))  # Distinct statements with their own metrics
+    
     # Role management settings
     ROLE_COMMAND_COOLDOWN = int(os.getenv('ROLE_COMMAND_COOLDOWN', '60'))
     ROLE_ID_TO_GIVE = int(os.getenv('ROLE_ID_TO_GIVE', '0'))
     ROLE_IDS_ALLOWED = [int(id) for id in os.getenv('ROLE_IDS_ALLOWED', '').split(',') if id]
+    ROLE_RATE_LIMIT_KEYS = int(os.getenv('ROLE_RATE_LIMIT_KEYS', '10000'))  # (guild, user, command) keys tracked by the rate limiter
+    ROLE_TRACK_FLUSH_MS = int(os.getenv('ROLE_TRACK_FLUSH_MS', '250'))  # Longest a role change waits before it is written
+    ROLE_TRACK_BATCH = int(os.getenv('ROLE_TRACK_BATCH', '500'))  # Buffered role changes that trigger an early write
+    ROLE_JOB_CONCURRENCY = int(os.getenv('ROLE_JOB_CONCURRENCY', '5'))  # Role changes in flight per bulk role job
+    ROLE_JOB_CHECKPOINT = int(os.getenv('ROLE_JOB_CHECKPOINT', '100'))  # Members per bulk role job checkpoint
+    ROLE_RECONCILE_CHUNK = int(os.getenv('ROLE_RECONCILE_CHUNK', '5000'))  # Members diffed against user_roles at a time
+    USAGE_FLUSH_INTERVAL = float(os.getenv('USAGE_FLUSH_INTERVAL', '2.0'))  # Seconds between command usage batch writes
+    USAGE_BATCH_SIZE = int(os.getenv('USAGE_BATCH_SIZE', '100'))  # Usage rows that trigger an early write
+    USAGE_COMPACTION_INTERVAL = int(os.getenv('USAGE_COMPACTION_INTERVAL', '3600'))  # Seconds between rollup/retention passes
+    USAGE_ROLLUP_AFTER_HOURS = int(os.getenv('USAGE_ROLLUP_AFTER_HOURS', '1'))  # Age before raw usage rows are rolled up
+    USAGE_RAW_RETENTION_DAYS = int(os.getenv('USAGE_RAW_RETENTION_DAYS', '30'))  # Raw usage rows kept this long
+    USAGE_MINUTE_RETENTION_DAYS = int(os.getenv('USAGE_MINUTE_RETENTION_DAYS', '14'))  # Per-minute rollups kept this long
+    USAGE_COMPACTION_BATCH = int(os.getenv('USAGE_COMPACTION_BATCH', '5000'))  # Rows per rollup/delete transaction
+    
+    # Bulk application review settings
+    BULK_CONCURRENCY = int(os.getenv('BULK_CONCURRENCY', '5'))  # Members processed at once
+    BULK_PROGRESS_INTERVAL = float(os.getenv('BULK_PROGRESS_INTERVAL', '2.0'))  # Seconds between progress edits
+    
+    # Welcome banner settings
+    WELCOME_BANNER_WORKERS = int(os.getenv('WELCOME_BANNER_WORKERS', '2'))  # Render workers and processes
+    WELCOME_BANNER_QUEUE = int(os.getenv('WELCOME_BANNER_QUEUE', '20'))  # Banners waiting before new ones are dropped
+    WELCOME_BACKGROUND_DIR = os.getenv('WELCOME_BACKGROUND_DIR', os.path.join('data', 'welcome_backgrounds'))
+    WELCOME_BACKGROUND_MAX_BYTES = int(os.getenv('WELCOME_BACKGROUND_MAX_BYTES', str(8 * 1024 * 1024)))
+    
+    # Visa card settings
+    VISA_CARD_RENDER = os.getenv('VISA_CARD_RENDER', 'true').lower() == 'true'  # Personalized cards instead of the static images
+    VISA_RENDER_WORKERS = int(os.getenv('VISA_RENDER_WORKERS', '2'))  # Render processes
+    ATTACHMENT_STORAGE_CHANNEL_ID = int(os.getenv('ATTACHMENT_STORAGE_CHANNEL_ID', '0'))  # Where static decision images are uploaded, 0 uploads with the first decision
     
     # Status command settings
     STATUS_COMMAND_COOLDOWN = 60
@@ -82,6 +153,60 @@ class Config:
         if not 0.0 <= cls.DEFAULT_VOLUME <= 2.0:
             raise ValueError("Default volume must be between 0.0 and 2.0")
             
+        # Validate loudness settings
+        if cls.WELCOME_SOUND_NORMALIZE not in ('volume', 'peak', 'lufs'):
+            raise ValueError("Welcome sound normalization must be one of: volume, peak, lufs")
+        if cls.WELCOME_SOUND_PEAK_DB > 0:
+            raise ValueError("Welcome sound peak target must be at or below 0 dBFS")
+            
+        # Validate welcome burst settings
+        if cls.WELCOME_BURST_POLICY not in ('once', 'finish', 'restart'):
+            raise ValueError("Welcome burst policy must be one of: once, finish, restart")
+        if cls.WELCOME_DEBOUNCE_MS < 0:
+            raise ValueError("Welcome debounce must not be negative")
+        if cls.WELCOME_MAX_QUEUE < 1:
+            raise ValueError("Welcome max queue must be at least 1")
+        if cls.WELCOME_IDLE_DISCONNECT < 0:
+            raise ValueError("Welcome idle disconnect must not be negative")
+        if cls.WELCOME_PREWARM_WINDOW < 1:
+            raise ValueError("Welcome pre-warm window must be at least 1 second")
+            
+        # Validate database settings
+        if cls.DB_PROFILE not in ('durable', 'balanced', 'throughput'):
+            raise ValueError("Database profile must be one of: durable, balanced, throughput")
+        if cls.DB_READERS < 1:
+            raise ValueError("Database readers must be at least 1")
+        if cls.DB_GROUP_COMMIT_MS < 0:
+            raise ValueError("Database group commit interval must not be negative")
+        if cls.DB_MIGRATION_BATCH < 1:
+            raise ValueError("Database migration batch must be at least 1")
+        if cls.DB_SLOW_QUERY_MS < 0:
+            raise ValueError("Slow query threshold must not be negative")
+            
+        # Validate role change buffering
+        if cls.ROLE_TRACK_FLUSH_MS < 1:
+            raise ValueError("Role change flush interval must be at least 1ms")
+        if cls.ROLE_TRACK_BATCH < 1:
+            raise ValueError("Role change batch must be at least 1")
+        if cls.ROLE_RECONCILE_CHUNK < 1:
+            raise ValueError("Role reconcile chunk must be at least 1")
+            
+        # Validate bulk role jobs
+        if cls.ROLE_JOB_CONCURRENCY < 1:
+            raise ValueError("Role job concurrency must be at least 1")
+        if cls.ROLE_JOB_CHECKPOINT < 1:
+            raise ValueError("Role job checkpoint must be at least 1")
+            
+        # Validate command usage retention
+        if cls.USAGE_RAW_RETENTION_DAYS * 24 < cls.USAGE_ROLLUP_AFTER_HOURS:
+            raise ValueError("Raw usage retention must be longer than the rollup delay")
+        if cls.USAGE_COMPACTION_BATCH < 1:
+            raise ValueError("Usage compaction batch must be at least 1")
+            
+        # Validate bulk settings
+        if cls.BULK_CONCURRENCY < 1:
+            raise ValueError("Bulk concurrency must be at least 1")
+            
         # Validate timing settings
         if cls.VOICE_TIMEOUT < 5:
             raise ValueError("Voice timeout must be at least 5 seconds")
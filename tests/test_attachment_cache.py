@@ -0,0 +1,164 @@
+import asyncio
+import time
+import discord
+import pytest
+from utils.attachment_cache import AttachmentCache, url_expiry
+
+class MockResponse:
+    def __init__(self, status):
+        self.status = status
+        self.reason = "Bad Request"
+
+class MockAttachment:
+    def __init__(self, url):
+        self.url = url
+
+class MockMessage:
+    def __init__(self, channel, message_id, attachments):
+        self.channel = channel
+        self.id = message_id
+        self.attachments = attachments
+        self.embeds = []
+
+class MockChannel:
+    """Records sends and hands back CDN URLs for uploads"""
+
+    def __init__(self, expires_in=86400):
+        self.sends = []
+        self.messages = {}
+        self.fetches = 0
+        self.expires_in = expires_in
+        self.reject_urls = False
+
+    def sign(self, message_id, filename):
+        ex = format(int(time.time() + self.expires_in), 'x')
+        return f"https://cdn.discordapp.com/attachments/1/{message_id}/{filename}?ex={ex}&is=0&hm=0"
+
+    async def send(self, embed=None, file=None, **kwargs):
+        await asyncio.sleep(0)
+        self.sends.append((embed.image.url if embed else None, file))
+        message_id = len(self.sends)
+        if file is None:
+            if self.reject_urls:
+                raise discord.HTTPException(MockResponse(400), "Invalid Form Body")
+            return MockMessage(self, message_id, [])
+        self.messages[message_id] = file.filename
+        return MockMessage(self, message_id, [MockAttachment(self.sign(message_id, file.filename))])
+
+    async def fetch_message(self, message_id):
+        """Fetching hands back a newly signed URL, like the API"""
+        self.fetches += 1
+        if message_id not in self.messages:
+            raise discord.NotFound(MockResponse(404), "Unknown Message")
+        return MockMessage(self, message_id, [MockAttachment(self.sign(message_id, self.messages[message_id]))])
+
+    def delete(self, message_id):
+        del self.messages[message_id]
+
+@pytest.fixture
+def asset(tmp_path):
+    path = tmp_path / "accept.png"
+    path.write_bytes(b"\x89PNG fake")
+    return str(path)
+
+def test_url_expiry():
+    """Test the expiry is read from the hex ex parameter"""
+    assert url_expiry("https://cdn.discordapp.com/a.png?ex=65f1a2b3&is=1&hm=2") == float(0x65f1a2b3)
+    assert url_expiry("https://cdn.discordapp.com/a.png") is None
+
+@pytest.mark.asyncio
+async def test_uploads_once_then_reuses_url(asset):
+    """Test the first send uploads and later sends reuse the CDN URL"""
+    cache = AttachmentCache()
+    cache.register("accept.png", asset)
+    channel = MockChannel()
+
+    await cache.send(channel, "accept.png", discord.Embed())
+    await cache.send(channel, "accept.png", discord.Embed())
+
+    assert channel.sends[0][0] == "attachment://accept.png"
+    assert channel.sends[0][1] is not None
+    assert channel.sends[1][0].startswith("https://cdn.discordapp.com/")
+    assert channel.sends[1][1] is None
+    assert cache.uploads == 1
+    assert cache.reuses == 1
+
+@pytest.mark.asyncio
+async def test_concurrent_sends_share_one_upload(asset):
+    """Test a burst of decisions uploads the image only once"""
+    cache = AttachmentCache()
+    cache.register("accept.png", asset)
+    channel = MockChannel()
+
+    await asyncio.gather(*(cache.send(channel, "accept.png", discord.Embed()) for _ in range(10)))
+
+    assert cache.uploads == 1
+    assert cache.reuses == 9
+
+@pytest.mark.asyncio
+async def test_refreshes_near_expiry_from_source_message(asset):
+    """Test a URL close to expiry is re-fetched from its message, not uploaded again"""
+    cache = AttachmentCache(refresh_margin=3600)
+    cache.register("accept.png", asset)
+    channel = MockChannel(expires_in=7200)
+
+    await cache.send(channel, "accept.png", discord.Embed())
+    cache._assets["accept.png"].expires = time.time() + 60
+    await cache.send(channel, "accept.png", discord.Embed())
+
+    assert cache.uploads == 1
+    assert cache.refreshes == 1
+    assert channel.fetches == 1
+    assert channel.sends[-1][1] is None
+
+@pytest.mark.asyncio
+async def test_deleted_source_message_uploads_again(asset):
+    """Test deleting the message holding the upload makes the next send upload"""
+    cache = AttachmentCache()
+    cache.register("accept.png", asset)
+    channel = MockChannel()
+
+    first = await cache.send(channel, "accept.png", discord.Embed())
+    channel.delete(first.id)
+    cache.message_deleted(first.id)
+    await cache.send(channel, "accept.png", discord.Embed())
+
+    assert cache.uploads == 2
+    assert cache.reuses == 0
+    assert cache.source_deletes == 1
+    assert channel.sends[-1][1] is not None
+
+@pytest.mark.asyncio
+async def test_uploads_to_storage_channel(asset):
+    """Test uploads go to the storage channel and decisions only link them"""
+    storage = MockChannel()
+    cache = AttachmentCache(storage=lambda: storage)
+    cache.register("accept.png", asset)
+    channel = MockChannel()
+
+    await cache.send(channel, "accept.png", discord.Embed())
+    await cache.send(channel, "accept.png", discord.Embed())
+    storage.delete(1)
+    cache.message_deleted(1)
+    await cache.send(channel, "accept.png", discord.Embed())
+
+    assert cache.uploads == 2
+    assert len(storage.sends) == 2
+    assert all(file is None for _, file in channel.sends)
+    assert all(url.startswith("https://cdn.discordapp.com/attachments/1/") for url, _ in channel.sends)
+    assert channel.sends[-1][0] != channel.sends[0][0]
+
+@pytest.mark.asyncio
+async def test_reuploads_when_url_rejected(asset):
+    """Test a rejected cached URL falls back to uploading from memory"""
+    cache = AttachmentCache()
+    cache.register("accept.png", asset)
+    channel = MockChannel()
+
+    await cache.send(channel, "accept.png", discord.Embed())
+    channel.reject_urls = True
+    await cache.send(channel, "accept.png", discord.Embed())
+
+    assert cache.uploads == 2
+    assert cache.reupload_failures == 1
+    assert channel.sends[-1][1] is not None
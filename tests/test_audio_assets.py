@@ -0,0 +1,69 @@
+import asyncio
+import os
+import pytest
+import utils.audio_cache as audio_cache
+from utils.audio_cache import OpusClip, OpusClipCache
+from utils.audio_assets import AudioAssetCatalog
+
+@pytest.fixture
+def fake_build(monkeypatch):
+    """Build clips from the raw file bytes instead of FFmpeg"""
+    def build(path, executable, loudness):
+        with open(path, 'rb') as f:
+            return OpusClip(path, [f.read()])
+    monkeypatch.setattr(audio_cache, 'build_clip', build)
+
+@pytest.mark.asyncio
+async def test_resolve_prefers_role_then_channel(tmp_path, fake_build):
+    """Test clip lookup order"""
+    default = tmp_path / "welcome.mp3"
+    default.write_bytes(b"default")
+    sounds = tmp_path / "sounds"
+    sounds.mkdir()
+    (sounds / "channel_10.mp3").write_bytes(b"channel")
+    (sounds / "role_5.ogg").write_bytes(b"role")
+    (sounds / "notes.txt").write_bytes(b"ignored")
+
+    catalog = AudioAssetCatalog(OpusClipCache(), default_path=str(default), directory=str(sounds))
+    await catalog.load(preload=False)
+
+    assert (await catalog.get_clip(10, [5])).frames == [b"role"]
+    assert (await catalog.get_clip(10, [6])).frames == [b"channel"]
+    assert (await catalog.get_clip(11)).frames == [b"default"]
+    assert set(catalog.stats()["assets"]) == {"default", "channel_10", "role_5"}
+
+@pytest.mark.asyncio
+async def test_changed_file_is_hot_swapped(tmp_path, fake_build):
+    """Test a modified clip replaces the cached one"""
+    default = tmp_path / "welcome.mp3"
+    default.write_bytes(b"old")
+    catalog = AudioAssetCatalog(OpusClipCache(), default_path=str(default))
+    await catalog.load()
+
+    default.write_bytes(b"newer")
+    os.utime(default, (1, 1))
+    await catalog._rescan()
+    await asyncio.sleep(0.05)
+
+    assert (await catalog.get_clip()).frames == [b"newer"]
+    assert catalog.reloads == 1
+
+@pytest.mark.asyncio
+async def test_cache_evicts_least_recently_used(fake_build, tmp_path):
+    """Test decoded clips stay under the byte bound"""
+    paths = []
+    for name in ("a", "b", "c"):
+        path = tmp_path / f"{name}.mp3"
+        path.write_bytes(b"x" * 10)
+        paths.append(str(path))
+
+    cache = OpusClipCache(max_bytes=25)
+    await cache.get(paths[0])
+    await cache.get(paths[1])
+    await cache.get(paths[0])
+    await cache.get(paths[2])
+
+    assert paths[0] in cache
+    assert paths[1] not in cache
+    assert cache.stats()["bytes"] == 20
+    assert cache.stats()["evictions"] == 1
@@ -0,0 +1,44 @@
+import asyncio
+import pytest
+import utils.audio_cache as audio_cache
+from utils.audio_cache import OpusClip, OpusClipCache, CachedOpusAudio, AudioCacheError
+
+def test_cached_source_replays_frames():
+    """Test cached source returns frames in order then ends"""
+    source = CachedOpusAudio([b'a', b'b'])
+    assert source.is_opus()
+    assert source.read() == b'a'
+    assert source.read() == b'b'
+    assert source.read() == b''
+
+@pytest.mark.asyncio
+async def test_clip_cache_builds_once(monkeypatch):
+    """Test concurrent requests share a single build"""
+    calls = []
+
+    def fake_build(path, executable, loudness):
+        calls.append(path)
+        return OpusClip(path, [b'frame'])
+
+    monkeypatch.setattr(audio_cache, 'build_clip', fake_build)
+    cache = OpusClipCache()
+    clips = await asyncio.gather(*(cache.get('welcome.mp3') for _ in range(5)))
+
+    assert len(calls) == 1
+    assert all(clip is clips[0] for clip in clips)
+    assert await cache.get('welcome.mp3') is clips[0]
+
+@pytest.mark.asyncio
+async def test_clip_cache_retries_after_failure(monkeypatch):
+    """Test a failed build is not cached"""
+    def failing_build(path, executable, loudness):
+        raise AudioCacheError("boom")
+
+    monkeypatch.setattr(audio_cache, 'build_clip', failing_build)
+    cache = OpusClipCache()
+    with pytest.raises(AudioCacheError):
+        await cache.get('welcome.mp3')
+
+    monkeypatch.setattr(audio_cache, 'build_clip', lambda path, executable, loudness: OpusClip(path, [b'x']))
+    clip = await cache.get('welcome.mp3')
+    assert clip.frames == [b'x']
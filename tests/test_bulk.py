@@ -0,0 +1,61 @@
+import asyncio
+import pytest
+from utils.bulk import chunked, parse_ids, run_bulk
+
+def test_parse_ids():
+    """Test mentions and raw IDs are parsed in order without duplicates"""
+    text = "<@123456789012345678> <@!223456789012345678>, 123456789012345678 323456789012345678 nope 42"
+    assert parse_ids(text) == [123456789012345678, 223456789012345678, 323456789012345678]
+    assert parse_ids(None) == []
+
+def test_chunked():
+    """Test chunks keep order and the last chunk holds the rest"""
+    assert chunked(list(range(5)), 2) == [[0, 1], [2, 3], [4]]
+
+@pytest.mark.asyncio
+async def test_concurrency_is_bounded():
+    """Test no more than the configured number of actions run at once"""
+    running = 0
+    peak = 0
+
+    async def action(item):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.001)
+        running -= 1
+        return True
+
+    result = await run_bulk(range(50), action, concurrency=4)
+    assert peak == 4
+    assert len(result.succeeded) == 50
+
+@pytest.mark.asyncio
+async def test_failures_and_skips_are_recorded():
+    """Test per-item errors are collected instead of aborting the run"""
+    async def action(item):
+        if item % 3 == 0:
+            raise RuntimeError(f"boom {item}")
+        return item % 3 == 1
+
+    result = await run_bulk(range(9), action)
+    assert sorted(result.succeeded) == [1, 4, 7]
+    assert sorted(result.skipped) == [2, 5, 8]
+    assert sorted(result.failed) == [(0, "boom 0"), (3, "boom 3"), (6, "boom 6")]
+    assert result.done == result.total == 9
+
+@pytest.mark.asyncio
+async def test_progress_is_throttled():
+    """Test progress is reported periodically plus once at the end"""
+    reports = []
+
+    async def action(item):
+        await asyncio.sleep(0.01)
+        return True
+
+    async def on_progress(result):
+        reports.append(result.done)
+
+    await run_bulk(range(10), action, concurrency=1, on_progress=on_progress, progress_interval=0.03)
+    assert 2 <= len(reports) <= 5
+    assert reports[-1] == 10
@@ -0,0 +1,10 @@
+from config import parse_channel_ids
+
+def test_parse_channel_ids_keeps_order_and_drops_duplicates():
+    """Test the primary channel comes first and repeated IDs are kept once"""
+    assert parse_channel_ids(10, "20, 10,30,20") == [10, 20, 30]
+
+def test_parse_channel_ids_skips_unset_values():
+    """Test an unset primary channel and empty entries are ignored"""
+    assert parse_channel_ids(0, "") == []
+    assert parse_channel_ids(0, "5,,0, ") == [5]
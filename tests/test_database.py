@@ -0,0 +1,121 @@
+import asyncio
+import pytest
+import pytest_asyncio
+from utils.database import Database
+
+@pytest_asyncio.fixture
+async def db(tmp_path):
+    database = Database(str(tmp_path / "bot.db"), readers=2)
+    await database.init()
+    yield database
+    await database.close()
+
+@pytest.mark.asyncio
+async def test_reads_do_not_wait_for_open_write(db):
+    """Test a read runs during a write and sees only committed rows"""
+    in_write = asyncio.Event()
+    release = asyncio.Event()
+
+    async def slow_write():
+        async with db.transaction() as cursor:
+            await cursor.execute("INSERT INTO guilds (id, name, owner_id, member_count) VALUES (1, 'a', 2, 3)")
+            in_write.set()
+            await release.wait()
+
+    writer = asyncio.create_task(slow_write())
+    await in_write.wait()
+    async with db.read() as cursor:
+        await cursor.execute("SELECT COUNT(*) FROM guilds")
+        assert (await cursor.fetchone())[0] == 0
+    release.set()
+    await writer
+
+    async with db.read() as cursor:
+        await cursor.execute("SELECT COUNT(*) FROM guilds")
+        assert (await cursor.fetchone())[0] == 1
+
+@pytest.mark.asyncio
+async def test_writes_are_serialized(db):
+    """Test concurrent transactions don't commit each other's work"""
+    async def write(guild_id, fail):
+        async with db.transaction() as cursor:
+            await cursor.execute("INSERT INTO guilds (id, name, owner_id, member_count) VALUES (?, 'a', 2, 3)", (guild_id,))
+            await asyncio.sleep(0.01)
+            if fail:
+                raise RuntimeError("rolled back")
+
+    results = await asyncio.gather(write(1, True), write(2, False), return_exceptions=True)
+
+    assert isinstance(results[0], RuntimeError)
+    async with db.read() as cursor:
+        await cursor.execute("SELECT id FROM guilds")
+        assert [row[0] for row in await cursor.fetchall()] == [2]
+    assert db.stats()["readers"] == 2
+
+@pytest.mark.asyncio
+async def test_readers_are_read_only(db):
+    """Test the pool can't be used to write"""
+    async with db.read() as cursor:
+        with pytest.raises(Exception):
+            await cursor.execute("INSERT INTO guilds (id, name, owner_id, member_count) VALUES (1, 'a', 2, 3)")
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("profile,journal_mode,synchronous", [("durable", "delete", 2), ("balanced", "wal", 1), ("throughput", "wal", 0)])
+async def test_profiles_apply_pragmas(tmp_path, profile, journal_mode, synchronous):
+    """Test each profile sets the journal mode and per-connection pragmas"""
+    database = Database(str(tmp_path / "bot.db"), readers=1, profile=profile)
+    await database.init()
+    try:
+        async with database.transaction() as cursor:
+            await cursor.execute("PRAGMA journal_mode")
+            assert (await cursor.fetchone())[0] == journal_mode
+        async with database.read() as cursor:
+            await cursor.execute("PRAGMA synchronous")
+            assert (await cursor.fetchone())[0] == synchronous
+    finally:
+        await database.close()
+
+@pytest.mark.asyncio
+async def test_unknown_profile_raises(tmp_path):
+    """Test a typo in DB_PROFILE fails loudly"""
+    with pytest.raises(ValueError):
+        await Database(str(tmp_path / "bot.db"), profile="fast").init()
+
+@pytest.mark.asyncio
+async def test_submitted_writes_share_a_commit(db):
+    """Test concurrent submits are committed together and failures stay with their caller"""
+    insert = "INSERT INTO guilds (id, name, owner_id, member_count) VALUES (?, 'a', 2, 3)"
+    results = await asyncio.gather(
+        db.submit(insert, (1,)),
+        db.submit(insert, (1,)),
+        db.submit(insert, (2,)),
+        return_exceptions=True
+    )
+
+    assert results[0] == 1 and results[2] == 1
+    assert isinstance(results[1], Exception)
+    async with db.read() as cursor:
+        await cursor.execute("SELECT id FROM guilds ORDER BY id")
+        assert [row[0] for row in await cursor.fetchall()] == [1, 2]
+    stats = db.stats()["group_commit"]
+    assert stats["groups"] == 1
+    assert stats["writes"] == 3
+    assert stats["errors"] == 1
+
+@pytest.mark.asyncio
+async def test_close_commits_queued_writes(tmp_path):
+    """Test writes still queued at close are committed"""
+    database = Database(str(tmp_path / "bot.db"), readers=1, group_interval=10)
+    await database.init()
+    pending = asyncio.create_task(database.submit(
+        "INSERT INTO guilds (id, name, owner_id, member_count) VALUES (1, 'a', 2, 3)"
+    ))
+    await asyncio.sleep(0)
+    await database.close()
+    assert await pending == 1
+
+    await database.init()
+    async with database.read() as cursor:
+        await cursor.execute("SELECT COUNT(*) FROM guilds")
+        assert (await cursor.fetchone())[0] == 1
+    await database.close()
@@ -0,0 +1,36 @@
+import math
+from array import array
+import pytest
+from utils.loudness import LoudnessProfile, MODE_PEAK, MODE_LUFS, measure_lufs, measure_peak, apply_gain
+
+def tone(amplitude: float, seconds: float = 2.0, frequency: float = 1000.0) -> bytes:
+    """Stereo sine tone as 48kHz 16-bit PCM"""
+    samples = array('h')
+    for i in range(int(48000 * seconds)):
+        value = int(32767 * amplitude * math.sin(2 * math.pi * frequency * i / 48000))
+        samples.extend((value, value))
+    return samples.tobytes()
+
+def test_lufs_of_reference_tone():
+    """Test a 1kHz sine at -6dBFS on both channels measures about -6 LUFS"""
+    assert measure_lufs(tone(0.5)) == pytest.approx(-6.0, abs=0.3)
+
+def test_silence_is_not_measured():
+    """Test silence has no integrated loudness"""
+    assert measure_lufs(b'\x00' * 48000 * 4) is None
+
+def test_peak_mode_hits_target():
+    """Test peak normalization scales to the peak target"""
+    pcm = LoudnessProfile(mode=MODE_PEAK, peak_db=-1.0).apply(tone(0.25))
+    assert measure_peak(pcm) == pytest.approx(10 ** (-1 / 20), abs=0.01)
+
+def test_lufs_mode_respects_peak_ceiling():
+    """Test loudness normalization never pushes peaks past the ceiling"""
+    profile = LoudnessProfile(mode=MODE_LUFS, target_lufs=0.0, peak_db=-1.0)
+    pcm = profile.apply(tone(0.1))
+    assert measure_peak(pcm) <= 10 ** (-1 / 20) + 0.001
+
+def test_apply_gain_clips():
+    """Test gain is clipped to the 16-bit range"""
+    pcm = apply_gain(tone(0.9, seconds=0.1), 4.0)
+    assert measure_peak(pcm) == pytest.approx(1.0, abs=0.001)
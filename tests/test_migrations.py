@@ -0,0 +1,115 @@
+import aiosqlite
+import pytest
+from utils.database import Database
+from utils.migrations import SCHEMA_VERSION
+
+LEGACY = """
+CREATE TABLE guilds (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    owner_id TEXT NOT NULL,
+    member_count INTEGER NOT NULL,
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE user_roles (
+    guild_id TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    role_id TEXT NOT NULL,
+    assigned_by TEXT NOT NULL,
+    assigned_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (guild_id, user_id, role_id)
+);
+CREATE TABLE command_usage (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    guild_id TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    command_name TEXT NOT NULL,
+    used_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    success BOOLEAN DEFAULT 1,
+    error_message TEXT
+);
+"""
+
+async def legacy_database(path, users=25):
+    async with aiosqlite.connect(path) as connection:
+        await connection.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        await connection.executescript(LEGACY)
+        await connection.execute("INSERT INTO guilds (id, name, owner_id, member_count) VALUES ('900000000000000001', 'a', '5', 3)")
+        await connection.executemany(
+            "INSERT INTO user_roles (guild_id, user_id, role_id, assigned_by) VALUES ('900000000000000001', ?, '77', '0')",
+            [(str(800000000000000000 + i),) for i in range(users)]
+        )
+        await connection.executemany(
+            "INSERT INTO command_usage (guild_id, user_id, command_name) VALUES ('900000000000000001', ?, 'give')",
+            [(str(i),) for i in range(users)]
+        )
+        await connection.commit()
+
+@pytest.mark.asyncio
+async def test_fresh_database_is_current(tmp_path):
+    """Test a new file gets the current version and integer layout"""
+    db = Database(str(tmp_path / "bot.db"), readers=1)
+    await db.init()
+    async with db.read() as cursor:
+        await cursor.execute("PRAGMA user_version")
+        assert (await cursor.fetchone())[0] == SCHEMA_VERSION
+        await cursor.execute("SELECT sql FROM sqlite_master WHERE name = 'user_roles'")
+        assert "WITHOUT ROWID" in (await cursor.fetchone())[0]
+    await db.close()
+
+@pytest.mark.asyncio
+async def test_text_snowflakes_are_converted_in_batches(tmp_path):
+    """Test every row survives the upgrade with integer IDs"""
+    path = str(tmp_path / "bot.db")
+    await legacy_database(path)
+    db = Database(path, readers=1, migration_batch=10)
+    await db.init()
+
+    async with db.read() as cursor:
+        await cursor.execute("PRAGMA user_version")
+        assert (await cursor.fetchone())[0] == SCHEMA_VERSION
+        await cursor.execute("SELECT COUNT(*), MIN(typeof(user_id)), MAX(typeof(user_id)) FROM user_roles WHERE guild_id = ?",
+                             (900000000000000001,))
+        assert tuple(await cursor.fetchone()) == (25, 'integer', 'integer')
+        await cursor.execute("SELECT owner_id FROM guilds")
+        assert (await cursor.fetchone())[0] == 5
+        await cursor.execute("SELECT COUNT(*) FROM sqlite_master WHERE name IN ('schema_migration', 'user_roles__v1')")
+        assert (await cursor.fetchone())[0] == 0
+        # Tables the old file never had are created by schema.sql
+        await cursor.execute("SELECT COUNT(*) FROM role_jobs")
+        assert (await cursor.fetchone())[0] == 0
+
+    # Row IDs carry over, so new usage rows keep counting up
+    await db.submit("INSERT INTO command_usage (guild_id, user_id, command_name) VALUES (1, 2, 'give')")
+    async with db.read() as cursor:
+        await cursor.execute("SELECT MAX(id) FROM command_usage")
+        assert (await cursor.fetchone())[0] == 26
+    await db.close()
+
+@pytest.mark.asyncio
+async def test_interrupted_copy_resumes(tmp_path):
+    """Test a copy that stopped part way continues from its checkpoint"""
+    path = str(tmp_path / "bot.db")
+    await legacy_database(path)
+    async with aiosqlite.connect(path) as connection:
+        # State left behind by a migration stopped after the first 10 user_roles rows
+        await connection.executescript("""
+            CREATE TABLE schema_migration (name TEXT PRIMARY KEY, copied_to INTEGER NOT NULL);
+            CREATE TABLE user_roles__v1 (
+                guild_id INTEGER NOT NULL, user_id INTEGER NOT NULL, role_id INTEGER NOT NULL,
+                assigned_by INTEGER NOT NULL, assigned_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (guild_id, user_id, role_id)
+            ) WITHOUT ROWID;
+            INSERT INTO user_roles__v1 (guild_id, user_id, role_id, assigned_by)
+                SELECT CAST(guild_id AS INTEGER), CAST(user_id AS INTEGER), CAST(role_id AS INTEGER), 0
+                FROM user_roles WHERE rowid <= 10;
+            INSERT INTO schema_migration VALUES ('user_roles', 10);
+        """)
+
+    db = Database(path, readers=1, migration_batch=10)
+    await db.init()
+    async with db.read() as cursor:
+        await cursor.execute("SELECT COUNT(*) FROM user_roles")
+        assert (await cursor.fetchone())[0] == 25
+    await db.close()
@@ -0,0 +1,169 @@
+import discord
+import pytest
+from utils.permission_cache import PermissionResolver
+
+class MockGuild:
+    def __init__(self, id=1):
+        self.id = id
+
+class MockRole:
+    def __init__(self, id, position=1, permissions=None, guild=None):
+        self.id = id
+        self.position = position
+        self.permissions = permissions or discord.Permissions()
+        self.guild = guild
+
+    def is_default(self):
+        return self.id == self.guild.id
+
+class MockMember:
+    """Member whose derived values count how often they are computed"""
+
+    def __init__(self, id, roles, guild):
+        self.id = id
+        self.roles = roles
+        self.guild = guild
+        self.computed = 0
+
+    @property
+    def guild_permissions(self):
+        self.computed += 1
+        value = 0
+        for role in self.roles:
+            value |= role.permissions.value
+        return discord.Permissions(value)
+
+    @property
+    def top_role(self):
+        # Every member holds @everyone at position 0; ties go to the lower ID like discord.Role
+        return max(self.roles, key=lambda role: (role.position, -role.id), default=MockRole(self.guild.id, 0, guild=self.guild))
+
+@pytest.fixture
+def guild():
+    return MockGuild()
+
+def test_lookups_are_cached(guild):
+    """Test repeated checks resolve the member once"""
+    staff = MockRole(10, guild=guild)
+    member = MockMember(100, [staff], guild)
+    resolver = PermissionResolver()
+
+    assert resolver.has_role(member, 10)
+    assert not resolver.has_role(member, 11)
+    assert not resolver.is_admin(member)
+
+    assert member.computed == 1
+    assert resolver.misses == 1
+    assert resolver.hits == 2
+
+@pytest.mark.asyncio
+async def test_member_update_invalidates_only_that_member(guild):
+    """Test a role change on one member doesn't touch others"""
+    staff = MockRole(10, guild=guild)
+    first = MockMember(100, [], guild)
+    second = MockMember(200, [], guild)
+    resolver = PermissionResolver()
+    assert not resolver.has_role(first, 10)
+    assert not resolver.has_role(second, 10)
+
+    before = MockMember(100, [], guild)
+    first.roles = [staff]
+    await resolver.on_member_update(before, first)
+
+    assert resolver.has_role(first, 10)
+    assert first.computed == 2
+    assert second.computed == 1
+
+@pytest.mark.asyncio
+async def test_role_permission_update_invalidates_holders(guild):
+    """Test changing a role's permissions drops the members holding it"""
+    role = MockRole(10, guild=guild)
+    holder = MockMember(100, [role], guild)
+    other = MockMember(200, [MockRole(11, guild=guild)], guild)
+    resolver = PermissionResolver()
+    assert not resolver.is_admin(holder)
+    assert not resolver.is_admin(other)
+
+    updated = MockRole(10, permissions=discord.Permissions(administrator=True), guild=guild)
+    holder.roles = [updated]
+    await resolver.on_guild_role_update(role, updated)
+
+    assert resolver.is_admin(holder)
+    assert holder.computed == 2
+    assert other.computed == 1
+
+@pytest.mark.asyncio
+async def test_role_position_update_invalidates_guild(guild):
+    """Test moving a role re-resolves hierarchy for everyone"""
+    low = MockRole(10, position=1, guild=guild)
+    high = MockRole(11, position=2, guild=guild)
+    bot_member = MockMember(1, [high], guild)
+    target = MockMember(2, [low], guild)
+    resolver = PermissionResolver()
+    assert resolver.outranks(bot_member, target)
+
+    moved = MockRole(10, position=3, guild=guild)
+    target.roles = [moved]
+    await resolver.on_guild_role_update(low, moved)
+
+    assert not resolver.outranks(bot_member, target)
+
+def test_outranks_breaks_position_ties_like_discord(guild):
+    """Test the role with the lower ID ranks higher on equal positions"""
+    older = MockRole(10, position=2, guild=guild)
+    newer = MockRole(11, position=2, guild=guild)
+    first = MockMember(1, [older], guild)
+    second = MockMember(2, [newer], guild)
+    resolver = PermissionResolver()
+
+    assert resolver.outranks(first, second)
+    assert not resolver.outranks(second, first)
+
+@pytest.mark.asyncio
+async def test_timeout_invalidates_member(guild):
+    """Test a timeout drops the member's cached channel permissions"""
+    class MockChannel:
+        id = 50
+        guild = None
+
+        def permissions_for(self, member):
+            return discord.Permissions(send_messages=member.timed_out_until is None)
+
+    channel = MockChannel()
+    channel.guild = guild
+    member = MockMember(100, [], guild)
+    member.timed_out_until = None
+    resolver = PermissionResolver()
+    assert resolver.channel_permissions(channel, member).send_messages
+
+    before = MockMember(100, [], guild)
+    before.timed_out_until = None
+    member.timed_out_until = "2026-10-18T00:00:00+00:00"
+    await resolver.on_member_update(before, member)
+
+    assert not resolver.channel_permissions(channel, member).send_messages
+
+@pytest.mark.asyncio
+async def test_channel_update_invalidates_channel_permissions(guild):
+    """Test overwrite changes drop cached channel permissions"""
+    class MockChannel:
+        def __init__(self, allowed):
+            self.id = 50
+            self.guild = guild
+            self.overwrites = {"allowed": allowed}
+            self.calls = 0
+
+        def permissions_for(self, member):
+            self.calls += 1
+            return discord.Permissions(send_messages=self.overwrites["allowed"])
+
+    member = MockMember(100, [MockRole(10, guild=guild)], guild)
+    channel = MockChannel(True)
+    resolver = PermissionResolver()
+    assert resolver.channel_permissions(channel, member).send_messages
+    assert resolver.channel_permissions(channel, member).send_messages
+    assert channel.calls == 1
+
+    updated = MockChannel(False)
+    await resolver.on_guild_channel_update(channel, updated)
+    assert not resolver.channel_permissions(updated, member).send_messages
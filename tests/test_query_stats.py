@@ -0,0 +1,60 @@
+import pytest
+import pytest_asyncio
+from utils.database import Database
+from utils.query_stats import normalize_sql
+
+@pytest_asyncio.fixture
+async def db(tmp_path):
+    database = Database(str(tmp_path / "bot.db"), readers=1)
+    await database.init()
+    yield database
+    await database.close()
+
+def by_sql(db, prefix):
+    return next(entry for entry in db.queries.stats()["by_statement"] if entry["sql"].startswith(prefix))
+
+def test_normalize_sql():
+    """Test literals and whitespace don't split one statement into many"""
+    assert normalize_sql("SELECT *\n  FROM t WHERE a = 12 AND b = 'x''y'") == "SELECT * FROM t WHERE a = ? AND b = ?"
+    assert normalize_sql("DELETE FROM t WHERE id IN (?, ?, ?)") == "DELETE FROM t WHERE id IN (...)"
+    assert normalize_sql("SELECT c1 FROM t2 LIMIT 5") == "SELECT c1 FROM t2 LIMIT ?"
+
+@pytest.mark.asyncio
+async def test_statements_are_timed_and_counted(db):
+    """Test calls, rows and errors are grouped by normalized statement"""
+    async with db.transaction() as cursor:
+        await cursor.executemany(
+            "INSERT INTO guilds (id, name, owner_id, member_count) VALUES (?, 'a', 2, 3)",
+            [(1,), (2,), (3,)]
+        )
+    for guild_id in (1, 2):
+        async with db.read() as cursor:
+            await cursor.execute(f"SELECT name FROM guilds WHERE id = {guild_id}")
+            await cursor.fetchall()
+    with pytest.raises(Exception):
+        async with db.transaction() as cursor:
+            await cursor.execute("INSERT INTO guilds (id, name, owner_id, member_count) VALUES (1, 'a', 2, 3)")
+
+    insert = by_sql(db, "INSERT INTO guilds")
+    assert insert["calls"] == 1
+    assert insert["rows"] == 3
+    assert insert["errors"] == 1
+    select = by_sql(db, "SELECT name FROM guilds")
+    assert select["calls"] == 2
+    assert select["rows"] == 2
+    assert not select["full_scan"]
+
+@pytest.mark.asyncio
+async def test_full_scans_and_slow_queries_are_reported(db):
+    """Test a scan is flagged from its plan and a slow statement is logged"""
+    db.queries.slow_threshold = 0
+    async with db.read() as cursor:
+        await cursor.execute("SELECT COUNT(*) FROM command_usage WHERE error_message = ?", ("x",))
+        await cursor.fetchone()
+
+    stats = db.queries.stats()
+    scan = by_sql(db, "SELECT COUNT(*) FROM command_usage")
+    assert scan["full_scan"]
+    assert any(step.startswith("SCAN command_usage") for step in scan["plan"])
+    assert scan["sql"] in stats["full_scans"]
+    assert stats["recent_slow"][-1]["sql"] == scan["sql"]
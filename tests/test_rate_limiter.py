@@ -0,0 +1,117 @@
+import aiosqlite
+import pytest
+from utils.rate_limiter import SlidingWindowLimiter
+from utils.usage_log import CommandUsageWriter
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+class MockDatabase:
+    """Database exposing transaction() over an in-memory SQLite connection"""
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.fail = False
+
+    def transaction(self):
+        db = self
+
+        class _Transaction:
+            async def __aenter__(self):
+                if db.fail:
+                    raise RuntimeError("database is locked")
+                self.cursor = await db.connection.cursor()
+                return self.cursor
+
+            async def __aexit__(self, exc_type, exc, tb):
+                await db.connection.commit()
+                await self.cursor.close()
+
+        return _Transaction()
+
+def test_limit_per_key():
+    """Test each (guild, user, command) has its own budget"""
+    limiter = SlidingWindowLimiter(limit=2, window=60, clock=FakeClock())
+
+    assert limiter.check((1, 10, "give"))
+    assert limiter.check((1, 10, "give"))
+    assert not limiter.check((1, 10, "give"))
+    assert limiter.check((1, 10, "remove"))
+    assert limiter.check((1, 11, "give"))
+    assert limiter.denied == 1
+
+def test_window_slides():
+    """Test calls free up as they age out of the window"""
+    clock = FakeClock()
+    limiter = SlidingWindowLimiter(limit=2, window=60, clock=clock)
+    limiter.check("key")
+    clock.now += 30
+    limiter.check("key")
+    assert not limiter.check("key")
+    assert limiter.retry_after("key") == pytest.approx(30)
+
+    clock.now += 30
+    assert limiter.check("key")
+    assert not limiter.check("key")
+
+def test_denied_calls_do_not_extend_the_block():
+    """Test retrying while limited doesn't push the window forward"""
+    clock = FakeClock()
+    limiter = SlidingWindowLimiter(limit=1, window=60, clock=clock)
+    limiter.check("key")
+    for _ in range(10):
+        clock.now += 5
+        assert not limiter.check("key")
+    clock.now += 10
+    assert limiter.check("key")
+
+def test_keys_are_bounded():
+    """Test least recently used keys are evicted past max_keys"""
+    limiter = SlidingWindowLimiter(limit=1, window=60, max_keys=2, clock=FakeClock())
+    limiter.check("a")
+    limiter.check("b")
+    limiter.retry_after("a")
+    limiter.check("c")
+
+    assert limiter.stats()["keys"] == 2
+    assert limiter.evictions == 1
+    assert not limiter.check("a")
+    assert limiter.check("b")
+
+@pytest.mark.asyncio
+async def test_usage_rows_written_in_batches():
+    """Test buffered usage rows land in command_usage on flush"""
+    async with aiosqlite.connect(":memory:") as connection:
+        await connection.execute("""
+            CREATE TABLE command_usage (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                guild_id TEXT NOT NULL,
+                user_id TEXT NOT NULL,
+                command_name TEXT NOT NULL,
+                used_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                success BOOLEAN DEFAULT 1,
+                error_message TEXT
+            )
+        """)
+        db = MockDatabase(connection)
+        writer = CommandUsageWriter(db, batch_size=100, flush_interval=60)
+        writer.start()
+
+        for i in range(5):
+            writer.record(1, 10 + i, "give", success=i != 4)
+        db.fail = True
+        await writer.flush()
+        assert writer.failures == 1
+        assert writer.stats()["pending"] == 5
+
+        db.fail = False
+        await writer.close()
+
+        async with connection.execute("SELECT COUNT(*), SUM(success) FROM command_usage") as cursor:
+            assert tuple(await cursor.fetchone()) == (5, 4)
+        assert writer.written == 5
+        assert writer.flushes == 1
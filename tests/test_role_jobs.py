@@ -0,0 +1,126 @@
+import asyncio
+from datetime import datetime, timezone
+import discord
+import pytest
+import pytest_asyncio
+from utils.database import Database
+from utils.role_jobs import ACTION_ADD, STATUS_COMPLETED, RoleJobEngine, RoleSelector, parse_date
+
+class MockResponse:
+    status = 429
+    reason = "Too Many Requests"
+
+class MockRole:
+    def __init__(self, id):
+        self.id = id
+
+class MockMember:
+    def __init__(self, id, roles=(), joined_at=None, bot=False):
+        self.id = id
+        self.roles = list(roles)
+        self.joined_at = joined_at or datetime(2024, 1, 1, tzinfo=timezone.utc)
+        self.bot = bot
+        self.calls = 0
+        self.block = None
+        self.throttle = 0
+
+    async def add_roles(self, role, reason=None):
+        self.calls += 1
+        if self.block:
+            await self.block.wait()
+        if self.throttle:
+            self.throttle -= 1
+            raise discord.HTTPException(MockResponse(), "rate limited")
+        self.roles.append(role)
+
+class MockGuild:
+    def __init__(self, members, roles):
+        self.id = 1
+        self.members = members
+        self._members = {member.id: member for member in members}
+        self._roles = {role.id: role for role in roles}
+
+    def get_member(self, member_id):
+        return self._members.get(member_id)
+
+    def get_role(self, role_id):
+        return self._roles.get(role_id)
+
+class MockBot:
+    def __init__(self, guild):
+        self.guild = guild
+
+    def get_guild(self, guild_id):
+        return self.guild if guild_id == self.guild.id else None
+
+@pytest_asyncio.fixture
+async def db(tmp_path):
+    database = Database(str(tmp_path / "bot.db"), readers=2)
+    await database.init()
+    yield database
+    await database.close()
+
+async def wait_for(engine, job_id):
+    while job_id in engine._tasks:
+        await asyncio.sleep(0.01)
+
+def test_selector_conditions():
+    """Test has/without role and join date conditions all apply"""
+    citizen, muted = MockRole(10), MockRole(11)
+    selector = RoleSelector([10], [11], joined_before=parse_date("2024-06-01"))
+
+    assert selector.matches(MockMember(1, [citizen]))
+    assert not selector.matches(MockMember(2, [citizen, muted]))
+    assert not selector.matches(MockMember(3, []))
+    assert not selector.matches(MockMember(4, [citizen], joined_at=parse_date("2024-07-01")))
+    assert not selector.matches(MockMember(5, [citizen], bot=True))
+    assert RoleSelector.from_json(selector.to_json()).to_json() == selector.to_json()
+
+@pytest.mark.asyncio
+async def test_job_resumes_from_checkpoint(db):
+    """Test a restarted job skips checkpointed members and finishes the rest"""
+    target = MockRole(20)
+    members = [MockMember(i) for i in range(1, 6)]
+    guild = MockGuild(members, [target])
+    gate = asyncio.Event()
+    members[2].block = gate
+
+    first = RoleJobEngine(MockBot(guild), db, max_concurrency=1, checkpoint_size=2)
+    job = await first.create(guild, target, ACTION_ADD, RoleSelector(), created_by=99)
+    while members[2].calls == 0:
+        await asyncio.sleep(0.01)
+    # Crash in the middle of the second chunk
+    await first.close()
+    gate.set()
+
+    changes = []
+
+    async def on_change(*args):
+        changes.append(args)
+
+    second = RoleJobEngine(MockBot(guild), db, checkpoint_size=2, on_change=on_change)
+    [resumed] = await second.resume()
+    assert resumed.done == 2
+    await wait_for(second, job.id)
+
+    assert resumed.status == STATUS_COMPLETED
+    assert resumed.succeeded == 5
+    assert [member.calls for member in members] == [1, 1, 2, 1, 1]
+    assert sorted(change[1] for change in changes) == [3, 4, 5]
+
+@pytest.mark.asyncio
+async def test_throttled_members_retry_at_lower_concurrency(db):
+    """Test 429s back off and retry instead of failing the member"""
+    target = MockRole(20)
+    members = [MockMember(i) for i in range(1, 5)]
+    members[0].throttle = 1
+    members[1].roles.append(target)
+    guild = MockGuild(members, [target])
+
+    engine = RoleJobEngine(MockBot(guild), db, max_concurrency=4, backoff=0)
+    job = await engine.create(guild, target, ACTION_ADD, RoleSelector(), created_by=99)
+    await wait_for(engine, job.id)
+
+    assert (job.succeeded, job.skipped, job.failed) == (3, 1, 0)
+    assert engine.backoffs == 1
+    assert members[0].calls == 2
@@ -0,0 +1,115 @@
+import pytest
+import pytest_asyncio
+from cogs.role_commands import RoleCommands
+from utils.database import Database
+from utils.role_reconciler import RoleReconciler
+from utils.write_behind import WriteBehindBuffer
+
+class MockRole:
+    def __init__(self, id, guild=None):
+        self.id = id
+        self.guild = guild
+
+    def is_default(self):
+        return self.id == 1
+
+class MockGuild:
+    def __init__(self, members):
+        self.id = 1
+        self.members = members
+        self.chunked = True
+        for member in members:
+            member.guild = self
+
+class MockMember:
+    def __init__(self, id, role_ids):
+        self.id = id
+        self.roles = [MockRole(1)] + [MockRole(role_id) for role_id in role_ids]
+        self.guild = None
+
+@pytest_asyncio.fixture
+async def db(tmp_path):
+    database = Database(str(tmp_path / "bot.db"), readers=2)
+    await database.init()
+    yield database
+    await database.close()
+
+def make_reconciler(db, chunk_size=2):
+    buffer = WriteBehindBuffer(db, RoleCommands._write_role_changes, flush_interval=60, max_batch=3, merge=RoleCommands._merge_role_change)
+    return RoleReconciler(db, buffer, chunk_size=chunk_size)
+
+async def rows(db):
+    async with db.read() as cursor:
+        await cursor.execute("SELECT user_id, role_id, assigned_by FROM user_roles ORDER BY user_id, role_id")
+        return [tuple(row) for row in await cursor.fetchall()]
+
+async def store(db, *rows):
+    async with db.transaction() as cursor:
+        await cursor.executemany(
+            "INSERT INTO user_roles (guild_id, user_id, role_id, assigned_by) VALUES (1, ?, ?, ?)", rows
+        )
+
+@pytest.mark.asyncio
+async def test_full_diff_fixes_drift_across_chunks(db):
+    """Test missing rows are added, stale and departed ones removed, assigners kept"""
+    await store(db, (100, 10, 42), (100, 11, 42), (250, 10, 42), (999, 10, 42))
+    guild = MockGuild([MockMember(100, [10]), MockMember(200, [10, 12]), MockMember(300, [])])
+    reconciler = make_reconciler(db)
+
+    result = await reconciler.reconcile(guild)
+
+    assert result == {"added": 2, "removed": 3}
+    assert await rows(db) == [(100, 10, 42), (200, 10, 0), (200, 12, 0)]
+    assert await reconciler.reconcile(guild) == {"added": 0, "removed": 0}
+
+@pytest.mark.asyncio
+async def test_member_events_update_incrementally(db):
+    """Test role edits made outside the bot reach the table"""
+    member = MockMember(100, [10])
+    guild = MockGuild([member])
+    reconciler = make_reconciler(db)
+    await reconciler.reconcile(guild)
+
+    after = MockMember(100, [11])
+    after.guild = guild
+    await reconciler.on_member_update(member, after)
+    await reconciler.buffer.flush()
+    assert await rows(db) == [(100, 11, 0)]
+
+    await reconciler.on_member_remove(after)
+    await reconciler.buffer.flush()
+    assert await rows(db) == []
+
+@pytest.mark.asyncio
+async def test_observed_add_keeps_bot_assigner(db):
+    """Test the event echo of a bot role change doesn't erase who assigned it"""
+    reconciler = make_reconciler(db)
+    reconciler.buffer.put((1, 100, 10), (42, True))
+    before, after = MockMember(100, []), MockMember(100, [10])
+    after.guild = MockGuild([after])
+    await reconciler.on_member_update(before, after)
+    await reconciler.buffer.flush()
+
+    assert await rows(db) == [(100, 10, 42)]
+
+@pytest.mark.asyncio
+async def test_member_update_during_read_is_not_overwritten(db):
+    """Test a role removal seen while a chunk is read survives the diff"""
+    member = MockMember(100, [10])
+    guild = MockGuild([member])
+    reconciler = make_reconciler(db)
+    read_stored = reconciler._stored
+
+    async def stored_with_event(*args):
+        rows_read = await read_stored(*args)
+        # The gateway updates the cached member, then dispatches the event
+        before = MockMember(100, [10])
+        before.guild = guild
+        member.roles = [MockRole(1)]
+        await reconciler.on_member_update(before, member)
+        return rows_read
+
+    reconciler._stored = stored_with_event
+    await reconciler.reconcile(guild)
+
+    assert await rows(db) == []
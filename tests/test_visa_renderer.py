@@ -0,0 +1,40 @@
+import pytest
+from utils.imaging import shape_text
+from utils.visa_renderer import VisaRenderer, card_key, DECISION_ACCEPTED, DECISION_REJECTED
+
+PIL = pytest.importorskip("PIL")
+pytest.importorskip("arabic_reshaper")
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+def test_shape_text_leaves_latin_alone():
+    """Test Latin text isn't touched by shaping"""
+    assert shape_text("Visa approved") == "Visa approved"
+
+def test_shape_text_joins_and_reorders_arabic():
+    """Test Arabic is converted to presentation forms in visual order"""
+    shaped = shape_text("محمد")
+    assert shaped != "محمد"
+    assert all('\ufb50' <= ch <= '\ufeff' for ch in shaped)
+
+def test_card_key_covers_all_fields():
+    """Test any visible change produces a different cache key"""
+    base = card_key(DECISION_ACCEPTED, "name", "staff", "2024-01-01", None, b"avatar")
+    assert base == card_key(DECISION_ACCEPTED, "name", "staff", "2024-01-01", None, b"avatar")
+    assert base != card_key(DECISION_REJECTED, "name", "staff", "2024-01-01", None, b"avatar")
+    assert base != card_key(DECISION_ACCEPTED, "name", "staff", "2024-01-01", None, b"other")
+
+@pytest.mark.asyncio
+async def test_render_in_pool_and_cache():
+    """Test cards render in the pool and repeat renders hit the cache"""
+    renderer = VisaRenderer(max_workers=1)
+    try:
+        first = await renderer.render(DECISION_REJECTED, "محمد أحمد", "Staff", "2024-01-01", "سبب")
+        second = await renderer.render(DECISION_REJECTED, "محمد أحمد", "Staff", "2024-01-01", "سبب")
+    finally:
+        renderer.close()
+
+    assert first.startswith(PNG_SIGNATURE)
+    assert second is first
+    assert renderer.renders == 1
+    assert renderer.hits == 1
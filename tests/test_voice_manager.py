@@ -0,0 +1,138 @@
+import asyncio
+import pytest
+import discord
+from utils.voice_manager import VoiceConnectionManager
+
+class MockVoiceClient:
+    def __init__(self, channel):
+        self.channel = channel
+        self.connected = True
+        self.moves = 0
+
+    def is_connected(self):
+        return self.connected
+
+    async def move_to(self, channel):
+        self.moves += 1
+        self.channel = channel
+
+    async def disconnect(self, force=False):
+        self.connected = False
+
+class MockGuild:
+    def __init__(self, id=1):
+        self.id = id
+        self.voice_client = None
+
+class MockChannel(discord.VoiceChannel):
+    """Voice channel stand-in that counts connects"""
+
+    def __init__(self, id, guild, failures=0):
+        self.id = id
+        self.name = f"voice-{id}"
+        self._guild = guild
+        self.failures = failures
+        self.connects = 0
+
+    @property
+    def guild(self):
+        return self._guild
+
+    async def connect(self, **kwargs):
+        self.connects += 1
+        await asyncio.sleep(0.01)
+        if self.failures:
+            self.failures -= 1
+            raise discord.ClientException("connect failed")
+        self._guild.voice_client = MockVoiceClient(self)
+        return self._guild.voice_client
+
+class MockBot:
+    def __init__(self, channels):
+        self.channels = {channel.id: channel for channel in channels}
+
+    def get_channel(self, channel_id):
+        return self.channels.get(channel_id)
+
+@pytest.mark.asyncio
+async def test_concurrent_acquire_single_flight():
+    """Test concurrent callers share one connect"""
+    guild = MockGuild()
+    channel = MockChannel(10, guild)
+    manager = VoiceConnectionManager(MockBot([channel]))
+
+    clients = await asyncio.gather(*(manager.acquire(channel) for _ in range(5)))
+
+    assert channel.connects == 1
+    assert all(client is clients[0] for client in clients)
+    assert manager.stats()["connect_attempts"] == 1
+
+@pytest.mark.asyncio
+async def test_acquire_moves_between_welcome_channels():
+    """Test a second welcome channel reuses the guild connection"""
+    guild = MockGuild()
+    first, second = MockChannel(10, guild), MockChannel(11, guild)
+    manager = VoiceConnectionManager(MockBot([first, second]))
+    manager.register_channel(guild.id, first.id)
+    manager.register_channel(guild.id, second.id)
+
+    client = await manager.acquire(first)
+    moved = await manager.acquire(second)
+
+    assert moved is client
+    assert client.moves == 1
+    assert second.connects == 0
+    assert manager.primary_channel(guild.id) == first.id
+    assert manager.is_welcome_channel(second.id)
+
+@pytest.mark.asyncio
+async def test_connect_retries_with_backoff():
+    """Test failed connects are retried and counted"""
+    guild = MockGuild()
+    channel = MockChannel(10, guild, failures=2)
+    manager = VoiceConnectionManager(MockBot([channel]), base_delay=0.001, max_delay=0.002, max_attempts=3)
+
+    await manager.acquire(channel)
+
+    stats = manager.stats()
+    assert stats["connect_attempts"] == 3
+    assert stats["connect_failures"] == 2
+
+@pytest.mark.asyncio
+async def test_disconnect_event_triggers_reconnect():
+    """Test a dropped connection reconnects and records time to reconnect"""
+    guild = MockGuild()
+    channel = MockChannel(10, guild)
+    manager = VoiceConnectionManager(MockBot([channel]))
+    client = await manager.acquire(channel)
+
+    client.connected = False
+    manager.handle_disconnect(guild.id)
+    await asyncio.sleep(0.05)
+
+    assert channel.connects == 2
+    assert manager.get(guild.id) is not None
+    assert manager.stats()["reconnects"] == 1
+    assert manager.stats()["time_to_reconnect"]["count"] == 1
+
+@pytest.mark.asyncio
+async def test_release_does_not_reconnect():
+    """Test an intentional release is not treated as a drop"""
+    guild = MockGuild()
+    channel = MockChannel(10, guild)
+    manager = VoiceConnectionManager(MockBot([channel]))
+    await manager.acquire(channel)
+
+    await manager.release(guild.id)
+    manager.handle_disconnect(guild.id)
+    await asyncio.sleep(0.02)
+
+    assert channel.connects == 1
+
+def test_backoff_is_bounded():
+    """Test backoff delays honor the configured cap"""
+    manager = VoiceConnectionManager(None, base_delay=5, max_delay=60)
+    for attempt in range(10):
+        delay = manager.backoff(attempt)
+        assert 0 < delay <= 60
+    assert 2.5 <= manager.backoff(0) <= 5
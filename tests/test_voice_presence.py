@@ -0,0 +1,91 @@
+from utils.voice_presence import VoicePresencePolicy
+
+class FakeClock:
+    """Manually advanced monotonic clock"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+def test_disabled_policy_never_idles():
+    """Test a zero idle timeout keeps connections forever"""
+    clock = FakeClock()
+    policy = VoicePresencePolicy(idle_timeout=0, clock=clock)
+    clock.now += 10_000
+    assert not policy.enabled
+    assert policy.idle_guilds([1, 2]) == []
+
+def test_idle_after_timeout():
+    """Test a guild goes idle only after the timeout passes without activity"""
+    clock = FakeClock()
+    policy = VoicePresencePolicy(idle_timeout=60, clock=clock)
+    policy.touch(1)
+    clock.now += 30
+    assert policy.idle_guilds([1]) == []
+    clock.now += 31
+    assert policy.idle_guilds([1]) == [1]
+
+    policy.disconnected(1)
+    assert policy.stats()["idle_disconnects"] == 1
+
+def test_prewarm_hit():
+    """Test a join inside the pre-warm window counts as a hit"""
+    clock = FakeClock()
+    policy = VoicePresencePolicy(idle_timeout=60, prewarm_window=120, clock=clock)
+    assert policy.prewarm(1)
+    assert not policy.prewarm(1)
+    clock.now += 30
+    policy.join(1, connected=True)
+
+    stats = policy.stats()
+    assert stats["prewarms"] == 1
+    assert stats["prewarm_hits"] == 1
+    assert stats["prewarm_hit_rate"] == 1.0
+    assert stats["cold_starts"] == 0
+
+def test_prewarm_miss_and_cold_start():
+    """Test an expired pre-warm is a miss and a join without a connection is cold"""
+    clock = FakeClock()
+    policy = VoicePresencePolicy(idle_timeout=60, prewarm_window=120, clock=clock)
+    policy.prewarm(1)
+    clock.now += 60
+    assert policy.expire() == []
+    clock.now += 60
+    assert policy.expire() == [1]
+    policy.join(1, connected=False)
+
+    stats = policy.stats()
+    assert stats["prewarm_misses"] == 1
+    assert stats["prewarm_hits"] == 0
+    assert stats["prewarm_hit_rate"] == 0.0
+    assert stats["cold_starts"] == 1
+    assert stats["cold_start_rate"] == 1.0
+
+def test_pending_prewarm_holds_connection():
+    """Test a guild isn't dropped while a pre-warm window is open"""
+    clock = FakeClock()
+    policy = VoicePresencePolicy(idle_timeout=60, prewarm_window=300, clock=clock)
+    policy.prewarm(1)
+    clock.now += 120
+    assert policy.idle_guilds([1]) == []
+    clock.now += 180
+    policy.expire()
+    assert policy.idle_guilds([1]) == [1]
+
+def test_prewarm_while_connected_is_not_counted():
+    """Test a signal for an already connected guild opens no window"""
+    clock = FakeClock()
+    policy = VoicePresencePolicy(idle_timeout=60, prewarm_window=120, clock=clock)
+    assert not policy.prewarm(1, connected=True)
+    clock.now += 30
+    policy.join(1, connected=True)
+    clock.now += 120
+    assert policy.expire() == []
+
+    stats = policy.stats()
+    assert stats["prewarms"] == 0
+    assert stats["prewarm_skips"] == 1
+    assert stats["prewarm_hits"] == 0
+    assert stats["prewarm_hit_rate"] is None
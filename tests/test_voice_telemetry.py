@@ -0,0 +1,100 @@
+import discord
+import pytest
+from utils import voice_telemetry
+from utils.voice_telemetry import VoiceTelemetry
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+class FakeSource(discord.AudioSource):
+    """Source whose reads take ``read_cost`` seconds on the fake clock"""
+
+    def __init__(self, clock, read_cost=0.0001):
+        self.clock = clock
+        self.read_cost = read_cost
+        self.frames = 0
+
+    def read(self):
+        self.clock.now += self.read_cost
+        self.frames += 1
+        return b'frame'
+
+    def is_opus(self):
+        return True
+
+class MockVoiceClient:
+    def __init__(self, latency):
+        self.latency = latency
+
+    def is_connected(self):
+        return True
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(voice_telemetry.time, 'perf_counter', fake)
+    return fake
+
+def play(telemetry, clock, read_at_ms):
+    """Pull one frame at each tick, given in milliseconds"""
+    source = telemetry.wrap(FakeSource(clock))
+    for tick in read_at_ms:
+        clock.now = tick / 1000
+        source.read()
+
+def test_late_and_skipped_frames(clock):
+    """Test a late frame counts the 20ms slots it missed"""
+    telemetry = VoiceTelemetry(late_threshold=0.01)
+    play(telemetry, clock, [0, 20, 40, 100, 120, 145])
+
+    stats = telemetry.stats()
+    assert stats["frames"] == 6
+    # Only the 60ms gap is past 20ms + 10ms; it missed the slots at 60 and 80
+    assert stats["late_frames"] == 1
+    assert stats["skipped_frames"] == 2
+    assert stats["frame_interval"]["count"] == 5
+    assert stats["frame_interval"]["max"] == pytest.approx(0.06)
+    assert stats["read_time"]["count"] == 6
+    assert stats["read_time"]["max"] == pytest.approx(0.0001)
+
+def test_on_time_frames_are_not_late(clock):
+    """Test steady 20ms reads and small jitter count as on time"""
+    telemetry = VoiceTelemetry(late_threshold=0.01)
+    play(telemetry, clock, [0, 20, 40, 65, 85])
+
+    stats = telemetry.stats()
+    assert stats["late_frames"] == 0
+    assert stats["skipped_frames"] == 0
+    assert stats["jitter"]["max"] == pytest.approx(0.005)
+
+def test_empty_frame_is_not_recorded(clock):
+    """Test the end-of-stream read doesn't count as a frame"""
+    class EndedSource(FakeSource):
+        def read(self):
+            return b''
+
+    telemetry = VoiceTelemetry()
+    telemetry.wrap(EndedSource(clock)).read()
+    assert telemetry.stats()["frames"] == 0
+
+def test_sample_warns_on_window_jitter_and_resets(clock):
+    """Test the jitter window is averaged per sample and starts over after it"""
+    telemetry = VoiceTelemetry(jitter_warn=0.005, late_threshold=0.01)
+    # Intervals 20, 20, 60, 20, 25: jitter 0, 0, 40, 0, 5 -> mean 9ms
+    play(telemetry, clock, [0, 20, 40, 100, 120, 145])
+
+    telemetry.sample([MockVoiceClient(0.05), MockVoiceClient(float('inf'))])
+    assert telemetry.jitter_warnings == 1
+    assert telemetry.stats()["ws_latency"]["count"] == 1
+
+    # Nothing played since, so the next window is empty
+    telemetry.sample([])
+    assert telemetry.jitter_warnings == 1
+
+    play(telemetry, clock, [200, 220, 240])
+    telemetry.sample([])
+    assert telemetry.jitter_warnings == 1
@@ -0,0 +1,140 @@
+import asyncio
+import queue
+import threading
+import time
+import pytest
+from utils.voice_worker import (
+    OP_PLAY, OP_SHUTDOWN, STATUS_FAILED, STATUS_FINISHED, STATUS_STARTED, VoiceWorkerClient
+)
+
+class MockProcess:
+    """Stands in for the worker process, answering jobs from a thread"""
+
+    def __init__(self, context, target, args, name, daemon):
+        self.context = context
+        self.jobs, self.statuses = args
+        self.pid = len(context.processes) + 1
+        self.dead = False
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self.context.processes.append(self)
+        self._thread.start()
+
+    def _run(self):
+        while not self.dead:
+            try:
+                job = self.jobs.get(timeout=0.01)
+            except queue.Empty:
+                continue
+            if self.dead:
+                return
+            if job['op'] == OP_SHUTDOWN:
+                self.statuses.put(None)
+                self.dead = True
+                return
+            if job['op'] != OP_PLAY:
+                continue
+            if self.context.mode == 'fail':
+                self.statuses.put({'id': job['id'], 'status': STATUS_FAILED, 'error': 'no channel'})
+            elif self.context.mode == 'play':
+                self.statuses.put({'id': job['id'], 'status': STATUS_STARTED})
+                self.statuses.put({'id': job['id'], 'status': STATUS_FINISHED, 'error': None})
+
+    def kill(self):
+        """Die without the end marker a clean exit sends"""
+        self.dead = True
+        self._thread.join()
+
+    def is_alive(self):
+        return not self.dead
+
+    def join(self, timeout=None):
+        self._thread.join(timeout)
+
+    def terminate(self):
+        self.dead = True
+
+class MockContext:
+    def __init__(self):
+        self.mode = 'play'
+        self.processes = []
+        self.Queue = queue.Queue
+
+    def Process(self, **kwargs):
+        return MockProcess(self, **kwargs)
+
+def status_readers():
+    return [thread for thread in threading.enumerate() if thread.name == 'voice-worker-status']
+
+async def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        await asyncio.sleep(0.01)
+
+@pytest.fixture
+def client():
+    worker = VoiceWorkerClient(start_timeout=1.0)
+    worker._context = MockContext()
+    yield worker
+    if worker._process:
+        worker.stop()
+
+@pytest.mark.asyncio
+async def test_started_and_finished_statuses_complete_play(client):
+    """Test STARTED resolves play and FINISHED its returned future"""
+    client.start()
+    finished = await client.play(1, [], time.perf_counter())
+    assert finished is not None
+    await asyncio.wait_for(finished, 1.0)
+    assert client.stats()["in_flight"] == 0
+
+@pytest.mark.asyncio
+async def test_failed_status_fails_play(client):
+    """Test a FAILED status makes play return None"""
+    client._context.mode = 'fail'
+    client.start()
+    assert await client.play(1, [], time.perf_counter()) is None
+    assert client.failed == 1
+    assert client.stats()["in_flight"] == 0
+
+@pytest.mark.asyncio
+async def test_play_after_worker_died_restarts_and_succeeds(client):
+    """Test the job that triggers a restart is not failed by it, and the old reader exits"""
+    client.start()
+    client._context.processes[0].kill()
+
+    finished = await client.play(1, [], time.perf_counter())
+
+    assert finished is not None
+    await asyncio.wait_for(finished, 1.0)
+    assert client.restarts == 1
+    assert len(client._context.processes) == 2
+    await wait_for(lambda: len(status_readers()) == 1)
+
+@pytest.mark.asyncio
+async def test_restart_fails_jobs_of_dead_worker(client):
+    """Test jobs waiting on a dead worker fail when it is restarted"""
+    client._context.mode = 'silent'
+    client.start()
+    pending = asyncio.create_task(client.play(1, [], time.perf_counter()))
+    await asyncio.sleep(0.05)
+    client._context.processes[0].kill()
+    client._context.mode = 'play'
+
+    assert await client.play(2, [], time.perf_counter()) is not None
+    assert await pending is None
+
+@pytest.mark.asyncio
+async def test_stop_from_executor_fails_pending_on_loop(client):
+    """Test stop in a thread hands pending futures back to the event loop"""
+    client._context.mode = 'silent'
+    client.start()
+    pending = asyncio.create_task(client.play(1, [], time.perf_counter()))
+    await asyncio.sleep(0.05)
+
+    await asyncio.get_running_loop().run_in_executor(None, client.stop)
+
+    assert await asyncio.wait_for(pending, 1.0) is None
+    await wait_for(lambda: not status_readers())
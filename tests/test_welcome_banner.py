@@ -0,0 +1,60 @@
+import asyncio
+import io
+import pytest
+from utils.welcome_banner import BannerJob, WelcomeBannerPipeline, render_banner, normalize_background, _base_layer, BANNER_SIZE
+
+PIL = pytest.importorskip("PIL")
+from PIL import Image
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+def test_render_reuses_base_layer():
+    """Test the guild layer is composed once and reused across joins"""
+    _base_layer.cache_clear()
+    first = render_banner(None, 0.0, "Welcome to ArabLife", "سارة", "Member #1")
+    second = render_banner(None, 0.0, "Welcome to ArabLife", "Sarah", "Member #2")
+
+    assert first.startswith(PNG_SIGNATURE)
+    assert second.startswith(PNG_SIGNATURE)
+    info = _base_layer.cache_info()
+    assert info.misses == 1
+    assert info.hits == 1
+
+def test_normalize_background_crops_to_banner():
+    """Test uploaded backgrounds are stored at banner size"""
+    source = io.BytesIO()
+    Image.new('RGB', (1920, 1080), (10, 20, 30)).save(source, format='JPEG')
+
+    png = normalize_background(source.getvalue())
+    assert Image.open(io.BytesIO(png)).size == BANNER_SIZE
+
+def test_normalize_background_rejects_non_images():
+    """Test non-image data raises instead of being stored"""
+    with pytest.raises(OSError):
+        normalize_background(b"<html>not an image</html>")
+
+@pytest.mark.asyncio
+async def test_full_queue_drops_jobs():
+    """Test a join raid can't queue more than the bound"""
+    pipeline = WelcomeBannerPipeline(workers=1, queue_size=2)
+    pipeline.start()
+    delivered = []
+    done = asyncio.Event()
+
+    async def deliver(png):
+        delivered.append(png)
+        if len(delivered) == 2:
+            done.set()
+
+    try:
+        accepted = [
+            pipeline.submit(BannerJob(None, "Welcome", f"member {i}", "", None, deliver))
+            for i in range(10)
+        ]
+        await asyncio.wait_for(done.wait(), timeout=30)
+    finally:
+        pipeline.stop()
+
+    assert accepted.count(True) == 2
+    assert pipeline.dropped == 8
+    assert all(png.startswith(PNG_SIGNATURE) for png in delivered)
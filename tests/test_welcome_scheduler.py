@@ -0,0 +1,91 @@
+import asyncio
+import pytest
+from utils.welcome_scheduler import WelcomeScheduler, POLICY_ONCE, POLICY_FINISH, POLICY_RESTART
+
+class FakePlayer:
+    """Records playback starts and finishes clips on demand"""
+
+    def __init__(self):
+        self.started = []
+        self.current = None
+
+    async def start(self, channel, received_at, context):
+        self.started.append(channel)
+        self.current = asyncio.get_running_loop().create_future()
+        return self.current
+
+    def finish(self):
+        self.current.set_result(None)
+
+@pytest.mark.asyncio
+async def test_first_join_plays_immediately():
+    """Test an idle channel plays without waiting for the debounce window"""
+    player = FakePlayer()
+    scheduler = WelcomeScheduler(player.start, debounce=10, max_delay=10)
+    scheduler.request(1)
+    await asyncio.sleep(0)
+    assert player.started == [1]
+    scheduler.cancel()
+
+@pytest.mark.asyncio
+async def test_once_policy_absorbs_joins_during_playback():
+    """Test joins during playback are coalesced under the once policy"""
+    player = FakePlayer()
+    scheduler = WelcomeScheduler(player.start, debounce=0.01, max_delay=0.01, policy=POLICY_ONCE)
+    scheduler.request(1)
+    await asyncio.sleep(0)
+    for _ in range(19):
+        scheduler.request(1)
+    player.finish()
+    await asyncio.sleep(0.05)
+
+    assert player.started == [1]
+    assert scheduler.played == 1
+    assert scheduler.coalesced == 19
+
+@pytest.mark.asyncio
+async def test_finish_policy_replays_once_after_clip():
+    """Test a burst during playback queues a single follow-up play"""
+    player = FakePlayer()
+    scheduler = WelcomeScheduler(player.start, debounce=0.01, max_delay=0.05, policy=POLICY_FINISH)
+    scheduler.request(1)
+    await asyncio.sleep(0)
+    for _ in range(19):
+        scheduler.request(1)
+    player.finish()
+    await asyncio.sleep(0.05)
+    player.finish()
+    await asyncio.sleep(0)
+
+    assert player.started == [1, 1]
+    assert scheduler.played == 2
+    assert scheduler.coalesced == 18
+
+@pytest.mark.asyncio
+async def test_max_queue_folds_extra_bursts():
+    """Test bursts beyond the queue depth merge into the last one"""
+    player = FakePlayer()
+    scheduler = WelcomeScheduler(player.start, debounce=0.001, max_delay=0.001, max_queue=1)
+    scheduler.request(1)
+    await asyncio.sleep(0)
+    for _ in range(3):
+        await asyncio.sleep(0.005)
+        scheduler.request(1)
+    assert scheduler.stats()["pending"] == {"1": 3}
+    scheduler.cancel()
+
+@pytest.mark.asyncio
+async def test_restart_policy_does_not_wait_for_clip():
+    """Test the restart policy starts a new burst without waiting"""
+    player = FakePlayer()
+    scheduler = WelcomeScheduler(player.start, debounce=0.01, max_delay=0.01, policy=POLICY_RESTART)
+    scheduler.request(1)
+    await asyncio.sleep(0)
+    scheduler.request(1)
+    await asyncio.sleep(0.05)
+    assert player.started == [1, 1]
+
+def test_invalid_policy():
+    """Test unknown policies are rejected"""
+    with pytest.raises(ValueError):
+        WelcomeScheduler(None, policy="sometimes")
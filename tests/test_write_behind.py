@@ -0,0 +1,91 @@
+import asyncio
+import aiosqlite
+import pytest
+import pytest_asyncio
+from cogs.role_commands import RoleCommands
+from utils.write_behind import WriteBehindBuffer
+
+class MockDatabase:
+    """Database exposing transaction() over an in-memory SQLite connection"""
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.transactions = 0
+        self.fail = False
+
+    def transaction(self):
+        db = self
+
+        class _Transaction:
+            async def __aenter__(self):
+                if db.fail:
+                    raise RuntimeError("database is locked")
+                db.transactions += 1
+                self.cursor = await db.connection.cursor()
+                return self.cursor
+
+            async def __aexit__(self, exc_type, exc, tb):
+                await db.connection.commit()
+                await self.cursor.close()
+
+        return _Transaction()
+
+@pytest_asyncio.fixture
+async def db():
+    async with aiosqlite.connect(":memory:") as connection:
+        with open("utils/schema.sql") as f:
+            await connection.executescript(f.read())
+        yield MockDatabase(connection)
+
+async def rows(db):
+    async with db.connection.execute("SELECT guild_id, user_id, role_id, assigned_by FROM user_roles ORDER BY user_id") as cursor:
+        return [tuple(row) for row in await cursor.fetchall()]
+
+@pytest.mark.asyncio
+async def test_add_remove_pairs_collapse(db):
+    """Test only the last change per key is written, in one transaction"""
+    buffer = WriteBehindBuffer(db, RoleCommands._write_role_changes, flush_interval=60)
+    buffer.put((1, 10, 5), (99, True))
+    buffer.put((1, 10, 5), (99, False))
+    buffer.put((1, 11, 5), (99, False))
+    buffer.put((1, 11, 5), (98, True))
+    await buffer.flush()
+
+    assert await rows(db) == [(1, 11, 5, 98)]
+    assert db.transactions == 1
+    assert buffer.collapsed == 2
+    assert buffer.written == 2
+
+@pytest.mark.asyncio
+async def test_full_batch_flushes_early(db):
+    """Test reaching max_batch flushes without waiting for the interval"""
+    buffer = WriteBehindBuffer(db, RoleCommands._write_role_changes, flush_interval=60, max_batch=3)
+    buffer.start()
+    try:
+        for user_id in range(3):
+            buffer.put((1, user_id, 5), (99, True))
+        for _ in range(50):
+            if buffer.flushes:
+                break
+            await asyncio.sleep(0.01)
+    finally:
+        await buffer.close()
+
+    assert buffer.flushes == 1
+    assert len(await rows(db)) == 3
+
+@pytest.mark.asyncio
+async def test_failed_batch_is_kept_and_flushed_on_close(db):
+    """Test a failed write keeps records, with newer changes winning"""
+    buffer = WriteBehindBuffer(db, RoleCommands._write_role_changes, flush_interval=60)
+    buffer.put((1, 10, 5), (99, True))
+    buffer.put((1, 11, 5), (99, True))
+    db.fail = True
+    await buffer.flush()
+    assert buffer.stats()["queue_depth"] == 2
+
+    db.fail = False
+    buffer.put((1, 11, 5), (99, False))
+    await buffer.close()
+    assert await rows(db) == [(1, 10, 5, 99)]
+    assert buffer.failures == 1
@@ -0,0 +1,220 @@
+import asyncio
+import io
+import logging
+import time
+from typing import Any, Callable, Dict, Optional
+from urllib.parse import parse_qs, urlparse
+
+import discord
+
+logger = logging.getLogger('discord')
+
+def url_expiry(url: str) -> Optional[float]:
+    """Get the unix time a signed Discord CDN URL expires, if it has one
+
+    Attachment URLs carry an ``ex`` query parameter holding the expiry as a
+    hex timestamp.
+    """
+    values = parse_qs(urlparse(url).query).get('ex')
+    if not values:
+        return None
+    try:
+        return float(int(values[0], 16))
+    except ValueError:
+        return None
+
+def _read_file(path: str) -> bytes:
+    with open(path, 'rb') as f:
+        return f.read()
+
+class _CachedAsset:
+    __slots__ = ('path', 'data', 'url', 'expires', 'source', 'source_id', 'lock')
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.data: Optional[bytes] = None
+        self.url: Optional[str] = None
+        self.expires: Optional[float] = None
+        # Message holding the uploaded file, its URL is refreshed from there
+        self.source: Optional[discord.abc.Messageable] = None
+        self.source_id: Optional[int] = None
+        self.lock = asyncio.Lock()
+
+class AttachmentCache:
+    """Uploads embed images once and reuses the CDN URL afterwards
+
+    Each asset is uploaded once as an attachment, to the storage channel
+    when one is set or otherwise with the first embed that needs it. The
+    message holding the upload is remembered: later embeds point at its CDN
+    URL, a URL close to its signed expiry is refreshed by fetching that
+    message again, and deleting the message drops the URL so the next send
+    uploads a new copy. File bytes are read once and kept in memory for
+    re-uploads.
+
+    Attributes:
+        refresh_margin: Seconds before URL expiry to stop reusing it
+        storage: Returns the channel uploads go to, None to upload with the embed
+        _assets: Cached asset state by attachment filename
+    """
+
+    def __init__(self, refresh_margin: float = 3600.0,
+                 storage: Optional[Callable[[], Optional[discord.abc.Messageable]]] = None) -> None:
+        self.refresh_margin = refresh_margin
+        self.storage = storage
+        self._assets: Dict[str, _CachedAsset] = {}
+        self.uploads = 0
+        self.reuses = 0
+        self.refreshes = 0
+        self.source_deletes = 0
+        self.reupload_failures = 0
+
+    def register(self, name: str, path: str) -> None:
+        """Register a file to be sent as attachment ``name``"""
+        asset = self._assets.get(name)
+        if asset is None or asset.path != path:
+            self._assets[name] = _CachedAsset(path)
+
+    def invalidate(self, name: str) -> None:
+        """Forget the cached URL so the next send refreshes or uploads it"""
+        asset = self._assets.get(name)
+        if asset:
+            asset.url = None
+            asset.expires = None
+
+    def message_deleted(self, message_id: int) -> None:
+        """Forget assets whose upload lived in a deleted message"""
+        for name, asset in self._assets.items():
+            if asset.source_id == message_id:
+                logger.info(f"Message holding attachment {name} was deleted, uploading it again on next send")
+                self.source_deletes += 1
+                self._forget_source(asset)
+
+    @staticmethod
+    def _forget_source(asset: _CachedAsset) -> None:
+        asset.url = None
+        asset.expires = None
+        asset.source = None
+        asset.source_id = None
+
+    def _valid_url(self, asset: _CachedAsset) -> Optional[str]:
+        if asset.url and (asset.expires is None or asset.expires - self.refresh_margin > time.time()):
+            return asset.url
+        return None
+
+    async def _read(self, asset: _CachedAsset) -> bytes:
+        if asset.data is None:
+            loop = asyncio.get_running_loop()
+            asset.data = await loop.run_in_executor(None, _read_file, asset.path)
+        return asset.data
+
+    async def send(self, channel: discord.abc.Messageable, name: str, embed: discord.Embed, **kwargs: Any) -> discord.Message:
+        """Send an embed using the asset as its image
+
+        Args:
+            channel: Where to send the embed
+            name: Registered attachment filename
+            embed: Embed to send, its image is set here
+            **kwargs: Passed on to ``channel.send``
+
+        Raises:
+            KeyError: If the asset was never registered
+            OSError: If the asset file cannot be read
+            discord.HTTPException: If uploading the asset fails
+        """
+        asset = self._assets[name]
+
+        url = self._valid_url(asset)
+        if url is None:
+            # One refresh or upload per asset, concurrent senders wait and reuse its URL
+            async with asset.lock:
+                url = self._valid_url(asset) or await self._refresh(name, asset)
+                if url is None:
+                    storage = self.storage() if self.storage else None
+                    if storage is not None:
+                        url = await self._store(storage, name, asset)
+                    if url is None:
+                        # No storage channel, the embed's own message holds the upload
+                        return await self._upload(channel, name, asset, embed=embed, **kwargs)
+
+        embed.set_image(url=url)
+        try:
+            message = await channel.send(embed=embed, **kwargs)
+        except discord.HTTPException as e:
+            if e.status >= 500 or isinstance(e, discord.Forbidden):
+                raise
+            # Discord rejected the URL, upload a fresh copy instead
+            logger.warning(f"Cached attachment URL for {name} rejected ({e}), re-uploading")
+            self.reupload_failures += 1
+            async with asset.lock:
+                self._forget_source(asset)
+                return await self._upload(channel, name, asset, embed=embed, **kwargs)
+        self.reuses += 1
+        return message
+
+    async def _refresh(self, name: str, asset: _CachedAsset) -> Optional[str]:
+        """Get a newly signed URL by fetching the message holding the upload"""
+        if asset.source is None or asset.source_id is None:
+            return None
+        try:
+            message = await asset.source.fetch_message(asset.source_id)
+        except discord.NotFound:
+            logger.info(f"Message holding attachment {name} is gone, uploading it again")
+            self.source_deletes += 1
+            self._forget_source(asset)
+            return None
+        except discord.HTTPException as e:
+            logger.warning(f"Could not refresh attachment URL for {name} ({e}), uploading it again")
+            return None
+        self._remember(asset, message)
+        url = self._valid_url(asset)
+        if url:
+            self.refreshes += 1
+        return url
+
+    async def _store(self, storage: discord.abc.Messageable, name: str, asset: _CachedAsset) -> Optional[str]:
+        """Upload the asset to the storage channel and return its URL"""
+        data = await self._read(asset)
+        message = await storage.send(file=discord.File(io.BytesIO(data), filename=name))
+        self.uploads += 1
+        self._remember(asset, message)
+        return asset.url
+
+    async def _upload(self, channel: discord.abc.Messageable, name: str, asset: _CachedAsset, embed: discord.Embed, **kwargs: Any) -> discord.Message:
+        """Send the embed with the asset attached, that message becomes the upload's home"""
+        data = await self._read(asset)
+        embed.set_image(url=f"attachment://{name}")
+        message = await channel.send(embed=embed, file=discord.File(io.BytesIO(data), filename=name), **kwargs)
+        self.uploads += 1
+        self._remember(asset, message)
+        return message
+
+    @staticmethod
+    def _remember(asset: _CachedAsset, message: discord.Message) -> None:
+        url = None
+        if message.attachments:
+            url = message.attachments[0].url
+        elif message.embeds and message.embeds[0].image:
+            url = message.embeds[0].image.url
+        asset.source = message.channel
+        asset.source_id = message.id
+        asset.url = url
+        asset.expires = url_expiry(url) if url else None
+
+    def stats(self) -> Dict[str, Any]:
+        """Get attachment cache metrics"""
+        now = time.time()
+        return {
+            "assets": {
+                name: {
+                    "cached": self._valid_url(asset) is not None,
+                    "bytes": len(asset.data) if asset.data is not None else None,
+                    "expires_in": round(asset.expires - now) if asset.expires else None
+                }
+                for name, asset in self._assets.items()
+            },
+            "uploads": self.uploads,
+            "reuses": self.reuses,
+            "refreshes": self.refreshes,
+            "source_deletes": self.source_deletes,
+            "reupload_failures": self.reupload_failures
+        }
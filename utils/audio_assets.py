@@ -0,0 +1,195 @@
+import asyncio
+import logging
+import os
+import re
+from typing import Any, Dict, Iterable, Optional
+
+from utils.audio_cache import OpusClip, OpusClipCache, AudioCacheError
+
+logger = logging.getLogger('discord')
+
+SUPPORTED_EXTENSIONS = ('.mp3', '.ogg', '.opus', '.wav', '.flac', '.m4a')
+DEFAULT_KEY = 'default'
+
+# Clip file names in the sound directory: default.mp3, channel_<id>.mp3, role_<id>.mp3
+_KEY_PATTERN = re.compile(r'^(default|channel_\d+|role_\d+)$')
+
+class AudioAsset:
+    """Validated sound file metadata
+
+    Attributes:
+        key: Catalog key (``default``, ``channel_<id>`` or ``role_<id>``)
+        path: Absolute file path
+        size: File size in bytes
+        mtime: Last modification time, used to detect changes
+    """
+
+    __slots__ = ('key', 'path', 'size', 'mtime')
+
+    def __init__(self, key: str, path: str, size: int, mtime: float) -> None:
+        self.key = key
+        self.path = path
+        self.size = size
+        self.mtime = mtime
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"path": self.path, "size": self.size, "mtime": self.mtime}
+
+def _stat_asset(key: str, path: str) -> Optional[AudioAsset]:
+    """Validate a sound file and read its metadata (blocking)"""
+    path = os.path.abspath(path)
+    try:
+        stat = os.stat(path)
+    except OSError:
+        logger.error(f"Welcome sound file not found: {path}")
+        return None
+    if not os.access(path, os.R_OK):
+        logger.error(f"Welcome sound file not readable: {path}")
+        return None
+    if stat.st_size == 0:
+        logger.error(f"Welcome sound file is empty: {path}")
+        return None
+    return AudioAsset(key, path, stat.st_size, stat.st_mtime)
+
+def scan_assets(default_path: Optional[str], directory: Optional[str]) -> Dict[str, AudioAsset]:
+    """Collect valid sound files keyed by catalog key (blocking)
+
+    Files in the directory take precedence over the single default path.
+    """
+    assets: Dict[str, AudioAsset] = {}
+    if default_path:
+        asset = _stat_asset(DEFAULT_KEY, default_path)
+        if asset:
+            assets[DEFAULT_KEY] = asset
+
+    if directory and os.path.isdir(directory):
+        for name in sorted(os.listdir(directory)):
+            key, ext = os.path.splitext(name)
+            if ext.lower() not in SUPPORTED_EXTENSIONS or not _KEY_PATTERN.match(key):
+                continue
+            asset = _stat_asset(key, os.path.join(directory, name))
+            if asset:
+                assets[key] = asset
+    return assets
+
+class AudioAssetCatalog:
+    """Catalog of welcome clips with cached metadata and hot reload
+
+    Files are validated once and their metadata cached, so playback does no
+    filesystem work on the event loop. A watcher polls file mtimes in the
+    executor and hot-swaps changed clips without a restart. Decoded clips
+    live in an LRU-bounded ``OpusClipCache``.
+
+    Attributes:
+        default_path: Single welcome sound used when nothing more specific matches
+        directory: Optional directory of ``default``/``channel_<id>``/``role_<id>`` clips
+        watch_interval: Seconds between mtime polls (0 disables watching)
+        cache: Decoded clip cache
+    """
+
+    def __init__(
+        self,
+        cache: OpusClipCache,
+        default_path: Optional[str] = None,
+        directory: Optional[str] = None,
+        watch_interval: float = 5.0
+    ) -> None:
+        self.cache = cache
+        self.default_path = default_path
+        self.directory = directory
+        self.watch_interval = watch_interval
+        self._assets: Dict[str, AudioAsset] = {}
+        self._watch_task: Optional[asyncio.Task] = None
+        self.reloads = 0
+
+    async def load(self, preload: bool = True) -> None:
+        """Scan sound files and optionally decode the default clip"""
+        await self._rescan()
+        logger.info(f"Loaded {len(self._assets)} welcome sound(s)")
+        if preload and DEFAULT_KEY in self._assets:
+            try:
+                await self.cache.get(self._assets[DEFAULT_KEY].path)
+            except AudioCacheError as e:
+                logger.error(f"Failed to pre-encode welcome sound: {e}")
+
+    def start(self) -> None:
+        """Start watching files for changes"""
+        if self.watch_interval > 0 and (self._watch_task is None or self._watch_task.done()):
+            self._watch_task = asyncio.create_task(self._watch())
+
+    def stop(self) -> None:
+        """Stop watching files"""
+        if self._watch_task:
+            self._watch_task.cancel()
+            self._watch_task = None
+
+    async def _watch(self) -> None:
+        """Poll file metadata and hot-swap changed clips"""
+        while True:
+            await asyncio.sleep(self.watch_interval)
+            try:
+                await self._rescan()
+            except Exception as e:
+                logger.error(f"Error watching welcome sounds: {e}")
+
+    async def _rescan(self) -> None:
+        """Re-stat files off the loop and apply any changes"""
+        loop = asyncio.get_running_loop()
+        assets = await loop.run_in_executor(None, scan_assets, self.default_path, self.directory)
+
+        for key, old in self._assets.items():
+            new = assets.get(key)
+            if new is None or new.path != old.path:
+                logger.info(f"Welcome sound removed: {old.path}")
+                self.cache.invalidate(old.path)
+
+        for key, new in assets.items():
+            old = self._assets.get(key)
+            if old is None or old.path != new.path:
+                continue
+            if (new.mtime, new.size) != (old.mtime, old.size):
+                logger.info(f"Welcome sound changed, reloading: {new.path}")
+                self.reloads += 1
+                if new.path in self.cache:
+                    # Keep serving the old clip until the new one is built
+                    asyncio.create_task(self._refresh(new.path))
+
+        self._assets = assets
+
+    async def _refresh(self, path: str) -> None:
+        try:
+            await self.cache.refresh(path)
+        except AudioCacheError as e:
+            logger.error(f"Failed to reload welcome sound: {e}")
+            self.cache.invalidate(path)
+
+    def resolve(self, channel_id: Optional[int] = None, role_ids: Iterable[int] = ()) -> Optional[AudioAsset]:
+        """Pick the clip for a join: role first, then channel, then default"""
+        for role_id in role_ids:
+            asset = self._assets.get(f'role_{role_id}')
+            if asset:
+                return asset
+        if channel_id is not None:
+            asset = self._assets.get(f'channel_{channel_id}')
+            if asset:
+                return asset
+        return self._assets.get(DEFAULT_KEY)
+
+    async def get_clip(self, channel_id: Optional[int] = None, role_ids: Iterable[int] = ()) -> Optional[OpusClip]:
+        """Get the decoded clip for a join
+
+        Raises:
+            AudioCacheError: If the clip cannot be built
+        """
+        asset = self.resolve(channel_id, role_ids)
+        if asset is None:
+            return None
+        return await self.cache.get(asset.path)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get catalog metrics"""
+        return {
+            "assets": {key: asset.to_dict() for key, asset in self._assets.items()},
+            "reloads": self.reloads,
+            "cache": self.cache.stats()
+        }
@@ -0,0 +1,226 @@
+import asyncio
+import logging
+import subprocess
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+
+import discord
+from discord.opus import Encoder as OpusEncoder
+
+from utils.loudness import LoudnessProfile
+
+logger = logging.getLogger('discord')
+
+class AudioCacheError(Exception):
+    """Exception raised when a clip cannot be decoded or encoded"""
+    pass
+
+class OpusClip:
+    """A sound clip decoded and Opus-encoded once, held in memory
+
+    Attributes:
+        path: Source file the clip was built from
+        frames: Encoded 20ms Opus packets, in playback order
+        size: Total number of encoded bytes held by the clip
+    """
+
+    def __init__(self, path: str, frames: List[bytes]) -> None:
+        self.path = path
+        self.frames = frames
+        self.size = sum(len(frame) for frame in frames)
+
+    @property
+    def duration(self) -> float:
+        """Clip length in seconds"""
+        return len(self.frames) * OpusEncoder.FRAME_LENGTH / 1000
+
+    def source(self, on_first_frame: Optional[Callable[[], None]] = None) -> 'CachedOpusAudio':
+        """Create a new playable source over the cached frames"""
+        return CachedOpusAudio(self.frames, on_first_frame)
+
+class CachedOpusAudio(discord.AudioSource):
+    """Audio source that replays pre-encoded Opus frames
+
+    No FFmpeg process is spawned and no encoding happens at playback time,
+    the voice client sends the cached packets as-is.
+
+    Attributes:
+        on_first_frame: Called from the player thread just before the first
+            packet is handed to the voice client
+    """
+
+    def __init__(self, frames: List[bytes], on_first_frame: Optional[Callable[[], None]] = None) -> None:
+        self._frames = frames
+        self._index = 0
+        self.on_first_frame = on_first_frame
+
+    def read(self) -> bytes:
+        if self._index >= len(self._frames):
+            return b''
+        if self._index == 0 and self.on_first_frame is not None:
+            try:
+                self.on_first_frame()
+            except Exception as e:
+                logger.error(f"Error in first frame callback: {e}")
+        frame = self._frames[self._index]
+        self._index += 1
+        return frame
+
+    def is_opus(self) -> bool:
+        return True
+
+def decode_pcm(path: str, executable: str = 'ffmpeg') -> bytes:
+    """Decode a sound file to 48kHz stereo 16-bit PCM
+
+    Mono input is duplicated onto both channels, matching the filter chain
+    previously used for live playback.
+
+    Raises:
+        AudioCacheError: If FFmpeg fails or produces no audio
+    """
+    args = [
+        executable,
+        '-hide_banner',
+        '-loglevel', 'error',
+        '-i', path,
+        '-f', 's16le',
+        '-ar', str(OpusEncoder.SAMPLING_RATE),
+        '-ac', str(OpusEncoder.CHANNELS),
+        'pipe:1',
+    ]
+    try:
+        result = subprocess.run(args, stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=False)
+    except OSError as e:
+        raise AudioCacheError(f"Failed to run FFmpeg at {executable}: {e}") from e
+
+    if result.returncode != 0:
+        stderr = result.stderr.decode(errors='replace').strip()
+        raise AudioCacheError(f"FFmpeg failed to decode {path}: {stderr}")
+    if not result.stdout:
+        raise AudioCacheError(f"FFmpeg produced no audio for {path}")
+    return result.stdout
+
+def encode_frames(pcm: bytes) -> List[bytes]:
+    """Split PCM into 20ms frames and Opus-encode each one
+
+    The last frame is padded with silence so every packet has a full frame.
+    """
+    encoder = OpusEncoder()
+    frame_size = OpusEncoder.FRAME_SIZE
+    frames = []
+    for offset in range(0, len(pcm), frame_size):
+        chunk = pcm[offset:offset + frame_size]
+        if len(chunk) < frame_size:
+            chunk = chunk + b'\x00' * (frame_size - len(chunk))
+        frames.append(encoder.encode(chunk, OpusEncoder.SAMPLES_PER_FRAME))
+    return frames
+
+def build_clip(path: str, executable: str = 'ffmpeg', loudness: Optional[LoudnessProfile] = None) -> OpusClip:
+    """Decode, normalize and encode a sound file into an in-memory clip (blocking)
+
+    The gain is baked into the PCM before encoding, so playback does no
+    per-frame volume math.
+    """
+    pcm = decode_pcm(path, executable)
+    if loudness is not None:
+        pcm = loudness.apply(pcm)
+    frames = encode_frames(pcm)
+    clip = OpusClip(path, frames)
+    logger.info(f"Cached {path}: {len(frames)} frames, {clip.size} bytes")
+    return clip
+
+class OpusClipCache:
+    """LRU cache of pre-encoded clips keyed by file path
+
+    Clips are built in the default executor on first use so the event loop
+    never blocks on FFmpeg or the encoder. Concurrent requests for the same
+    clip share one build. Least recently used clips are evicted once the
+    encoded bytes held exceed ``max_bytes`` (0 means unbounded).
+    """
+
+    def __init__(self, executable: str = 'ffmpeg', loudness: Optional[LoudnessProfile] = None, max_bytes: int = 0) -> None:
+        self.executable = executable
+        self.loudness = loudness
+        self.max_bytes = max_bytes
+        self._clips: 'OrderedDict[str, OpusClip]' = OrderedDict()
+        self._pending: Dict[str, asyncio.Future] = {}
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    async def get(self, path: str) -> OpusClip:
+        """Get a cached clip, building it if needed
+
+        Raises:
+            AudioCacheError: If the clip cannot be built
+        """
+        clip = self._clips.get(path)
+        if clip is not None:
+            self._clips.move_to_end(path)
+            self.hits += 1
+            return clip
+
+        self.misses += 1
+        pending = self._pending.get(path)
+        if pending is None:
+            pending = self._build(path)
+        return await asyncio.shield(pending)
+
+    async def refresh(self, path: str) -> OpusClip:
+        """Rebuild a clip, keeping the old one in service until the new one is ready
+
+        Raises:
+            AudioCacheError: If the clip cannot be built
+        """
+        return await asyncio.shield(self._build(path))
+
+    def _build(self, path: str) -> asyncio.Future:
+        """Start a build in the executor"""
+        loop = asyncio.get_running_loop()
+        pending = loop.run_in_executor(None, build_clip, path, self.executable, self.loudness)
+        pending.add_done_callback(lambda future, path=path: self._on_built(path, future))
+        self._pending[path] = pending
+        return pending
+
+    def _on_built(self, path: str, future: asyncio.Future) -> None:
+        """Store a finished build, leaving failures to be retried"""
+        if self._pending.get(path) is future:
+            del self._pending[path]
+        if future.cancelled() or future.exception() is not None:
+            return
+
+        self.invalidate(path)
+        clip = future.result()
+        self._clips[path] = clip
+        self._bytes += clip.size
+
+        # Evict least recently used clips, always keeping the newest one
+        while self.max_bytes and self._bytes > self.max_bytes and len(self._clips) > 1:
+            _, evicted = self._clips.popitem(last=False)
+            self._bytes -= evicted.size
+            self.evictions += 1
+
+    def invalidate(self, path: Optional[str] = None) -> None:
+        """Drop one cached clip, or all of them"""
+        if path is None:
+            self._clips.clear()
+            self._bytes = 0
+            return
+        clip = self._clips.pop(path, None)
+        if clip is not None:
+            self._bytes -= clip.size
+
+    def __contains__(self, path: str) -> bool:
+        return path in self._clips
+
+    def stats(self) -> Dict[str, Any]:
+        """Get cache metrics"""
+        return {
+            "clips": len(self._clips),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions
+        }
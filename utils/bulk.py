@@ -0,0 +1,105 @@
+import asyncio
+import logging
+import re
+import time
+from typing import Any, Awaitable, Callable, Generic, Iterable, List, Optional, Sequence, Tuple, TypeVar
+
+logger = logging.getLogger('discord')
+
+T = TypeVar('T')
+
+_ID_PATTERN = re.compile(r'\d{15,20}')
+
+def parse_ids(text: Optional[str]) -> List[int]:
+    """Pull user IDs out of mentions or raw IDs, keeping order and dropping duplicates"""
+    if not text:
+        return []
+    return list(dict.fromkeys(int(match) for match in _ID_PATTERN.findall(text)))
+
+def chunked(items: Sequence[T], size: int) -> List[Sequence[T]]:
+    """Split a sequence into consecutive chunks of at most ``size`` items"""
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+class BulkResult(Generic[T]):
+    """Outcome of a bulk run
+
+    Attributes:
+        total: Number of items submitted
+        succeeded: Items the action completed for
+        skipped: Items the action chose not to touch
+        failed: Items that raised, with the error message
+        elapsed: Wall time of the run in seconds
+    """
+
+    def __init__(self, total: int) -> None:
+        self.total = total
+        self.succeeded: List[T] = []
+        self.skipped: List[T] = []
+        self.failed: List[Tuple[T, str]] = []
+        self.elapsed = 0.0
+
+    @property
+    def done(self) -> int:
+        return len(self.succeeded) + len(self.skipped) + len(self.failed)
+
+async def run_bulk(
+    items: Iterable[T],
+    action: Callable[[T], Awaitable[bool]],
+    concurrency: int = 5,
+    on_progress: Optional[Callable[[BulkResult[T]], Awaitable[Any]]] = None,
+    progress_interval: float = 2.0
+) -> BulkResult[T]:
+    """Run an action over many items with bounded concurrency
+
+    discord.py already waits out per-route rate limits, the semaphore keeps
+    us from queueing hundreds of requests behind the same bucket at once.
+    Progress is reported at most every ``progress_interval`` seconds and once
+    more at the end, so callers can edit a single status message.
+
+    Args:
+        items: Items to process
+        action: Coroutine returning True when it did something, False to skip
+        concurrency: Maximum actions in flight
+        on_progress: Called with the partial result while running
+        progress_interval: Seconds between progress reports
+
+    Returns:
+        Per-item outcome; exceptions from ``action`` are recorded, not raised
+    """
+    items = list(items)
+    result: BulkResult[T] = BulkResult(len(items))
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    started = time.perf_counter()
+
+    async def run_one(item: T) -> None:
+        async with semaphore:
+            try:
+                if await action(item):
+                    result.succeeded.append(item)
+                else:
+                    result.skipped.append(item)
+            except Exception as e:
+                result.failed.append((item, str(e) or type(e).__name__))
+
+    async def report() -> None:
+        try:
+            await on_progress(result)
+        except Exception as e:
+            logger.warning(f"Failed to report bulk progress: {e}")
+
+    async def report_periodically() -> None:
+        while True:
+            await asyncio.sleep(progress_interval)
+            result.elapsed = time.perf_counter() - started
+            await report()
+
+    reporter = asyncio.create_task(report_periodically()) if on_progress else None
+    try:
+        await asyncio.gather(*(run_one(item) for item in items))
+    finally:
+        if reporter:
+            reporter.cancel()
+    result.elapsed = time.perf_counter() - started
+    if on_progress:
+        await report()
+    return result
@@ -1,58 +1,356 @@
 import aiosqlite
+import asyncio
 import logging
 import os
-from typing import Optional, Any, AsyncContextManager
+import time
+from typing import Optional, Any, AsyncContextManager, Dict, List, Sequence
 from contextlib import asynccontextmanager
+from config import Config
+from utils.metrics import Histogram
+from utils.migrations import SCHEMA_VERSION, migrate
+from utils.query_stats import InstrumentedCursor, QueryStats
 
 logger = logging.getLogger('discord')
 
+# Waits are short unless the pool is exhausted, so resolve the low end finely
+WAIT_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+
+# Statements per group commit
+BATCH_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+# Connection settings per performance profile. journal_mode is stored in the
+# file and set by the writer; the rest apply to every connection.
+#   durable:    rollback journal, fsync on every commit (readers briefly wait on commits)
+#   balanced:   WAL, fsync at checkpoints only; a power loss can drop the last commits but never corrupts
+#   throughput: WAL without fsync and large caches; an OS crash or power loss can corrupt the file
+PROFILES: Dict[str, Dict[str, Any]] = {
+    'durable': {
+        'journal_mode': 'DELETE',
+        'synchronous': 'FULL',
+        'mmap_size': 0,
+        'cache_size': -2000,
+        'temp_store': 'DEFAULT',
+        'busy_timeout': 10000
+    },
+    'balanced': {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'mmap_size': 64 * 1024 * 1024,
+        'cache_size': -16000,
+        'temp_store': 'MEMORY',
+        'busy_timeout': 5000
+    },
+    'throughput': {
+        'journal_mode': 'WAL',
+        'synchronous': 'OFF',
+        'mmap_size': 256 * 1024 * 1024,
+        'cache_size': -64000,
+        'temp_store': 'MEMORY',
+        'busy_timeout': 5000
+    }
+}
+
+class _QueuedWrite:
+    """A statement waiting for the next group commit"""
+
+    __slots__ = ('sql', 'params', 'many', 'future')
+
+    def __init__(self, sql: str, params: Sequence[Any], many: bool, future: asyncio.Future) -> None:
+        self.sql = sql
+        self.params = params
+        self.many = many
+        self.future = future
+
 class Database:
-    """Database handler class"""
-    
-    def __init__(self):
-        self.db_path = os.path.join('data', 'bot.db')
+    """Database handler class
+
+    One writer connection and a pool of read-only connections.
+    ``transaction()`` serializes writes on the writer; ``read()`` hands out
+    an idle reader, so in WAL mode reads see the last committed state
+    without queuing behind a write in progress. Pragmas come from one of
+    ``PROFILES``.
+
+    Small independent writes can go through ``submit()`` instead: they are
+    queued and committed together every ``group_interval`` seconds, or
+    once ``group_max`` are waiting, so many writers share one fsync. Each
+    statement runs under its own SAVEPOINT, a failing one is rolled back
+    alone and its error raised to its caller only.
+
+    Cursors from ``transaction()`` and ``read()`` time every statement
+    into ``queries``, which keeps per-statement latency, rows, a slow-query
+    log and captured query plans.
+
+    Attributes:
+        db_path: SQLite file path
+        readers: Number of read-only connections
+        profile: Name of the performance profile
+        group_interval: Seconds a submitted write may wait for others
+        group_max: Queued writes that trigger an immediate commit
+        migration_batch: Rows copied per commit when upgrading the schema
+        queries: Per-statement metrics
+    """
+
+    def __init__(
+        self,
+        db_path: str = os.path.join('data', 'bot.db'),
+        readers: int = Config.DB_READERS,
+        profile: str = Config.DB_PROFILE,
+        group_interval: float = Config.DB_GROUP_COMMIT_MS / 1000,
+        group_max: int = Config.DB_GROUP_COMMIT_MAX,
+        migration_batch: int = Config.DB_MIGRATION_BATCH,
+        slow_query: float = Config.DB_SLOW_QUERY_MS / 1000
+    ):
+        self.db_path = db_path
+        self.readers = max(1, readers)
+        self.profile = profile
+        self.group_interval = group_interval
+        self.group_max = max(1, group_max)
+        self.migration_batch = migration_batch
+        self.queries = QueryStats(slow_threshold=slow_query, max_statements=Config.DB_QUERY_STATS_MAX)
+        self._queue: List[_QueuedWrite] = []
+        self._queued = asyncio.Event()
+        self._queue_full = asyncio.Event()
+        self._committer: Optional[asyncio.Task] = None
+        self._closing = False
         self._connection: Optional[aiosqlite.Connection] = None
-        
+        self._readers: List[aiosqlite.Connection] = []
+        self._idle_readers: Optional[asyncio.Queue] = None
+        self._write_lock = asyncio.Lock()
+        self.read_wait = Histogram(WAIT_BUCKETS)
+        self.write_wait = Histogram(WAIT_BUCKETS)
+        self.write_time = Histogram()
+        self.group_size = Histogram(BATCH_BUCKETS)
+        self.group_commit_time = Histogram()
+        self.groups = 0
+        self.grouped_writes = 0
+        self.grouped_errors = 0
+
     async def init(self):
-        """Initialize database connection and tables"""
+        """Initialize database connection and tables
+
+        Raises:
+            ValueError: If the profile is unknown
+        """
+        if self.profile not in PROFILES:
+            raise ValueError(f"Unknown database profile: {self.profile}")
+
         # Ensure data directory exists
-        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
-        
-        # Create initial connection
+        os.makedirs(os.path.dirname(self.db_path) or '.', exist_ok=True)
+
+        # Create the writer connection
         self._connection = await aiosqlite.connect(self.db_path)
         self._connection.row_factory = aiosqlite.Row
-        
+
+        # Let the compaction job hand freed pages back with incremental_vacuum.
+        # Existing files only switch modes after a one-off full VACUUM.
+        async with self._connection.execute("PRAGMA auto_vacuum") as cursor:
+            auto_vacuum = (await cursor.fetchone())[0]
+        if auto_vacuum != 2:
+            await self._connection.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            async with self._connection.execute("SELECT COUNT(*) FROM sqlite_master") as cursor:
+                existing = (await cursor.fetchone())[0]
+            if existing:
+                logger.info("Converting database to incremental auto-vacuum")
+                await self._connection.execute("VACUUM")
+
+        settings = PROFILES[self.profile]
+        await self._connection.execute(f"PRAGMA journal_mode = {settings['journal_mode']}")
+        await self._apply_pragmas(self._connection)
+
+        # Convert older files before creating anything the new layout adds
+        version = await migrate(self._connection, self.migration_batch)
+
         # Initialize schema
         try:
             with open('utils/schema.sql') as f:
                 await self._connection.executescript(f.read())
+            if version < SCHEMA_VERSION:
+                await self._connection.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
             await self._connection.commit()
         except Exception as e:
             logger.error(f"Failed to initialize database schema: {e}")
             raise
-            
-        logger.info("Database initialized successfully")
-        
+
+        # Open the read-only pool once the schema exists
+        self._idle_readers = asyncio.Queue()
+        for _ in range(self.readers):
+            reader = await aiosqlite.connect(f"file:{os.path.abspath(self.db_path)}?mode=ro", uri=True)
+            reader.row_factory = aiosqlite.Row
+            await self._apply_pragmas(reader)
+            self._readers.append(reader)
+            self._idle_readers.put_nowait(reader)
+
+        self._committer = asyncio.create_task(self._run_group_commits())
+
+        logger.info(f"Database initialized successfully ({self.readers} readers, {self.profile} profile)")
+
+    async def _apply_pragmas(self, connection: aiosqlite.Connection) -> None:
+        """Apply the per-connection settings of the profile"""
+        settings = PROFILES[self.profile]
+        for name in ('synchronous', 'mmap_size', 'cache_size', 'temp_store', 'busy_timeout'):
+            await connection.execute(f"PRAGMA {name} = {settings[name]}")
+
     async def close(self):
-        """Close database connection"""
+        """Close database connections"""
+        if self._committer:
+            # Let the committer finish the current group, then commit what is left
+            self._closing = True
+            self._queued.set()
+            await asyncio.gather(self._committer, return_exceptions=True)
+            await self._commit_group()
+            self._committer = None
+            self._closing = False
+        for reader in self._readers:
+            await reader.close()
+        self._readers = []
+        self._idle_readers = None
         if self._connection:
             await self._connection.close()
             self._connection = None
-            
+
     @asynccontextmanager
     async def transaction(self) -> AsyncContextManager[aiosqlite.Cursor]:
-        """Get a database cursor within a transaction"""
+        """Get a database cursor within a transaction on the writer connection"""
         if not self._connection:
             raise RuntimeError("Database not initialized")
-            
-        async with self._connection.cursor() as cursor:
+
+        start = time.perf_counter()
+        async with self._write_lock:
+            acquired = time.perf_counter()
+            self.write_wait.observe(acquired - start)
             try:
-                yield cursor
-                await self._connection.commit()
-            except Exception:
-                await self._connection.rollback()
+                async with self._connection.cursor() as cursor:
+                    try:
+                        yield InstrumentedCursor(cursor, self._connection, self.queries)
+                        await self._connection.commit()
+                    except BaseException:
+                        await self._connection.rollback()
+                        raise
+            finally:
+                self.write_time.observe(time.perf_counter() - acquired)
+
+    async def submit(self, sql: str, params: Sequence[Any] = (), many: bool = False) -> int:
+        """Queue a write for the next group commit and wait until it is committed
+
+        Args:
+            sql: Statement to run
+            params: Statement parameters, or a sequence of them with ``many``
+            many: Run the statement with ``executemany``
+
+        Returns:
+            Number of rows the statement changed
+
+        Raises:
+            RuntimeError: If the database isn't initialized
+            Exception: Whatever the statement or the commit raised
+        """
+        if not self._committer:
+            raise RuntimeError("Database not initialized")
+        future = asyncio.get_running_loop().create_future()
+        self._queue.append(_QueuedWrite(sql, params, many, future))
+        self._queued.set()
+        if len(self._queue) >= self.group_max:
+            self._queue_full.set()
+        return await future
+
+    async def _run_group_commits(self) -> None:
+        while True:
+            await self._queued.wait()
+            if len(self._queue) < self.group_max and not self._closing:
+                try:
+                    # Give other writers a moment to join this commit
+                    await asyncio.wait_for(self._queue_full.wait(), timeout=self.group_interval)
+                except asyncio.TimeoutError:
+                    pass
+            self._queued.clear()
+            self._queue_full.clear()
+            await self._commit_group()
+            if self._closing:
+                return
+
+    async def _commit_group(self) -> None:
+        """Run every queued write in one transaction"""
+        group, self._queue = self._queue, []
+        if not group:
+            return
+        start = time.perf_counter()
+        results: List[Any] = []
+        try:
+            async with self.transaction() as cursor:
+                # Savepoints outside a transaction would commit on release
+                if not self._connection.in_transaction:
+                    await cursor.execute("BEGIN")
+                for write in group:
+                    await cursor.execute("SAVEPOINT queued_write")
+                    try:
+                        if write.many:
+                            await cursor.executemany(write.sql, write.params)
+                        else:
+                            await cursor.execute(write.sql, write.params)
+                        results.append(cursor.rowcount)
+                    except Exception as e:
+                        await cursor.execute("ROLLBACK TO queued_write")
+                        results.append(e)
+                    await cursor.execute("RELEASE queued_write")
+        except BaseException as e:
+            # Nothing in the group was committed
+            for write in group:
+                if not write.future.done():
+                    write.future.set_exception(e if isinstance(e, Exception) else RuntimeError("Group commit cancelled"))
+            if not isinstance(e, Exception):
                 raise
-                
+            logger.error(f"Group commit of {len(group)} writes failed: {e}")
+            return
+
+        self.group_commit_time.observe(time.perf_counter() - start)
+        self.group_size.observe(len(group))
+        self.groups += 1
+        self.grouped_writes += len(group)
+        for write, result in zip(group, results):
+            if write.future.done():
+                continue
+            if isinstance(result, Exception):
+                self.grouped_errors += 1
+                write.future.set_exception(result)
+            else:
+                write.future.set_result(result)
+
+    @asynccontextmanager
+    async def read(self) -> AsyncContextManager[aiosqlite.Cursor]:
+        """Get a cursor on an idle read-only connection"""
+        if not self._idle_readers:
+            raise RuntimeError("Database not initialized")
+
+        start = time.perf_counter()
+        reader = await self._idle_readers.get()
+        self.read_wait.observe(time.perf_counter() - start)
+        try:
+            async with reader.cursor() as cursor:
+                yield InstrumentedCursor(cursor, reader, self.queries)
+        finally:
+            self._idle_readers.put_nowait(reader)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get connection pool metrics"""
+        return {
+            "profile": self.profile,
+            "readers": len(self._readers),
+            "idle_readers": self._idle_readers.qsize() if self._idle_readers else 0,
+            "writer_busy": self._write_lock.locked(),
+            "read_wait": self.read_wait.snapshot(),
+            "write_wait": self.write_wait.snapshot(),
+            "write_time": self.write_time.snapshot(),
+            "group_commit": {
+                "queued": len(self._queue),
+                "groups": self.groups,
+                "writes": self.grouped_writes,
+                "errors": self.grouped_errors,
+                "writes_per_commit": self.grouped_writes / self.groups if self.groups else None,
+                "size": self.group_size.snapshot(),
+                "commit_time": self.group_commit_time.snapshot()
+            }
+        }
+
 # Global database instance
 db = Database()
 
@@ -7,6 +7,7 @@ from aiohttp import web
 import psutil
 import discord
 from config import Config
+from utils.metrics import registry
 
 logger = logging.getLogger('discord')
 
@@ -175,7 +176,7 @@ class HealthCheck:
             
             # Check database connection
             try:
-                async with self.bot.db.transaction() as cursor:
+                async with self.bot.db.read() as cursor:
                     await cursor.execute("SELECT 1")
             except Exception as e:
                 logger.error(f"Database health check failed: {e}")
@@ -239,6 +240,9 @@ class HealthCheck:
                         # Error metrics
                         "error_count": self.bot.error_count if hasattr(self.bot, 'error_count') else 0,
                         
+                        # Subsystem metrics
+                        "subsystems": registry.snapshot(),
+                        
                         # Timestamp
                         "timestamp": datetime.utcnow().isoformat()
                     }
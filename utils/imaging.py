@@ -0,0 +1,120 @@
+import unicodedata
+from functools import lru_cache
+from typing import List, Tuple
+
+try:
+    from PIL import Image, ImageDraw, ImageFont
+except ImportError:  # Rendering is optional, callers fall back to static images or plain text
+    Image = ImageDraw = ImageFont = None
+
+try:
+    import arabic_reshaper
+    from bidi.algorithm import get_display
+except ImportError:
+    arabic_reshaper = None
+
+RENDERING_AVAILABLE = Image is not None
+
+FONT_PATH = 'fonts/arabic.ttf'
+
+def _is_rtl_char(ch: str) -> bool:
+    # Hebrew/Arabic blocks and the Arabic presentation forms
+    return '\u0590' <= ch <= '\u08ff' or '\ufb1d' <= ch <= '\ufefc'
+
+def _is_rtl(text: str) -> bool:
+    return any(_is_rtl_char(ch) for ch in text)
+
+def shape_text(text: str) -> str:
+    """Shape Arabic letters and reorder right-to-left runs for drawing
+
+    Pillow draws code points left to right without joining them, so Arabic
+    has to be reshaped into presentation forms and put in visual order first.
+    """
+    if arabic_reshaper is None or not _is_rtl(text):
+        return text
+    return get_display(arabic_reshaper.reshape(text))
+
+# Per-process caches, each render worker decodes these once
+
+@lru_cache(maxsize=8)
+def font(size: int):
+    """Get the bundled Arabic font at a size"""
+    return ImageFont.truetype(FONT_PATH, size)
+
+@lru_cache(maxsize=8)
+def latin_font(size: int):
+    """Get the fallback font for everything the bundled font lacks"""
+    # The bundled font only carries Arabic glyphs
+    return ImageFont.load_default(size)
+
+@lru_cache(maxsize=4)
+def circle_mask(size: int):
+    """Get a circular alpha mask for avatars"""
+    mask = Image.new('L', (size, size), 0)
+    ImageDraw.Draw(mask).ellipse((0, 0, size - 1, size - 1), fill=255)
+    return mask
+
+@lru_cache(maxsize=None)
+def _has_glyph(ch: str) -> bool:
+    """Check the bundled font draws a character instead of the missing-glyph box"""
+    return _glyph_pixels(ch) != _glyph_pixels('\uffff')
+
+@lru_cache(maxsize=None)
+def _glyph_pixels(ch: str) -> bytes:
+    image = Image.new('L', (48, 48))
+    ImageDraw.Draw(image).text((8, 8), ch, font=font(24), fill=255)
+    return image.tobytes()
+
+@lru_cache(maxsize=None)
+def _substitute(ch: str) -> str:
+    """Swap a presentation form the font lacks for its base letter when the font has that"""
+    if _has_glyph(ch):
+        return ch
+    base = unicodedata.normalize('NFKC', ch)
+    if base != ch and all(_has_glyph(c) for c in base):
+        return base
+    return ch
+
+def _runs(text: str) -> List[Tuple[bool, str]]:
+    """Split shaped text into (is_arabic, run) pieces for per-script fonts"""
+    runs = []
+    for ch in text:
+        arabic = _is_rtl_char(ch)
+        if arabic:
+            ch = _substitute(ch)
+            arabic = _has_glyph(ch[0])
+        if runs and runs[-1][0] == arabic:
+            runs[-1][1].append(ch)
+        else:
+            runs.append((arabic, [ch]))
+    return [(arabic, ''.join(chars)) for arabic, chars in runs]
+
+def _text_width(draw, runs: List[Tuple[bool, str]], size: int) -> float:
+    return sum(draw.textlength(run, font=font(size) if arabic else latin_font(size)) for arabic, run in runs)
+
+def draw_text(draw, xy: Tuple[float, float], text: str, size: int, max_width: int, fill, center: bool = False) -> None:
+    """Draw mixed Arabic/Latin text on a shared baseline, shrinking it to fit
+
+    Args:
+        draw: Pillow draw context
+        xy: Left (or center) point of the baseline
+        text: Logical-order text, shaped here
+        size: Preferred font size, shrunk down to half to fit ``max_width``
+        max_width: Width available in pixels
+        fill: Text color
+        center: Center the text on ``xy`` instead of starting there
+    """
+    runs = _runs(shape_text(text))
+    width = 0.0
+    for candidate in range(size, size // 2, -2):
+        size = candidate
+        width = _text_width(draw, runs, size)
+        if width <= max_width:
+            break
+    x, y = xy
+    if center:
+        x -= width / 2
+    for arabic, run in runs:
+        run_font = font(size) if arabic else latin_font(size)
+        draw.text((x, y), run, font=run_font, fill=fill, anchor='ls')
+        x += draw.textlength(run, font=run_font)
@@ -0,0 +1,151 @@
+import logging
+import math
+import sys
+from array import array
+from typing import List, Optional, Tuple
+
+logger = logging.getLogger('discord')
+
+SAMPLE_RATE = 48000
+CHANNELS = 2
+MAX_SAMPLE = 32767
+
+# Normalization modes
+MODE_VOLUME = 'volume'  # Fixed linear gain, the previous PCMVolumeTransformer behaviour
+MODE_PEAK = 'peak'      # Scale so the loudest sample hits the peak target
+MODE_LUFS = 'lufs'      # Scale to an integrated loudness target (ITU-R BS.1770)
+MODES = (MODE_VOLUME, MODE_PEAK, MODE_LUFS)
+
+# K-weighting biquads for 48kHz (ITU-R BS.1770-4), as (b0, b1, b2, a1, a2)
+_K_SHELF = (1.53512485958697, -2.69169618940638, 1.19839281085285, -1.69065929318241, 0.73248077421585)
+_K_HIGHPASS = (1.0, -2.0, 1.0, -1.99004745483398, 0.99007225036621)
+
+def _samples(pcm: bytes) -> array:
+    """Interpret 16-bit little-endian PCM as a sample array"""
+    samples = array('h')
+    samples.frombytes(pcm[:len(pcm) - len(pcm) % 2])
+    if sys.byteorder != 'little':
+        samples.byteswap()
+    return samples
+
+def db_to_gain(db: float) -> float:
+    return 10 ** (db / 20)
+
+def gain_to_db(gain: float) -> float:
+    return 20 * math.log10(gain) if gain > 0 else float('-inf')
+
+def measure_peak(pcm: bytes) -> float:
+    """Get the sample peak as a fraction of full scale (0.0 - 1.0)"""
+    samples = _samples(pcm)
+    if not samples:
+        return 0.0
+    return max(max(samples), -min(samples)) / MAX_SAMPLE
+
+def _k_weighted(channel: List[float]) -> List[float]:
+    """Apply the K-weighting pre-filter to one channel"""
+    for b0, b1, b2, a1, a2 in (_K_SHELF, _K_HIGHPASS):
+        x1 = x2 = y1 = y2 = 0.0
+        out = []
+        append = out.append
+        for x in channel:
+            y = b0 * x + b1 * x1 + b2 * x2 - a1 * y1 - a2 * y2
+            x2, x1 = x1, x
+            y2, y1 = y1, y
+            append(y)
+        channel = out
+    return channel
+
+def measure_lufs(pcm: bytes) -> Optional[float]:
+    """Measure integrated loudness of 48kHz stereo PCM in LUFS
+
+    Gated measurement per ITU-R BS.1770: 400ms blocks with 75% overlap, an
+    absolute gate at -70 LUFS and a relative gate 10 LU below the ungated
+    level. Returns None for silent or too-short clips.
+    """
+    samples = _samples(pcm)
+    step = SAMPLE_RATE // 10  # 100ms
+    channel_power = []
+    for ch in range(CHANNELS):
+        weighted = _k_weighted([s / MAX_SAMPLE for s in samples[ch::CHANNELS]])
+        # Sum of squares per 100ms step, blocks are four consecutive steps
+        channel_power.append([
+            sum(v * v for v in weighted[i:i + step]) for i in range(0, len(weighted) - step + 1, step)
+        ])
+
+    steps = min(len(power) for power in channel_power)
+    blocks = []
+    for i in range(steps - 3):
+        z = sum(sum(power[i:i + 4]) for power in channel_power) / (4 * step)
+        if z > 0:
+            blocks.append(z)
+
+    def loudness(power: float) -> float:
+        return -0.691 + 10 * math.log10(power)
+
+    gated = [z for z in blocks if loudness(z) > -70.0]
+    if not gated:
+        return None
+    relative_gate = loudness(sum(gated) / len(gated)) - 10.0
+    gated = [z for z in gated if loudness(z) > relative_gate]
+    return loudness(sum(gated) / len(gated))
+
+def apply_gain(pcm: bytes, gain: float) -> bytes:
+    """Scale PCM by a linear gain, clipping to the 16-bit range"""
+    if gain == 1.0:
+        return pcm
+    samples = _samples(pcm)
+    scaled = array('h', (
+        MAX_SAMPLE if v > MAX_SAMPLE else -MAX_SAMPLE - 1 if v < -MAX_SAMPLE - 1 else v
+        for v in (int(s * gain) for s in samples)
+    ))
+    if sys.byteorder != 'little':
+        scaled.byteswap()
+    return scaled.tobytes()
+
+class LoudnessProfile:
+    """How a clip's gain is decided while it is being cached
+
+    Attributes:
+        mode: One of ``MODES``
+        volume: Linear gain for ``volume`` mode
+        target_lufs: Integrated loudness target for ``lufs`` mode
+        peak_db: Peak target for ``peak`` mode and the ceiling for ``lufs`` mode (dBFS)
+    """
+
+    def __init__(self, mode: str = MODE_VOLUME, volume: float = 1.0, target_lufs: float = -16.0, peak_db: float = -1.0) -> None:
+        if mode not in MODES:
+            raise ValueError(f"Unknown normalization mode: {mode}")
+        self.mode = mode
+        self.volume = volume
+        self.target_lufs = target_lufs
+        self.peak_db = peak_db
+
+    def gain_for(self, pcm: bytes) -> Tuple[float, str]:
+        """Decide the gain for a clip
+
+        Returns:
+            Linear gain and a short description of the measurement
+        """
+        if self.mode == MODE_VOLUME:
+            return self.volume, f"volume x{self.volume:.2f}"
+
+        peak = measure_peak(pcm)
+        if peak == 0:
+            return 1.0, "silent"
+        ceiling = db_to_gain(self.peak_db) / peak
+
+        if self.mode == MODE_PEAK:
+            return ceiling, f"peak {gain_to_db(peak):.1f}dBFS -> {self.peak_db:.1f}dBFS"
+
+        lufs = measure_lufs(pcm)
+        if lufs is None:
+            return 1.0, "too quiet to measure"
+        # Don't push peaks past the ceiling to reach the loudness target
+        gain = min(db_to_gain(self.target_lufs - lufs), ceiling)
+        return gain, f"{lufs:.1f} LUFS -> {lufs + gain_to_db(gain):.1f} LUFS"
+
+    def apply(self, pcm: bytes) -> bytes:
+        """Measure and bake the gain into the PCM"""
+        gain, description = self.gain_for(pcm)
+        logger.info(f"Welcome sound gain {gain_to_db(gain):+.1f}dB ({description})")
+        return apply_gain(pcm, gain)
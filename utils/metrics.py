@@ -0,0 +1,138 @@
+import bisect
+import logging
+import threading
+from typing import Any, Callable, Dict, Optional, Sequence
+
+logger = logging.getLogger('discord')
+
+class Histogram:
+    """Thread-safe histogram with fixed bucket bounds
+
+    Safe to observe from the audio player thread or executor threads.
+    Percentiles are reported as the upper bound of the matching bucket.
+    """
+
+    DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS) -> None:
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._lock = threading.Lock()
+        self.count = 0
+        self.sum = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+
+    def observe(self, value: float) -> None:
+        """Record a single value"""
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self.count += 1
+            self.sum += value
+            if self.min is None or value < self.min:
+                self.min = value
+            if self.max is None or value > self.max:
+                self.max = value
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Estimate a percentile (0-100) from the bucket counts"""
+        with self._lock:
+            if not self.count:
+                return None
+            rank = q / 100 * self.count
+            seen = 0
+            for index, count in enumerate(self._counts):
+                seen += count
+                if seen >= rank and count:
+                    return self.buckets[index] if index < len(self.buckets) else self.max
+            return self.max
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Get histogram summary and bucket counts"""
+        with self._lock:
+            counts = list(self._counts)
+            count, total = self.count, self.sum
+            minimum, maximum = self.min, self.max
+        buckets = {str(bound): counts[i] for i, bound in enumerate(self.buckets)}
+        buckets['+Inf'] = counts[-1]
+        return {
+            "count": count,
+            "sum": round(total, 6),
+            "min": minimum,
+            "max": maximum,
+            "mean": round(total / count, 6) if count else None,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+            "buckets": buckets
+        }
+
+class LatencyBudget:
+    """Latency histogram tracked against a target
+
+    Attributes:
+        target: Budget in seconds
+        histogram: Distribution of observed latencies
+        within: Observations at or under the target
+        over: Observations above the target
+    """
+
+    DEFAULT_BUCKETS = (0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0, 2.0, 3.0, 5.0, 10.0)
+
+    def __init__(self, target: float, buckets: Sequence[float] = DEFAULT_BUCKETS) -> None:
+        self.target = target
+        self.histogram = Histogram(buckets)
+        self.within = 0
+        self.over = 0
+
+    def observe(self, value: float) -> bool:
+        """Record a latency, returning whether it met the target"""
+        self.histogram.observe(value)
+        if value <= self.target:
+            self.within += 1
+            return True
+        self.over += 1
+        return False
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Get budget counters and histogram"""
+        total = self.within + self.over
+        return {
+            "target": self.target,
+            "within": self.within,
+            "over": self.over,
+            "within_ratio": round(self.within / total, 4) if total else None,
+            **self.histogram.snapshot()
+        }
+
+class MetricsRegistry:
+    """Registry of subsystem metrics providers
+
+    Subsystems register a callable returning a JSON-serializable dict, the
+    health server collects them all when serving metrics.
+    """
+
+    def __init__(self) -> None:
+        self._providers: Dict[str, Callable[[], Dict[str, Any]]] = {}
+
+    def register(self, name: str, provider: Callable[[], Dict[str, Any]]) -> None:
+        """Register (or replace) a metrics provider"""
+        self._providers[name] = provider
+
+    def unregister(self, name: str) -> None:
+        """Remove a metrics provider"""
+        self._providers.pop(name, None)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Collect metrics from every registered provider"""
+        result = {}
+        for name, provider in list(self._providers.items()):
+            try:
+                result[name] = provider()
+            except Exception as e:
+                logger.error(f"Failed to collect metrics for {name}: {e}")
+        return result
+
+# Global metrics registry
+registry = MetricsRegistry()
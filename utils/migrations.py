@@ -0,0 +1,217 @@
+import logging
+import time
+from typing import Awaitable, Callable, Dict, List, Sequence, Tuple
+
+import aiosqlite
+
+logger = logging.getLogger('discord')
+
+# Version stored in PRAGMA user_version once utils/schema.sql is in place
+SCHEMA_VERSION = 1
+
+# Progress of a conversion in flight, so a restart picks up where it stopped
+_PROGRESS = """
+    CREATE TABLE IF NOT EXISTS schema_migration (
+        name TEXT PRIMARY KEY,
+        copied_to INTEGER NOT NULL
+    )
+"""
+
+# Version 1: snowflakes as INTEGER, WITHOUT ROWID for composite keys.
+# (table, CREATE TABLE for the new layout with {name} for the table name,
+# columns to copy, columns to convert to INTEGER)
+_V1_TABLES: Sequence[Tuple[str, str, Sequence[str], Sequence[str]]] = (
+    ("guilds", """
+        CREATE TABLE IF NOT EXISTS {name} (
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            owner_id INTEGER NOT NULL,
+            member_count INTEGER NOT NULL,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    """, ("id", "name", "owner_id", "member_count", "created_at", "updated_at"), ("id", "owner_id")),
+    ("bot_settings", """
+        CREATE TABLE IF NOT EXISTS {name} (
+            guild_id INTEGER PRIMARY KEY,
+            prefix TEXT DEFAULT '!',
+            welcome_channel_id INTEGER,
+            audit_log_channel_id INTEGER,
+            role_log_channel_id INTEGER,
+            FOREIGN KEY(guild_id) REFERENCES guilds(id) ON DELETE CASCADE
+        )
+    """, ("guild_id", "prefix", "welcome_channel_id", "audit_log_channel_id", "role_log_channel_id"),
+        ("guild_id", "welcome_channel_id", "audit_log_channel_id", "role_log_channel_id")),
+    ("user_roles", """
+        CREATE TABLE IF NOT EXISTS {name} (
+            guild_id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            role_id INTEGER NOT NULL,
+            assigned_by INTEGER NOT NULL,
+            assigned_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (guild_id, user_id, role_id),
+            FOREIGN KEY(guild_id) REFERENCES guilds(id) ON DELETE CASCADE
+        ) WITHOUT ROWID
+    """, ("guild_id", "user_id", "role_id", "assigned_by", "assigned_at"),
+        ("guild_id", "user_id", "role_id", "assigned_by")),
+    ("command_usage", """
+        CREATE TABLE IF NOT EXISTS {name} (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            guild_id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            command_name TEXT NOT NULL,
+            used_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            success BOOLEAN DEFAULT 1,
+            error_message TEXT,
+            FOREIGN KEY(guild_id) REFERENCES guilds(id) ON DELETE CASCADE
+        )
+    """, ("id", "guild_id", "user_id", "command_name", "used_at", "success", "error_message"),
+        ("guild_id", "user_id")),
+    ("command_usage_minute", """
+        CREATE TABLE IF NOT EXISTS {name} (
+            minute DATETIME NOT NULL,
+            guild_id INTEGER NOT NULL,
+            command_name TEXT NOT NULL,
+            success BOOLEAN NOT NULL,
+            uses INTEGER NOT NULL,
+            PRIMARY KEY (minute, guild_id, command_name, success)
+        ) WITHOUT ROWID
+    """, ("minute", "guild_id", "command_name", "success", "uses"), ("guild_id",)),
+    ("command_usage_daily", """
+        CREATE TABLE IF NOT EXISTS {name} (
+            guild_id INTEGER NOT NULL,
+            day DATE NOT NULL,
+            command_name TEXT NOT NULL,
+            success BOOLEAN NOT NULL,
+            uses INTEGER NOT NULL,
+            PRIMARY KEY (guild_id, day, command_name, success)
+        ) WITHOUT ROWID
+    """, ("guild_id", "day", "command_name", "success", "uses"), ("guild_id",)),
+    ("role_jobs", """
+        CREATE TABLE IF NOT EXISTS {name} (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            guild_id INTEGER NOT NULL,
+            role_id INTEGER NOT NULL,
+            action TEXT NOT NULL,
+            selector TEXT NOT NULL,
+            created_by INTEGER NOT NULL,
+            status TEXT NOT NULL DEFAULT 'running',
+            total INTEGER NOT NULL DEFAULT 0,
+            succeeded INTEGER NOT NULL DEFAULT 0,
+            skipped INTEGER NOT NULL DEFAULT 0,
+            failed INTEGER NOT NULL DEFAULT 0,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    """, ("id", "guild_id", "role_id", "action", "selector", "created_by", "status", "total",
+          "succeeded", "skipped", "failed", "created_at", "updated_at"), ("guild_id", "role_id", "created_by")),
+    ("role_job_members", """
+        CREATE TABLE IF NOT EXISTS {name} (
+            job_id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            state TEXT NOT NULL DEFAULT 'pending',
+            error TEXT,
+            PRIMARY KEY (job_id, user_id),
+            FOREIGN KEY(job_id) REFERENCES role_jobs(id) ON DELETE CASCADE
+        ) WITHOUT ROWID
+    """, ("job_id", "user_id", "state", "error"), ("user_id",))
+)
+
+async def schema_version(connection: aiosqlite.Connection) -> int:
+    """Get the version stored in the database file"""
+    async with connection.execute("PRAGMA user_version") as cursor:
+        return (await cursor.fetchone())[0]
+
+async def _table_exists(connection: aiosqlite.Connection, name: str) -> bool:
+    async with connection.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (name,)) as cursor:
+        return await cursor.fetchone() is not None
+
+async def _copy_table(connection: aiosqlite.Connection, table: str, create: str, columns: Sequence[str],
+                      integers: Sequence[str], batch_size: int) -> int:
+    """Copy a table into its new layout, ``batch_size`` rows per commit"""
+    target = f"{table}__v1"
+    await connection.execute(create.format(name=target))
+    async with connection.execute("SELECT copied_to FROM schema_migration WHERE name = ?", (table,)) as cursor:
+        row = await cursor.fetchone()
+    position = row[0] if row else 0
+
+    names = ", ".join(columns)
+    values = ", ".join(f"CAST({column} AS INTEGER)" if column in integers else column for column in columns)
+    copied = 0
+    while True:
+        async with connection.execute(f"""
+            SELECT MAX(rowid), COUNT(*) FROM (
+                SELECT rowid FROM {table} WHERE rowid > ? ORDER BY rowid LIMIT ?
+            )
+        """, (position, batch_size)) as cursor:
+            upper, count = await cursor.fetchone()
+        if not count:
+            return copied
+        # The copy and the progress marker commit together
+        await connection.execute("BEGIN")
+        await connection.execute(
+            f"INSERT OR REPLACE INTO {target} ({names}) SELECT {values} FROM {table} WHERE rowid > ? AND rowid <= ?",
+            (position, upper)
+        )
+        await connection.execute("""
+            INSERT INTO schema_migration (name, copied_to) VALUES (?, ?)
+            ON CONFLICT (name) DO UPDATE SET copied_to = excluded.copied_to
+        """, (table, upper))
+        await connection.commit()
+        position = upper
+        copied += count
+
+async def _to_v1(connection: aiosqlite.Connection, batch_size: int) -> None:
+    """Convert TEXT snowflakes to INTEGER
+
+    Each table is copied into ``<table>__v1`` in batches, then every copy
+    replaces its original in one final transaction.
+    """
+    await connection.execute(_PROGRESS)
+    await connection.commit()
+
+    converted: List[str] = []
+    for table, create, columns, integers in _V1_TABLES:
+        # Tables added after this database was created come from schema.sql
+        if not await _table_exists(connection, table):
+            continue
+        copied = await _copy_table(connection, table, create, columns, integers, batch_size)
+        logger.info(f"Copied {copied} rows of {table} to the integer schema")
+        converted.append(table)
+
+    await connection.execute("BEGIN")
+    for table in converted:
+        await connection.execute(f"DROP TABLE {table}")
+        await connection.execute(f"ALTER TABLE {table}__v1 RENAME TO {table}")
+    await connection.execute("DROP TABLE schema_migration")
+    await connection.execute("PRAGMA user_version = 1")
+    await connection.commit()
+
+# Version reached -> migration producing it from the version before
+MIGRATIONS: Dict[int, Callable[[aiosqlite.Connection, int], Awaitable[None]]] = {
+    1: _to_v1
+}
+
+async def migrate(connection: aiosqlite.Connection, batch_size: int = 5000) -> int:
+    """Bring an existing database up to ``SCHEMA_VERSION``
+
+    Migrations run in order and each one sets ``user_version`` when it
+    commits, so an interrupted upgrade resumes with the step it was in.
+    A database without tables is left alone for ``schema.sql`` to create.
+
+    Args:
+        connection: Writer connection, with no transaction open
+        batch_size: Rows copied per commit
+
+    Returns:
+        The version the database was at before
+    """
+    version = await schema_version(connection)
+    if version >= SCHEMA_VERSION or not await _table_exists(connection, "guilds"):
+        return version
+    for target in range(version + 1, SCHEMA_VERSION + 1):
+        start = time.perf_counter()
+        logger.info(f"Migrating database schema to version {target}")
+        await MIGRATIONS[target](connection, max(1, batch_size))
+        logger.info(f"Database schema at version {target} after {time.perf_counter() - start:.2f}s")
+    return version
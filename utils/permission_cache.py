@@ -0,0 +1,219 @@
+import logging
+from typing import Any, Dict, FrozenSet, Iterable, Optional, Set, Tuple
+
+import discord
+
+logger = logging.getLogger('discord')
+
+class _MemberEntry:
+    """Resolved roles and permissions for one member"""
+
+    __slots__ = ('role_ids', 'permissions', 'top_role')
+
+    def __init__(self, role_ids: FrozenSet[int], permissions: int, top_role: Tuple[int, int]) -> None:
+        self.role_ids = role_ids
+        self.permissions = permissions
+        self.top_role = top_role
+
+class PermissionResolver:
+    """Shared cache of role membership and permission bits per member
+
+    Entries are built on first use and dropped by the gateway events that can
+    change them, so checks never go stale and never rescan roles:
+
+    - ``on_member_update`` (roles or timeout) / ``on_member_remove``: that member
+    - ``on_guild_role_update`` / ``on_guild_role_delete``: members holding the
+      role, or the whole guild for @everyone and position changes
+    - ``on_guild_channel_update`` / ``on_guild_channel_delete``: that channel's
+      overwrites
+    - ``on_guild_update`` (ownership change) / ``on_guild_remove``: the guild
+
+    Attributes:
+        _members: Member entries per guild ID
+        _role_members: Member IDs per role ID per guild ID, for targeted invalidation
+        _channel_permissions: Permission bits per (channel ID, member ID) per guild ID
+        _roles: Role objects per role ID per guild ID
+    """
+
+    def __init__(self) -> None:
+        self._members: Dict[int, Dict[int, _MemberEntry]] = {}
+        self._role_members: Dict[int, Dict[int, Set[int]]] = {}
+        self._channel_permissions: Dict[int, Dict[Tuple[int, int], int]] = {}
+        self._roles: Dict[int, Dict[int, discord.Role]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def attach(self, bot: discord.Client) -> None:
+        """Register the invalidation listeners on a bot"""
+        bot.add_listener(self.on_member_update)
+        bot.add_listener(self.on_member_remove)
+        bot.add_listener(self.on_guild_role_update)
+        bot.add_listener(self.on_guild_role_delete)
+        bot.add_listener(self.on_guild_channel_update)
+        bot.add_listener(self.on_guild_channel_delete)
+        bot.add_listener(self.on_guild_update)
+        bot.add_listener(self.on_guild_remove)
+
+    def _entry(self, member: discord.Member) -> _MemberEntry:
+        guild_id = member.guild.id
+        members = self._members.setdefault(guild_id, {})
+        entry = members.get(member.id)
+        if entry is not None:
+            self.hits += 1
+            return entry
+
+        self.misses += 1
+        top_role = member.top_role
+        entry = _MemberEntry(
+            frozenset(role.id for role in member.roles),
+            member.guild_permissions.value,
+            # Same order as discord.Role: on equal positions the lower ID ranks higher
+            (top_role.position, -top_role.id)
+        )
+        members[member.id] = entry
+        role_members = self._role_members.setdefault(guild_id, {})
+        for role_id in entry.role_ids:
+            role_members.setdefault(role_id, set()).add(member.id)
+        return entry
+
+    def has_role(self, member: discord.Member, role_id: int) -> bool:
+        """Check if a member has a role"""
+        return role_id in self._entry(member).role_ids
+
+    def has_any_role(self, member: discord.Member, role_ids: Iterable[int]) -> bool:
+        """Check if a member has at least one of the roles"""
+        return not self._entry(member).role_ids.isdisjoint(role_ids)
+
+    def guild_permissions(self, member: discord.Member) -> discord.Permissions:
+        """Get a member's guild-wide permissions"""
+        return discord.Permissions(self._entry(member).permissions)
+
+    def is_admin(self, member: discord.Member) -> bool:
+        """Check if a member has the administrator permission"""
+        return self.guild_permissions(member).administrator
+
+    def outranks(self, member: discord.Member, other: discord.Member) -> bool:
+        """Check if a member's top role is above another member's"""
+        return self._entry(member).top_role > self._entry(other).top_role
+
+    def channel_permissions(self, channel: discord.abc.GuildChannel, member: discord.Member) -> discord.Permissions:
+        """Get a member's permissions in a channel, overwrites included"""
+        cache = self._channel_permissions.setdefault(channel.guild.id, {})
+        key = (channel.id, member.id)
+        value = cache.get(key)
+        if value is not None:
+            self.hits += 1
+            return discord.Permissions(value)
+
+        self.misses += 1
+        # Make sure the member is indexed so member/role events clear this too
+        self._entry(member)
+        value = cache[key] = channel.permissions_for(member).value
+        return discord.Permissions(value)
+
+    def get_role(self, guild: discord.Guild, role_id: int) -> Optional[discord.Role]:
+        """Get a role by ID, cached until it is updated or deleted"""
+        roles = self._roles.setdefault(guild.id, {})
+        role = roles.get(role_id)
+        if role is not None:
+            self.hits += 1
+            return role
+
+        self.misses += 1
+        role = guild.get_role(role_id)
+        if role is not None:
+            roles[role_id] = role
+        return role
+
+    def invalidate_member(self, guild_id: int, member_id: int) -> None:
+        """Drop everything cached for one member"""
+        entry = self._members.get(guild_id, {}).pop(member_id, None)
+        if entry is not None:
+            role_members = self._role_members.get(guild_id, {})
+            for role_id in entry.role_ids:
+                holders = role_members.get(role_id)
+                if holders:
+                    holders.discard(member_id)
+        channel_permissions = self._channel_permissions.get(guild_id)
+        if channel_permissions:
+            for key in [key for key in channel_permissions if key[1] == member_id]:
+                del channel_permissions[key]
+        self.invalidations += 1
+
+    def invalidate_role(self, guild_id: int, role_id: int) -> None:
+        """Drop a role and every member holding it"""
+        self._roles.get(guild_id, {}).pop(role_id, None)
+        for member_id in list(self._role_members.get(guild_id, {}).pop(role_id, ())):
+            self.invalidate_member(guild_id, member_id)
+
+    def invalidate_channel(self, guild_id: int, channel_id: int) -> None:
+        """Drop cached permissions for one channel"""
+        channel_permissions = self._channel_permissions.get(guild_id)
+        if channel_permissions:
+            for key in [key for key in channel_permissions if key[0] == channel_id]:
+                del channel_permissions[key]
+        self.invalidations += 1
+
+    def invalidate_guild(self, guild_id: int) -> None:
+        """Drop everything cached for a guild"""
+        self._members.pop(guild_id, None)
+        self._role_members.pop(guild_id, None)
+        self._channel_permissions.pop(guild_id, None)
+        self._roles.pop(guild_id, None)
+        self.invalidations += 1
+
+    async def on_member_update(self, before: discord.Member, after: discord.Member) -> None:
+        # A timeout strips most channel permissions without touching roles
+        if before.roles != after.roles or getattr(before, 'timed_out_until', None) != getattr(after, 'timed_out_until', None):
+            self.invalidate_member(after.guild.id, after.id)
+
+    async def on_member_remove(self, member: discord.Member) -> None:
+        self.invalidate_member(member.guild.id, member.id)
+
+    async def on_guild_role_update(self, before: discord.Role, after: discord.Role) -> None:
+        if before.position != after.position or after.is_default():
+            # Positions shift for other roles too and @everyone applies to all members
+            self.invalidate_guild(after.guild.id)
+        elif before.permissions != after.permissions:
+            self.invalidate_role(after.guild.id, after.id)
+        else:
+            self._roles.get(after.guild.id, {}).pop(after.id, None)
+
+    async def on_guild_role_delete(self, role: discord.Role) -> None:
+        self.invalidate_role(role.guild.id, role.id)
+
+    async def on_guild_channel_update(self, before: discord.abc.GuildChannel, after: discord.abc.GuildChannel) -> None:
+        if before.overwrites != after.overwrites or getattr(before, 'category_id', None) != getattr(after, 'category_id', None):
+            self.invalidate_channel(after.guild.id, after.id)
+            if isinstance(after, discord.CategoryChannel):
+                # Synced children inherit the category's overwrites
+                for channel in after.channels:
+                    self.invalidate_channel(after.guild.id, channel.id)
+
+    async def on_guild_channel_delete(self, channel: discord.abc.GuildChannel) -> None:
+        self.invalidate_channel(channel.guild.id, channel.id)
+
+    async def on_guild_update(self, before: discord.Guild, after: discord.Guild) -> None:
+        if before.owner_id != after.owner_id:
+            # The owner implicitly has every permission
+            self.invalidate_guild(after.id)
+
+    async def on_guild_remove(self, guild: discord.Guild) -> None:
+        self.invalidate_guild(guild.id)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get resolver metrics"""
+        lookups = self.hits + self.misses
+        return {
+            "members": sum(len(members) for members in self._members.values()),
+            "channel_entries": sum(len(entries) for entries in self._channel_permissions.values()),
+            "roles": sum(len(roles) for roles in self._roles.values()),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else None,
+            "invalidations": self.invalidations
+        }
+
+# Global permission resolver instance
+permissions = PermissionResolver()
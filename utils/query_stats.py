@@ -0,0 +1,212 @@
+import logging
+import re
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Iterable, List, Optional, Sequence
+
+import aiosqlite
+
+from utils.metrics import Histogram
+
+logger = logging.getLogger('discord')
+
+# Statements mostly take microseconds, resolve the low end finely
+QUERY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+
+# Shortest time between two plan captures for the same slow statement
+PLAN_REFRESH_SECONDS = 60.0
+
+# Transaction control issued by Database itself, not worth a histogram each
+_UNTRACKED = ('BEGIN', 'COMMIT', 'ROLLBACK', 'SAVEPOINT', 'RELEASE')
+
+# Statements EXPLAIN QUERY PLAN says something useful about
+_EXPLAINABLE = ('SELECT', 'INSERT', 'UPDATE', 'DELETE', 'REPLACE', 'WITH')
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\bIN \(\?(?:, ?\?)*\)", re.IGNORECASE)
+_SPACE = re.compile(r"\s+")
+
+def normalize_sql(sql: str) -> str:
+    """Reduce a statement to its shape: literals become ``?``, whitespace collapses"""
+    sql = _SPACE.sub(' ', sql).strip()
+    sql = _STRING.sub('?', sql)
+    sql = _NUMBER.sub('?', sql)
+    return _IN_LIST.sub('IN (...)', sql)
+
+class _Statement:
+    """Counters for one normalized statement"""
+
+    __slots__ = ('sql', 'calls', 'errors', 'rows', 'slow', 'latency', 'plan', 'plan_at')
+
+    def __init__(self, sql: str) -> None:
+        self.sql = sql
+        self.calls = 0
+        self.errors = 0
+        self.rows = 0
+        self.slow = 0
+        self.latency = Histogram(QUERY_BUCKETS)
+        self.plan: Optional[List[str]] = None
+        self.plan_at = 0.0
+
+    @property
+    def full_scans(self) -> List[str]:
+        """Plan steps that read a whole table or index"""
+        return [
+            step for step in self.plan or ()
+            # Walking a subquery's own result isn't a table scan
+            if step.startswith('SCAN ') and not step.startswith('SCAN (') and 'CONSTANT ROW' not in step
+        ]
+
+    def snapshot(self) -> Dict[str, Any]:
+        latency = self.latency.snapshot()
+        return {
+            "sql": self.sql,
+            "calls": self.calls,
+            "errors": self.errors,
+            "rows": self.rows,
+            "slow": self.slow,
+            "total_time": latency["sum"],
+            "mean": latency["mean"],
+            "p95": latency["p95"],
+            "max": latency["max"],
+            "full_scan": bool(self.full_scans),
+            "plan": self.plan
+        }
+
+class QueryStats:
+    """Per-statement latency, row counts, slow-query log and query plans
+
+    Statements are grouped by their normalized text. The first time one is
+    seen, and again when it runs slower than ``slow_threshold`` (at most
+    once a minute), its ``EXPLAIN QUERY PLAN`` is captured, so full table
+    scans show up in the metrics without anyone looking for them.
+    Latency covers ``execute``; rows are the changed rows for writes and
+    the fetched rows for reads.
+
+    Attributes:
+        slow_threshold: Seconds above which a statement is logged as slow
+        max_statements: Distinct statements tracked, later ones are only counted
+        recent_slow: Last slow statements, newest last
+    """
+
+    def __init__(self, slow_threshold: float = 0.1, max_statements: int = 500, recent: int = 20) -> None:
+        self.slow_threshold = slow_threshold
+        self.max_statements = max(1, max_statements)
+        self._statements: Dict[str, _Statement] = {}
+        # Raw SQL -> normalized, most statements are module constants
+        self._normalized: Dict[str, str] = {}
+        self.recent_slow: Deque[Dict[str, Any]] = deque(maxlen=recent)
+        self.untracked = 0
+
+    def statement(self, sql: str) -> Optional[_Statement]:
+        """Get the counters for a statement, None if it isn't tracked"""
+        normalized = self._normalized.get(sql)
+        if normalized is None:
+            normalized = normalize_sql(sql)
+            if len(self._normalized) >= self.max_statements * 4:
+                self._normalized.clear()
+            self._normalized[sql] = normalized
+        if normalized.split(' ', 1)[0].upper() in _UNTRACKED:
+            return None
+        entry = self._statements.get(normalized)
+        if entry is None:
+            if len(self._statements) >= self.max_statements:
+                self.untracked += 1
+                return None
+            entry = self._statements[normalized] = _Statement(normalized)
+        return entry
+
+    async def observe(self, connection: aiosqlite.Connection, entry: _Statement, sql: str,
+                      params: Sequence[Any], elapsed: float) -> None:
+        """Record one execution, capturing the plan when it is new or slow"""
+        entry.calls += 1
+        entry.latency.observe(elapsed)
+        slow = elapsed >= self.slow_threshold
+        now = time.monotonic()
+        if entry.plan is None or (slow and now - entry.plan_at >= PLAN_REFRESH_SECONDS):
+            entry.plan_at = now
+            entry.plan = await self._explain(connection, sql, params)
+        if slow:
+            entry.slow += 1
+            self.recent_slow.append({"sql": entry.sql, "seconds": round(elapsed, 6), "at": time.time()})
+            plan = "; ".join(entry.plan or ())
+            logger.warning(f"Slow query ({elapsed * 1000:.1f}ms): {entry.sql} [plan: {plan or 'n/a'}]")
+
+    @staticmethod
+    async def _explain(connection: aiosqlite.Connection, sql: str, params: Sequence[Any]) -> List[str]:
+        if sql.lstrip().split(None, 1)[0].upper() not in _EXPLAINABLE:
+            return []
+        try:
+            async with connection.execute(f"EXPLAIN QUERY PLAN {sql}", params) as cursor:
+                return [row[3] for row in await cursor.fetchall()]
+        except Exception as e:
+            logger.debug(f"Could not capture query plan: {e}")
+            return []
+
+    def stats(self) -> Dict[str, Any]:
+        """Get per-statement metrics, most total time first"""
+        statements = sorted(self._statements.values(), key=lambda entry: entry.latency.sum, reverse=True)
+        return {
+            "statements": len(statements),
+            "untracked_calls": self.untracked,
+            "slow_threshold": self.slow_threshold,
+            "full_scans": [entry.sql for entry in statements if entry.full_scans],
+            "recent_slow": list(self.recent_slow),
+            "by_statement": [entry.snapshot() for entry in statements]
+        }
+
+class InstrumentedCursor:
+    """Cursor wrapper timing every statement into a ``QueryStats``"""
+
+    def __init__(self, cursor: aiosqlite.Cursor, connection: aiosqlite.Connection, stats: QueryStats) -> None:
+        self._cursor = cursor
+        self._connection = connection
+        self._stats = stats
+        self._entry: Optional[_Statement] = None
+
+    async def _run(self, method, sql: str, params: Any, plan_params: Sequence[Any]) -> 'InstrumentedCursor':
+        entry = self._entry = self._stats.statement(sql)
+        if entry is None:
+            await method(sql, params)
+            return self
+        start = time.perf_counter()
+        try:
+            await method(sql, params)
+        except Exception:
+            entry.errors += 1
+            raise
+        elapsed = time.perf_counter() - start
+        if self._cursor.rowcount > 0:
+            entry.rows += self._cursor.rowcount
+        await self._stats.observe(self._connection, entry, sql, plan_params, elapsed)
+        return self
+
+    async def execute(self, sql: str, parameters: Sequence[Any] = ()) -> 'InstrumentedCursor':
+        return await self._run(self._cursor.execute, sql, parameters, parameters)
+
+    async def executemany(self, sql: str, parameters: Iterable[Sequence[Any]]) -> 'InstrumentedCursor':
+        parameters = list(parameters)
+        return await self._run(self._cursor.executemany, sql, parameters, parameters[0] if parameters else ())
+
+    def _count(self, rows: List[Any]) -> List[Any]:
+        if self._entry is not None:
+            self._entry.rows += len(rows)
+        return rows
+
+    async def fetchone(self) -> Optional[Any]:
+        row = await self._cursor.fetchone()
+        if row is not None:
+            self._count([row])
+        return row
+
+    async def fetchmany(self, size: Optional[int] = None) -> List[Any]:
+        rows = await (self._cursor.fetchmany(size) if size is not None else self._cursor.fetchmany())
+        return self._count(rows)
+
+    async def fetchall(self) -> List[Any]:
+        return self._count(await self._cursor.fetchall())
+
+    def __getattr__(self, name: str) -> Any:
+        # rowcount, lastrowid, description, ...
+        return getattr(self._cursor, name)
@@ -0,0 +1,82 @@
+import time
+from collections import OrderedDict, deque
+from typing import Any, Callable, Deque, Dict, Hashable
+
+class SlidingWindowLimiter:
+    """In-memory sliding-window log rate limiter
+
+    Each key keeps the timestamps of its allowed calls inside the window, at
+    most ``limit`` of them, so a check is amortized O(1) and a key never
+    holds more than ``limit`` entries. Keys are kept in LRU order and the
+    least recently used are evicted past ``max_keys``, which bounds total
+    memory no matter how many users hit it.
+
+    Attributes:
+        limit: Calls allowed per window
+        window: Window length in seconds
+        max_keys: Keys tracked before evicting the least recently used
+        clock: Monotonic time source
+    """
+
+    def __init__(self, limit: int, window: float = 60.0, max_keys: int = 10000, clock: Callable[[], float] = time.monotonic) -> None:
+        self.limit = max(1, limit)
+        self.window = window
+        self.max_keys = max_keys
+        self.clock = clock
+        self._log: 'OrderedDict[Hashable, Deque[float]]' = OrderedDict()
+        self.allowed = 0
+        self.denied = 0
+        self.evictions = 0
+
+    def _entries(self, key: Hashable, now: float) -> Deque[float]:
+        entries = self._log.get(key)
+        if entries is None:
+            entries = self._log[key] = deque(maxlen=self.limit)
+            while len(self._log) > self.max_keys:
+                self._log.popitem(last=False)
+                self.evictions += 1
+        else:
+            self._log.move_to_end(key)
+        # Drop calls that slid out of the window
+        cutoff = now - self.window
+        while entries and entries[0] <= cutoff:
+            entries.popleft()
+        return entries
+
+    def check(self, key: Hashable) -> bool:
+        """Check a call against the limit, counting it when allowed
+
+        Returns:
+            True if the call is allowed
+        """
+        now = self.clock()
+        entries = self._entries(key, now)
+        if len(entries) >= self.limit:
+            self.denied += 1
+            return False
+        entries.append(now)
+        self.allowed += 1
+        return True
+
+    def retry_after(self, key: Hashable) -> float:
+        """Seconds until the key may call again (0 if it may now)"""
+        now = self.clock()
+        entries = self._entries(key, now)
+        if len(entries) < self.limit:
+            return 0.0
+        return entries[0] + self.window - now
+
+    def reset(self, key: Hashable) -> None:
+        """Forget a key's history"""
+        self._log.pop(key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get limiter metrics"""
+        return {
+            "keys": len(self._log),
+            "limit": self.limit,
+            "window": self.window,
+            "allowed": self.allowed,
+            "denied": self.denied,
+            "evictions": self.evictions
+        }
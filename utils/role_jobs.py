@@ -0,0 +1,404 @@
+import asyncio
+import json
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+
+import discord
+
+from utils.bulk import chunked, run_bulk
+
+logger = logging.getLogger('discord')
+
+ACTION_ADD = 'add'
+ACTION_REMOVE = 'remove'
+ACTIONS = (ACTION_ADD, ACTION_REMOVE)
+
+STATUS_RUNNING = 'running'
+STATUS_COMPLETED = 'completed'
+STATUS_CANCELLED = 'cancelled'
+
+# Rows per executemany when snapshotting a job's members
+INSERT_CHUNK = 1000
+
+RoleChange = Callable[[int, int, int, int, bool], Awaitable[Any]]
+
+def parse_date(text: Optional[str]) -> Optional[datetime]:
+    """Parse a YYYY-MM-DD date as UTC midnight
+
+    Raises:
+        ValueError: If the text isn't a valid date
+    """
+    if not text:
+        return None
+    return datetime.strptime(text, '%Y-%m-%d').replace(tzinfo=timezone.utc)
+
+class RoleSelector:
+    """Which members a bulk role job targets
+
+    All conditions must hold. Bots are never selected.
+
+    Attributes:
+        with_roles: Role IDs a member must all have
+        without_roles: Role IDs a member must have none of
+        joined_before: Only members who joined before this time
+        joined_after: Only members who joined at or after this time
+    """
+
+    def __init__(
+        self,
+        with_roles: Iterable[int] = (),
+        without_roles: Iterable[int] = (),
+        joined_before: Optional[datetime] = None,
+        joined_after: Optional[datetime] = None
+    ) -> None:
+        self.with_roles = frozenset(with_roles)
+        self.without_roles = frozenset(without_roles)
+        self.joined_before = joined_before
+        self.joined_after = joined_after
+
+    def matches(self, member: discord.Member) -> bool:
+        """Check if a member is selected"""
+        if member.bot:
+            return False
+        role_ids = {role.id for role in member.roles}
+        if not self.with_roles <= role_ids or not self.without_roles.isdisjoint(role_ids):
+            return False
+        if self.joined_before or self.joined_after:
+            if member.joined_at is None:
+                return False
+            if self.joined_before and member.joined_at >= self.joined_before:
+                return False
+            if self.joined_after and member.joined_at < self.joined_after:
+                return False
+        return True
+
+    def select(self, members: Iterable[discord.Member]) -> List[discord.Member]:
+        """Filter members down to the selected ones"""
+        return [member for member in members if self.matches(member)]
+
+    def to_json(self) -> str:
+        return json.dumps({
+            "with_roles": sorted(self.with_roles),
+            "without_roles": sorted(self.without_roles),
+            "joined_before": self.joined_before.isoformat() if self.joined_before else None,
+            "joined_after": self.joined_after.isoformat() if self.joined_after else None
+        })
+
+    @classmethod
+    def from_json(cls, text: str) -> 'RoleSelector':
+        data = json.loads(text)
+        return cls(
+            data.get("with_roles", ()),
+            data.get("without_roles", ()),
+            datetime.fromisoformat(data["joined_before"]) if data.get("joined_before") else None,
+            datetime.fromisoformat(data["joined_after"]) if data.get("joined_after") else None
+        )
+
+    def describe(self) -> str:
+        """Human readable summary of the conditions"""
+        parts = [f"<@&{role_id}>" for role_id in sorted(self.with_roles)]
+        parts += [f"not <@&{role_id}>" for role_id in sorted(self.without_roles)]
+        if self.joined_before:
+            parts.append(f"joined before {self.joined_before:%Y-%m-%d}")
+        if self.joined_after:
+            parts.append(f"joined after {self.joined_after:%Y-%m-%d}")
+        return ", ".join(parts) or "everyone"
+
+class RoleJob:
+    """Progress of one bulk role job
+
+    Attributes:
+        id: Job ID (row ID in ``role_jobs``)
+        guild_id: Guild the job runs in
+        role_id: Role granted or revoked
+        action: ``ACTION_ADD`` or ``ACTION_REMOVE``
+        selector: Member selection the job was created with
+        created_by: User who started the job
+        status: Running, completed or cancelled
+        total: Members selected
+        succeeded: Members whose roles were changed
+        skipped: Members that already matched or left the guild
+        failed: Members the change failed for
+        concurrency: Role changes currently allowed in flight
+    """
+
+    def __init__(self, id: int, guild_id: int, role_id: int, action: str, selector: RoleSelector, created_by: int,
+                 status: str = STATUS_RUNNING, total: int = 0, succeeded: int = 0, skipped: int = 0, failed: int = 0) -> None:
+        self.id = id
+        self.guild_id = guild_id
+        self.role_id = role_id
+        self.action = action
+        self.selector = selector
+        self.created_by = created_by
+        self.status = status
+        self.total = total
+        self.succeeded = succeeded
+        self.skipped = skipped
+        self.failed = failed
+        self.concurrency = 0
+        self.cancelled = False
+        # Throughput is measured from when this process (re)started the job
+        self._started = time.monotonic()
+        self._done_at_start = self.done
+
+    @property
+    def done(self) -> int:
+        return self.succeeded + self.skipped + self.failed
+
+    @property
+    def rate(self) -> float:
+        """Members processed per second since the job (re)started"""
+        elapsed = time.monotonic() - self._started
+        return (self.done - self._done_at_start) / elapsed if elapsed > 0 else 0.0
+
+    @property
+    def eta(self) -> Optional[float]:
+        """Seconds left at the current rate"""
+        rate = self.rate
+        if self.status != STATUS_RUNNING or rate <= 0:
+            return None
+        return (self.total - self.done) / rate
+
+class RoleJobEngine:
+    """Runs bulk role changes with checkpointing in SQLite
+
+    Creating a job snapshots the selected member IDs into
+    ``role_job_members``. Members are then processed in chunks of
+    ``checkpoint_size``; each chunk's outcomes and the job counters are
+    committed together, so after a crash or restart ``resume`` continues
+    from the first unfinished chunk. Redoing part of a chunk is harmless,
+    members that already have (or lack) the role are skipped.
+
+    Concurrency adapts to rate limits: a chunk that hits a 429 or a Discord
+    server error halves it and retries those members in a later chunk, a
+    clean chunk raises it by one up to ``max_concurrency``.
+
+    Attributes:
+        bot: Bot whose guild cache provides members and roles
+        db: Database holding the job tables
+        max_concurrency: Upper bound for role changes in flight
+        checkpoint_size: Members per checkpoint
+        on_change: Called as (guild_id, user_id, role_id, by, is_add) after each change
+        backoff: Seconds to wait after a throttled chunk
+    """
+
+    def __init__(self, bot: discord.Client, db, max_concurrency: int = 5, checkpoint_size: int = 100,
+                 on_change: Optional[RoleChange] = None, backoff: float = 1.0) -> None:
+        self.bot = bot
+        self.db = db
+        self.max_concurrency = max(1, max_concurrency)
+        self.checkpoint_size = max(1, checkpoint_size)
+        self.on_change = on_change
+        self.backoff = backoff
+        self.jobs: Dict[int, RoleJob] = {}
+        self._tasks: Dict[int, asyncio.Task] = {}
+        self.backoffs = 0
+
+    async def create(self, guild: discord.Guild, role: discord.Role, action: str, selector: RoleSelector, created_by: int) -> RoleJob:
+        """Snapshot the selected members and start a job
+
+        Raises:
+            ValueError: If the action is unknown
+        """
+        if action not in ACTIONS:
+            raise ValueError(f"Unknown role job action: {action}")
+        member_ids = [member.id for member in selector.select(guild.members)]
+
+        async with self.db.transaction() as cursor:
+            await cursor.execute("""
+                INSERT INTO role_jobs (guild_id, role_id, action, selector, created_by, status, total)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, (guild.id, role.id, action, selector.to_json(), created_by, STATUS_RUNNING, len(member_ids)))
+            job_id = cursor.lastrowid
+            for chunk in chunked(member_ids, INSERT_CHUNK):
+                await cursor.executemany(
+                    "INSERT INTO role_job_members (job_id, user_id) VALUES (?, ?)",
+                    [(job_id, member_id) for member_id in chunk]
+                )
+
+        job = RoleJob(job_id, guild.id, role.id, action, selector, created_by, total=len(member_ids))
+        self.jobs[job_id] = job
+        self._start(job)
+        logger.info(f"Started role job #{job_id}: {action} role {role.id} for {len(member_ids)} members in {guild.id}")
+        return job
+
+    async def resume(self) -> List[RoleJob]:
+        """Restart jobs that were running when the bot stopped"""
+        async with self.db.read() as cursor:
+            await cursor.execute("""
+                SELECT id, guild_id, role_id, action, selector, created_by, status, total, succeeded, skipped, failed
+                FROM role_jobs WHERE status = ?
+            """, (STATUS_RUNNING,))
+            rows = await cursor.fetchall()
+
+        resumed = []
+        for row in rows:
+            job_id = row[0]
+            if job_id in self._tasks:
+                continue
+            job = RoleJob(
+                job_id, row[1], row[2], row[3], RoleSelector.from_json(row[4]), row[5],
+                row[6], row[7], row[8], row[9], row[10]
+            )
+            if not self.bot.get_guild(job.guild_id):
+                continue
+            self.jobs[job_id] = job
+            self._start(job)
+            resumed.append(job)
+            logger.info(f"Resumed role job #{job_id} at {job.done}/{job.total}")
+        return resumed
+
+    def _start(self, job: RoleJob) -> None:
+        self._tasks[job.id] = asyncio.create_task(self._run(job))
+
+    async def get(self, job_id: int) -> Optional[RoleJob]:
+        """Get a job, loading finished ones from the database"""
+        job = self.jobs.get(job_id)
+        if job:
+            return job
+        async with self.db.read() as cursor:
+            await cursor.execute("""
+                SELECT id, guild_id, role_id, action, selector, created_by, status, total, succeeded, skipped, failed
+                FROM role_jobs WHERE id = ?
+            """, (job_id,))
+            row = await cursor.fetchone()
+        if row is None:
+            return None
+        return RoleJob(
+            row[0], row[1], row[2], row[3], RoleSelector.from_json(row[4]), row[5],
+            row[6], row[7], row[8], row[9], row[10]
+        )
+
+    async def latest(self, guild_id: int) -> Optional[RoleJob]:
+        """Get the most recent job in a guild"""
+        async with self.db.read() as cursor:
+            await cursor.execute("SELECT MAX(id) FROM role_jobs WHERE guild_id = ?", (guild_id,))
+            row = await cursor.fetchone()
+        return await self.get(row[0]) if row and row[0] else None
+
+    def cancel(self, job_id: int) -> bool:
+        """Stop a running job after its current chunk
+
+        Returns:
+            True if the job was running
+        """
+        job = self.jobs.get(job_id)
+        if not job or job.status != STATUS_RUNNING:
+            return False
+        job.cancelled = True
+        return True
+
+    async def _pending(self, job: RoleJob) -> List[int]:
+        async with self.db.read() as cursor:
+            await cursor.execute("""
+                SELECT user_id FROM role_job_members
+                WHERE job_id = ? AND state = 'pending'
+                LIMIT ?
+            """, (job.id, self.checkpoint_size))
+            return [row[0] for row in await cursor.fetchall()]
+
+    async def _run(self, job: RoleJob) -> None:
+        job.concurrency = self.max_concurrency
+        try:
+            while not job.cancelled:
+                guild = self.bot.get_guild(job.guild_id)
+                role = guild.get_role(job.role_id) if guild else None
+                if role is None:
+                    logger.warning(f"Role job #{job.id} stopped: guild or role is gone")
+                    job.cancelled = True
+                    break
+                pending = await self._pending(job)
+                if not pending:
+                    break
+                await self._run_chunk(job, guild, role, pending)
+            await self._finish(job, STATUS_CANCELLED if job.cancelled else STATUS_COMPLETED)
+        except Exception as e:
+            # Leave the job running in the database so the next start resumes it
+            logger.error(f"Role job #{job.id} interrupted: {e}")
+        finally:
+            self._tasks.pop(job.id, None)
+
+    async def _run_chunk(self, job: RoleJob, guild: discord.Guild, role: discord.Role, user_ids: List[int]) -> None:
+        """Apply the job to one chunk of members and checkpoint the outcome"""
+        is_add = job.action == ACTION_ADD
+        reason = f"Bulk role job #{job.id}"
+        states: Dict[int, str] = {}
+        throttled = []
+
+        async def change(user_id: int) -> bool:
+            member = guild.get_member(user_id)
+            if member is None or (role in member.roles) == is_add:
+                states[user_id] = 'skipped'
+                return False
+            try:
+                if is_add:
+                    await member.add_roles(role, reason=reason)
+                else:
+                    await member.remove_roles(role, reason=reason)
+            except discord.HTTPException as e:
+                if e.status == 429 or e.status >= 500:
+                    # Retry in a later chunk at a lower concurrency
+                    throttled.append(user_id)
+                    return False
+                raise
+            states[user_id] = 'succeeded'
+            if self.on_change:
+                await self.on_change(guild.id, user_id, role.id, job.created_by, is_add)
+            return True
+
+        result = await run_bulk(user_ids, change, concurrency=job.concurrency)
+        errors = {user_id: error for user_id, error in result.failed}
+        for user_id in errors:
+            states[user_id] = 'failed'
+
+        if throttled:
+            self.backoffs += 1
+            job.concurrency = max(1, job.concurrency // 2)
+            logger.warning(f"Role job #{job.id} throttled, concurrency now {job.concurrency}")
+            await asyncio.sleep(self.backoff)
+        else:
+            job.concurrency = min(self.max_concurrency, job.concurrency + 1)
+
+        counts = {'succeeded': 0, 'skipped': 0, 'failed': 0}
+        for state in states.values():
+            counts[state] += 1
+        async with self.db.transaction() as cursor:
+            await cursor.executemany("""
+                UPDATE role_job_members SET state = ?, error = ?
+                WHERE job_id = ? AND user_id = ?
+            """, [(state, errors.get(user_id), job.id, user_id) for user_id, state in states.items()])
+            await cursor.execute("""
+                UPDATE role_jobs SET succeeded = succeeded + ?, skipped = skipped + ?, failed = failed + ?,
+                    updated_at = CURRENT_TIMESTAMP
+                WHERE id = ?
+            """, (counts['succeeded'], counts['skipped'], counts['failed'], job.id))
+        job.succeeded += counts['succeeded']
+        job.skipped += counts['skipped']
+        job.failed += counts['failed']
+
+    async def _finish(self, job: RoleJob, status: str) -> None:
+        await self.db.submit(
+            "UPDATE role_jobs SET status = ?, updated_at = CURRENT_TIMESTAMP WHERE id = ?",
+            (status, job.id)
+        )
+        job.status = status
+        logger.info(f"Role job #{job.id} {status}: {job.succeeded} changed, {job.skipped} skipped, {job.failed} failed")
+
+    async def close(self) -> None:
+        """Stop running jobs; they stay running in the database and resume on next start"""
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get engine metrics"""
+        running = [job for job in self.jobs.values() if job.status == STATUS_RUNNING]
+        return {
+            "running": len(running),
+            "pending_members": sum(job.total - job.done for job in running),
+            "members_per_second": sum(job.rate for job in running),
+            "backoffs": self.backoffs
+        }
@@ -0,0 +1,148 @@
+import asyncio
+import logging
+import time
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+import discord
+
+from utils.metrics import Histogram
+from utils.write_behind import WriteBehindBuffer
+
+logger = logging.getLogger('discord')
+
+class RoleReconciler:
+    """Keeps ``user_roles`` in sync with the live guild state
+
+    ``reconcile`` diffs a guild's member cache against the table. Members
+    are sorted by user ID and walked in chunks of
+    ``chunk_size``; each chunk reads only its own key range from the
+    primary key index and compares two sets of (user, role) pairs, so
+    memory stays bounded by the chunk however large the guild is. Rows for
+    members who left fall inside some chunk's range and are removed too.
+
+    After that, ``on_member_update`` / ``on_member_remove`` /
+    ``on_guild_role_delete`` keep the table current. Every change goes
+    through the shared write-behind buffer with ``assigned_by`` set to None,
+    meaning "observed, assigner unknown", which the writer stores without
+    overwriting an assigner the bot recorded itself.
+
+    Attributes:
+        db: Database holding ``user_roles``
+        buffer: Write-behind buffer of role changes keyed by (guild, user, role)
+        chunk_size: Members diffed per chunk
+    """
+
+    def __init__(self, db, buffer: WriteBehindBuffer, chunk_size: int = 5000) -> None:
+        self.db = db
+        self.buffer = buffer
+        self.chunk_size = max(1, chunk_size)
+        self._running: Set[int] = set()
+        self.reconcile_time = Histogram()
+        self.reconciles = 0
+        self.added = 0
+        self.removed = 0
+        self.updates = 0
+
+    @staticmethod
+    def member_pairs(member: discord.Member) -> Set[Tuple[int, int]]:
+        """(user, role) pairs a member should have, @everyone excluded"""
+        return {(member.id, role.id) for role in member.roles if not role.is_default()}
+
+    def _put(self, guild_id: int, pairs: Iterable[Tuple[int, int]], is_add: bool) -> int:
+        count = 0
+        for user_id, role_id in pairs:
+            self.buffer.put((guild_id, user_id, role_id), (None, is_add))
+            count += 1
+        return count
+
+    async def _stored(self, guild_id: int, low: Optional[int], high: Optional[int]) -> Set[Tuple[int, int]]:
+        """Rows stored for user IDs in [low, high), either bound may be open"""
+        query = "SELECT user_id, role_id FROM user_roles WHERE guild_id = ?"
+        params: List[Any] = [guild_id]
+        if low is not None:
+            query += " AND user_id >= ?"
+            params.append(low)
+        if high is not None:
+            query += " AND user_id < ?"
+            params.append(high)
+        async with self.db.read() as cursor:
+            await cursor.execute(query, params)
+            return {(row[0], row[1]) for row in await cursor.fetchall()}
+
+    async def reconcile(self, guild: discord.Guild) -> Dict[str, int]:
+        """Diff a guild's members against ``user_roles`` and queue the fixes
+
+        Returns:
+            Rows added and removed
+        """
+        if guild.id in self._running:
+            return {"added": 0, "removed": 0}
+        self._running.add(guild.id)
+        start = time.perf_counter()
+        added = removed = 0
+        try:
+            # Start from a table that includes every change already buffered
+            await self.buffer.flush()
+            if not guild.chunked:
+                await guild.chunk()
+            members = sorted(guild.members, key=lambda member: member.id)
+            for index in range(0, max(len(members), 1), self.chunk_size):
+                chunk = members[index:index + self.chunk_size]
+                # The first chunk also covers IDs below it, the last everything above
+                low = chunk[0].id if index and chunk else None
+                following = index + self.chunk_size
+                high = members[following].id if following < len(members) else None
+
+                stored = await self._stored(guild.id, low, high)
+                # Read the cache only now: member events handled during the
+                # read above are in the buffer and must not be overwritten
+                # by an older view. Nothing awaits from here to the puts.
+                live: Set[Tuple[int, int]] = set()
+                for member in chunk:
+                    live |= self.member_pairs(member)
+
+                added += self._put(guild.id, live - stored, True)
+                removed += self._put(guild.id, stored - live, False)
+                if self.buffer.depth >= self.buffer.max_batch:
+                    # Write as we go so the backlog never holds more than a chunk
+                    await self.buffer.flush()
+                await asyncio.sleep(0)
+            await self.buffer.flush()
+        finally:
+            self._running.discard(guild.id)
+
+        elapsed = time.perf_counter() - start
+        self.reconcile_time.observe(elapsed)
+        self.reconciles += 1
+        self.added += added
+        self.removed += removed
+        logger.info(f"Reconciled user_roles for {guild.id} in {elapsed:.2f}s: {added} added, {removed} removed")
+        return {"added": added, "removed": removed}
+
+    async def on_member_update(self, before: discord.Member, after: discord.Member) -> None:
+        if before.roles == after.roles:
+            return
+        old, new = self.member_pairs(before), self.member_pairs(after)
+        self.updates += self._put(after.guild.id, new - old, True)
+        self.updates += self._put(after.guild.id, old - new, False)
+
+    async def on_member_remove(self, member: discord.Member) -> None:
+        self.updates += self._put(member.guild.id, self.member_pairs(member), False)
+
+    async def on_guild_role_delete(self, role: discord.Role) -> None:
+        # Holders may already be gone from the cache, clear the role directly
+        await self.buffer.flush()
+        self.updates += await self.db.submit(
+            "DELETE FROM user_roles WHERE guild_id = ? AND role_id = ?",
+            (role.guild.id, role.id)
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        """Get reconciler metrics"""
+        return {
+            "reconciles": self.reconciles,
+            "added": self.added,
+            "removed": self.removed,
+            "incremental_updates": self.updates,
+            "reconcile_time": self.reconcile_time.snapshot()
+        }
@@ -1,8 +1,13 @@
+-- Discord snowflakes are stored as INTEGER. Tables keyed by a composite
+-- primary key are WITHOUT ROWID so the key is the table and needs no
+-- separate index. Bump SCHEMA_VERSION in utils/migrations.py with any
+-- change existing databases need converted for.
+
 -- Guilds table
 CREATE TABLE IF NOT EXISTS guilds (
-    id TEXT PRIMARY KEY,
+    id INTEGER PRIMARY KEY,
     name TEXT NOT NULL,
-    owner_id TEXT NOT NULL,
+    owner_id INTEGER NOT NULL,
     member_count INTEGER NOT NULL,
     created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
     updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
@@ -10,36 +15,92 @@ CREATE TABLE IF NOT EXISTS guilds (
 
 -- Bot settings table
 CREATE TABLE IF NOT EXISTS bot_settings (
-    guild_id TEXT PRIMARY KEY,
+    guild_id INTEGER PRIMARY KEY,
     prefix TEXT DEFAULT '!',
-    welcome_channel_id TEXT,
-    audit_log_channel_id TEXT,
-    role_log_channel_id TEXT,
+    welcome_channel_id INTEGER,
+    audit_log_channel_id INTEGER,
+    role_log_channel_id INTEGER,
     FOREIGN KEY(guild_id) REFERENCES guilds(id) ON DELETE CASCADE
 );
 
 -- User roles tracking table
 CREATE TABLE IF NOT EXISTS user_roles (
-    guild_id TEXT NOT NULL,
-    user_id TEXT NOT NULL,
-    role_id TEXT NOT NULL,
-    assigned_by TEXT NOT NULL,
+    guild_id INTEGER NOT NULL,
+    user_id INTEGER NOT NULL,
+    role_id INTEGER NOT NULL,
+    assigned_by INTEGER NOT NULL,
     assigned_at DATETIME DEFAULT CURRENT_TIMESTAMP,
     PRIMARY KEY (guild_id, user_id, role_id),
     FOREIGN KEY(guild_id) REFERENCES guilds(id) ON DELETE CASCADE
-);
-CREATE INDEX IF NOT EXISTS idx_user_roles_guild ON user_roles(guild_id);
+) WITHOUT ROWID;
+-- Clearing a deleted role
+CREATE INDEX IF NOT EXISTS idx_user_roles_role ON user_roles(guild_id, role_id);
 
 -- Command usage tracking table
 CREATE TABLE IF NOT EXISTS command_usage (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
-    guild_id TEXT NOT NULL,
-    user_id TEXT NOT NULL,
+    guild_id INTEGER NOT NULL,
+    user_id INTEGER NOT NULL,
     command_name TEXT NOT NULL,
     used_at DATETIME DEFAULT CURRENT_TIMESTAMP,
     success BOOLEAN DEFAULT 1,
     error_message TEXT,
     FOREIGN KEY(guild_id) REFERENCES guilds(id) ON DELETE CASCADE
 );
-CREATE INDEX IF NOT EXISTS idx_command_usage_guild ON command_usage(guild_id);
-CREATE INDEX IF NOT EXISTS idx_command_usage_user ON command_usage(user_id);
+-- Per-user command history; rollup and retention walk the id instead
+CREATE INDEX IF NOT EXISTS idx_command_usage_user_command ON command_usage(guild_id, user_id, command_name, used_at);
+
+-- Command usage rollups, filled from command_usage by the compaction job
+-- Minute rollups are only ever purged by age, so the key leads with the minute
+CREATE TABLE IF NOT EXISTS command_usage_minute (
+    minute DATETIME NOT NULL,
+    guild_id INTEGER NOT NULL,
+    command_name TEXT NOT NULL,
+    success BOOLEAN NOT NULL,
+    uses INTEGER NOT NULL,
+    PRIMARY KEY (minute, guild_id, command_name, success)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS command_usage_daily (
+    guild_id INTEGER NOT NULL,
+    day DATE NOT NULL,
+    command_name TEXT NOT NULL,
+    success BOOLEAN NOT NULL,
+    uses INTEGER NOT NULL,
+    PRIMARY KEY (guild_id, day, command_name, success)
+) WITHOUT ROWID;
+
+-- Highest command_usage row ID already counted in the rollups
+CREATE TABLE IF NOT EXISTS usage_rollup_state (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    rolled_up_to INTEGER NOT NULL
+);
+
+-- Bulk role jobs and their per-member checkpoints
+CREATE TABLE IF NOT EXISTS role_jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    guild_id INTEGER NOT NULL,
+    role_id INTEGER NOT NULL,
+    action TEXT NOT NULL,
+    selector TEXT NOT NULL,
+    created_by INTEGER NOT NULL,
+    status TEXT NOT NULL DEFAULT 'running',
+    total INTEGER NOT NULL DEFAULT 0,
+    succeeded INTEGER NOT NULL DEFAULT 0,
+    skipped INTEGER NOT NULL DEFAULT 0,
+    failed INTEGER NOT NULL DEFAULT 0,
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS idx_role_jobs_status ON role_jobs(status);
+CREATE INDEX IF NOT EXISTS idx_role_jobs_guild ON role_jobs(guild_id);
+
+CREATE TABLE IF NOT EXISTS role_job_members (
+    job_id INTEGER NOT NULL,
+    user_id INTEGER NOT NULL,
+    state TEXT NOT NULL DEFAULT 'pending',
+    error TEXT,
+    PRIMARY KEY (job_id, user_id),
+    FOREIGN KEY(job_id) REFERENCES role_jobs(id) ON DELETE CASCADE
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_role_job_members_state ON role_job_members(job_id, state);
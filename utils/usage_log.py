@@ -0,0 +1,109 @@
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger('discord')
+
+_INSERT = """
+    INSERT INTO command_usage (guild_id, user_id, command_name, success, error_message)
+    VALUES (?, ?, ?, ?, ?)
+"""
+
+class CommandUsageWriter:
+    """Batches command_usage rows and writes them off the command path
+
+    Rows are buffered in memory and inserted with one ``executemany`` per
+    batch, flushed when ``batch_size`` rows are waiting or every
+    ``flush_interval`` seconds, and on close. If the buffer reaches
+    ``max_pending`` because the database is down, the oldest rows are dropped
+    instead of growing without bound.
+
+    Attributes:
+        db: Database used for writes
+        batch_size: Rows that trigger an immediate flush
+        flush_interval: Seconds between background flushes
+        max_pending: Rows buffered before the oldest are dropped
+    """
+
+    def __init__(self, db, batch_size: int = 100, flush_interval: float = 2.0, max_pending: int = 10000) -> None:
+        self.db = db
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self._pending: List[Tuple[str, str, str, bool, Optional[str]]] = []
+        self._task: Optional[asyncio.Task] = None
+        self._wake = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self.written = 0
+        self.dropped = 0
+        self.flushes = 0
+        self.failures = 0
+
+    def start(self) -> None:
+        """Start the background flush task"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    def record(self, guild_id: int, user_id: int, command_name: str, success: bool = True, error_message: Optional[str] = None) -> None:
+        """Buffer one usage row"""
+        self._pending.append((guild_id, user_id, command_name, success, error_message))
+        if len(self._pending) > self.max_pending:
+            overflow = len(self._pending) - self.max_pending
+            del self._pending[:overflow]
+            self.dropped += overflow
+        if len(self._pending) >= self.batch_size:
+            self._wake.set()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            await self.flush()
+
+    async def flush(self) -> None:
+        """Write everything buffered so far"""
+        async with self._flush_lock:
+            if not self._pending:
+                return
+            batch, self._pending = self._pending, []
+            try:
+                async with self.db.transaction() as cursor:
+                    await cursor.executemany(_INSERT, batch)
+            except asyncio.CancelledError:
+                self._requeue(batch)
+                raise
+            except Exception as e:
+                self.failures += 1
+                logger.error(f"Failed to write {len(batch)} command usage rows: {e}")
+                self._requeue(batch)
+                return
+            self.written += len(batch)
+            self.flushes += 1
+
+    def _requeue(self, batch: List[Tuple[str, str, str, bool, Optional[str]]]) -> None:
+        """Put a failed batch back for the next flush, newest rows win if over the bound"""
+        pending = batch + self._pending
+        overflow = max(0, len(pending) - self.max_pending)
+        self.dropped += overflow
+        self._pending = pending[overflow:]
+
+    async def close(self) -> None:
+        """Stop the background task and flush what is left"""
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self.flush()
+
+    def stats(self) -> Dict[str, Any]:
+        """Get writer metrics"""
+        return {
+            "pending": len(self._pending),
+            "written": self.written,
+            "flushes": self.flushes,
+            "dropped": self.dropped,
+            "failures": self.failures
+        }
@@ -0,0 +1,252 @@
+import asyncio
+import logging
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from utils.metrics import Histogram
+
+logger = logging.getLogger('discord')
+
+# Raw rows are folded into both rollups in the same transaction as the
+# watermark update, so a row is never counted twice or lost
+_ROLLUP_MINUTE = """
+    INSERT INTO command_usage_minute (minute, guild_id, command_name, success, uses)
+    SELECT strftime('%Y-%m-%d %H:%M:00', used_at), guild_id, command_name, success, COUNT(*)
+    FROM command_usage WHERE id > ? AND id <= ?
+    GROUP BY 1, 2, 3, 4
+    ON CONFLICT (minute, guild_id, command_name, success) DO UPDATE SET uses = uses + excluded.uses
+"""
+
+_ROLLUP_DAILY = """
+    INSERT INTO command_usage_daily (guild_id, day, command_name, success, uses)
+    SELECT guild_id, date(used_at), command_name, success, COUNT(*)
+    FROM command_usage WHERE id > ? AND id <= ?
+    GROUP BY 1, 2, 3, 4
+    ON CONFLICT (guild_id, day, command_name, success) DO UPDATE SET uses = uses + excluded.uses
+"""
+
+class UsageCompactor:
+    """Background rollup and retention job for ``command_usage``
+
+    Each pass:
+
+    1. Folds raw rows older than ``rollup_after`` hours into the per-minute
+       and per-day rollup tables, ``batch_size`` rows per transaction. The
+       highest rolled-up row ID is kept in ``usage_rollup_state``.
+    2. Deletes rolled-up raw rows older than ``raw_retention`` days, and
+       minute rollups older than ``minute_retention`` days, in batches of
+       ``batch_size`` with a pause in between so writers get the connection.
+    3. Returns freed pages to the filesystem with ``incremental_vacuum``.
+
+    Daily rollups are kept, so stats read a bounded number of rows however
+    long the history is.
+
+    Attributes:
+        db: Database to compact
+        interval: Seconds between passes
+        rollup_after: Hours before a raw row is rolled up
+        raw_retention: Days raw rows are kept
+        minute_retention: Days per-minute rollups are kept
+        batch_size: Rows per rollup or delete transaction
+        pause: Seconds to yield between delete batches
+    """
+
+    def __init__(
+        self,
+        db,
+        interval: float = 3600.0,
+        rollup_after: int = 1,
+        raw_retention: int = 30,
+        minute_retention: int = 14,
+        batch_size: int = 5000,
+        pause: float = 0.05,
+        vacuum_pages: int = 1000
+    ) -> None:
+        self.db = db
+        self.interval = interval
+        self.rollup_after = rollup_after
+        self.raw_retention = max(raw_retention, 1)
+        self.minute_retention = max(minute_retention, 1)
+        self.batch_size = batch_size
+        self.pause = pause
+        self.vacuum_pages = vacuum_pages
+        self._task: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+        self.run_time = Histogram()
+        self.runs = 0
+        self.failures = 0
+        self.rolled_up = 0
+        self.deleted = 0
+        self.last_run: Optional[float] = None
+
+    def start(self) -> None:
+        """Start the background compaction task"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        """Stop the background task"""
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.run_once()
+            except Exception as e:
+                self.failures += 1
+                logger.error(f"Command usage compaction failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    async def run_once(self) -> Dict[str, int]:
+        """Run one rollup, retention and vacuum pass
+
+        Returns:
+            Rows rolled up and deleted by this pass
+        """
+        async with self._lock:
+            start = time.perf_counter()
+            rolled_up = await self.rollup()
+            deleted = await self.purge()
+            await self.vacuum()
+            self.run_time.observe(time.perf_counter() - start)
+            self.runs += 1
+            self.last_run = time.time()
+            if rolled_up or deleted:
+                logger.info(f"Command usage compaction: {rolled_up} rows rolled up, {deleted} rows deleted")
+            return {"rolled_up": rolled_up, "deleted": deleted}
+
+    async def _watermark(self, cursor) -> int:
+        await cursor.execute("SELECT rolled_up_to FROM usage_rollup_state WHERE id = 1")
+        row = await cursor.fetchone()
+        return row[0] if row else 0
+
+    async def rollup(self) -> int:
+        """Fold raw rows older than ``rollup_after`` hours into the rollups
+
+        Returns:
+            Number of raw rows rolled up
+        """
+        total = 0
+        while True:
+            async with self.db.transaction() as cursor:
+                watermark = await self._watermark(cursor)
+                await cursor.execute("""
+                    SELECT MAX(id), COUNT(*) FROM (
+                        SELECT id FROM command_usage
+                        WHERE id > ? AND used_at < datetime('now', ?)
+                        ORDER BY id LIMIT ?
+                    )
+                """, (watermark, f"-{self.rollup_after} hours", self.batch_size))
+                upper, count = await cursor.fetchone()
+                if not count:
+                    break
+                await cursor.execute(_ROLLUP_MINUTE, (watermark, upper))
+                await cursor.execute(_ROLLUP_DAILY, (watermark, upper))
+                await cursor.execute("""
+                    INSERT INTO usage_rollup_state (id, rolled_up_to) VALUES (1, ?)
+                    ON CONFLICT (id) DO UPDATE SET rolled_up_to = excluded.rolled_up_to
+                """, (upper,))
+            total += count
+            self.rolled_up += count
+            if count < self.batch_size:
+                break
+            await asyncio.sleep(0)
+        return total
+
+    async def _delete_batches(self, query: str, params: Tuple[Any, ...]) -> int:
+        total = 0
+        while True:
+            async with self.db.transaction() as cursor:
+                await cursor.execute(query, params + (self.batch_size,))
+                count = cursor.rowcount
+            total += count
+            if count < self.batch_size:
+                return total
+            await asyncio.sleep(self.pause)
+
+    async def purge(self) -> int:
+        """Delete raw rows and minute rollups past their retention
+
+        Only raw rows that were already rolled up are deleted.
+
+        Returns:
+            Number of raw rows deleted
+        """
+        async with self.db.transaction() as cursor:
+            watermark = await self._watermark(cursor)
+        deleted = await self._delete_batches("""
+            DELETE FROM command_usage WHERE id IN (
+                SELECT id FROM command_usage
+                WHERE id <= ? AND used_at < datetime('now', ?)
+                ORDER BY id LIMIT ?
+            )
+        """, (watermark, f"-{self.raw_retention} days"))
+        await self._delete_batches("""
+            DELETE FROM command_usage_minute WHERE (minute, guild_id, command_name, success) IN (
+                SELECT minute, guild_id, command_name, success FROM command_usage_minute
+                WHERE minute < datetime('now', ?)
+                ORDER BY minute LIMIT ?
+            )
+        """, (f"-{self.minute_retention} days",))
+        self.deleted += deleted
+        return deleted
+
+    async def vacuum(self) -> None:
+        """Release up to ``vacuum_pages`` free pages"""
+        async with self.db.transaction() as cursor:
+            await cursor.execute("PRAGMA auto_vacuum")
+            mode = (await cursor.fetchone())[0]
+        if mode != 2:
+            return
+        async with self.db.transaction() as cursor:
+            await cursor.execute(f"PRAGMA incremental_vacuum({int(self.vacuum_pages)})")
+            # The pragma frees pages one row at a time
+            await cursor.fetchall()
+
+    async def command_totals(self, guild_id: int, days: int = 30) -> List[Tuple[str, int, int]]:
+        """Get per-command uses for the last ``days`` days
+
+        Reads the daily rollup plus the raw rows not rolled up yet, which
+        cover at most ``rollup_after`` hours plus one compaction interval.
+
+        Args:
+            guild_id: Guild to report on
+            days: Days to include, today counted
+
+        Returns:
+            (command name, successful uses, failed uses) sorted by total uses
+        """
+        since = f"-{max(days, 1) - 1} days"
+        async with self.db.read() as cursor:
+            watermark = await self._watermark(cursor)
+            # The unary + keeps the raw branch on the id range (the short
+            # un-rolled tail) instead of the guild's rows in the user index
+            await cursor.execute("""
+                SELECT command_name,
+                       SUM(CASE WHEN success THEN uses ELSE 0 END),
+                       SUM(CASE WHEN success THEN 0 ELSE uses END)
+                FROM (
+                    SELECT command_name, success, uses FROM command_usage_daily
+                    WHERE guild_id = ? AND day >= date('now', ?)
+                    UNION ALL
+                    SELECT command_name, success, 1 FROM command_usage
+                    WHERE id > ? AND +guild_id = ? AND used_at >= date('now', ?)
+                )
+                GROUP BY command_name
+                ORDER BY SUM(uses) DESC
+            """, (guild_id, since, watermark, guild_id, since))
+            return [(row[0], row[1], row[2]) for row in await cursor.fetchall()]
+
+    def stats(self) -> Dict[str, Any]:
+        """Get compaction metrics"""
+        return {
+            "runs": self.runs,
+            "failures": self.failures,
+            "rolled_up": self.rolled_up,
+            "deleted": self.deleted,
+            "last_run": self.last_run,
+            "run_time": self.run_time.snapshot()
+        }
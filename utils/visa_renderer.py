@@ -0,0 +1,196 @@
+import asyncio
+import hashlib
+import io
+import logging
+import multiprocessing
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from typing import Any, Dict, Optional
+
+from utils.imaging import Image, ImageDraw, RENDERING_AVAILABLE, circle_mask, draw_text
+from utils.metrics import Histogram
+
+logger = logging.getLogger('discord')
+
+DECISION_ACCEPTED = 'accepted'
+DECISION_REJECTED = 'rejected'
+
+BACKGROUNDS = {
+    DECISION_ACCEPTED: 'assets/accept.png',
+    DECISION_REJECTED: 'assets/reject.png'
+}
+
+# Card layout: the ticket image on top, a details panel underneath
+PANEL_HEIGHT = 170
+PANEL_COLOR = (15, 15, 15, 255)
+ACCENT_COLORS = {
+    DECISION_ACCEPTED: (8, 194, 153, 255),
+    DECISION_REJECTED: (230, 70, 70, 255)
+}
+AVATAR_SIZE = 130
+MARGIN = 30
+
+# Per-process cache, each pool worker decodes the backgrounds once
+
+@lru_cache(maxsize=4)
+def _background(decision: str):
+    """Ticket image plus the empty details panel, ready to copy per render"""
+    ticket = Image.open(BACKGROUNDS[decision]).convert('RGBA')
+    card = Image.new('RGBA', (ticket.width, ticket.height + PANEL_HEIGHT), PANEL_COLOR)
+    card.paste(ticket, (0, 0))
+    draw = ImageDraw.Draw(card)
+    draw.rectangle((0, ticket.height, card.width, ticket.height + 4), fill=ACCENT_COLORS[decision])
+    return card
+
+def render_card(
+    decision: str,
+    name: str,
+    reviewer: str,
+    date: str,
+    reason: Optional[str] = None,
+    avatar: Optional[bytes] = None
+) -> bytes:
+    """Render a visa card to PNG bytes (blocking, runs in the process pool)
+
+    Args:
+        decision: ``accepted`` or ``rejected``
+        name: Applicant display name
+        reviewer: Reviewer display name
+        date: Decision date, already formatted
+        reason: Rejection reason, if any
+        avatar: Applicant avatar image bytes
+    """
+    card = _background(decision).copy()
+    draw = ImageDraw.Draw(card)
+    top = card.height - PANEL_HEIGHT + MARGIN
+    text_left = MARGIN
+
+    if avatar:
+        try:
+            image = Image.open(io.BytesIO(avatar)).convert('RGBA').resize((AVATAR_SIZE, AVATAR_SIZE))
+            card.paste(image, (MARGIN, top - 10), circle_mask(AVATAR_SIZE))
+            text_left = MARGIN * 2 + AVATAR_SIZE
+        except Exception as e:
+            logger.warning(f"Could not draw avatar on visa card: {e}")
+
+    max_width = card.width - text_left - MARGIN
+    draw_text(draw, (text_left, top + 30), name, 52, max_width, (255, 255, 255, 255))
+    draw_text(draw, (text_left, top + 75), f"{decision.upper()} by {reviewer} - {date}", 28, max_width, ACCENT_COLORS[decision])
+    if reason:
+        draw_text(draw, (text_left, top + 112), f"Reason: {reason}", 24, max_width, (200, 200, 200, 255))
+
+    output = io.BytesIO()
+    card.save(output, format='PNG', optimize=False)
+    return output.getvalue()
+
+def card_key(decision: str, name: str, reviewer: str, date: str, reason: Optional[str], avatar: Optional[bytes]) -> str:
+    """Content hash of everything that ends up on a card"""
+    digest = hashlib.sha256()
+    for part in (decision, name, reviewer, date, reason or ''):
+        digest.update(part.encode('utf-8'))
+        digest.update(b'\0')
+    digest.update(avatar or b'')
+    return digest.hexdigest()
+
+class VisaRenderer:
+    """Renders personalized visa cards in a process pool
+
+    Rendering is CPU-bound, so it runs in worker processes instead of the
+    event loop. Each worker keeps its decoded font and background layers.
+    Finished cards are cached by a content hash, re-sending the same
+    decision doesn't render again.
+
+    Attributes:
+        max_workers: Worker processes in the pool
+        cache_size: Rendered cards kept in memory
+    """
+
+    def __init__(self, max_workers: int = 2, cache_size: int = 64) -> None:
+        self.max_workers = max_workers
+        self.cache_size = cache_size
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._cache: 'OrderedDict[str, bytes]' = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.render_time = Histogram()
+        self.renders = 0
+        self.hits = 0
+        self.failures = 0
+
+    @property
+    def available(self) -> bool:
+        return RENDERING_AVAILABLE
+
+    def _pool(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # Spawned, not forked: a fork would copy locks held by the bot's other threads
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=multiprocessing.get_context('spawn'))
+        return self._executor
+
+    async def render(
+        self,
+        decision: str,
+        name: str,
+        reviewer: str,
+        date: str,
+        reason: Optional[str] = None,
+        avatar: Optional[bytes] = None
+    ) -> Optional[bytes]:
+        """Render a visa card
+
+        Returns:
+            PNG bytes, or None if rendering is unavailable or failed
+        """
+        if not self.available:
+            return None
+
+        key = card_key(decision, name, reviewer, date, reason, avatar)
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            self.hits += 1
+            return self._cache[key]
+
+        future = self._inflight.get(key)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = loop.run_in_executor(self._pool(), render_card, decision, name, reviewer, date, reason, avatar)
+            self._inflight[key] = future
+            started = time.perf_counter()
+            try:
+                png = await asyncio.shield(future)
+            except Exception as e:
+                self.failures += 1
+                logger.error(f"Failed to render visa card: {e}")
+                return None
+            finally:
+                self._inflight.pop(key, None)
+            self.renders += 1
+            self.render_time.observe(time.perf_counter() - started)
+
+            self._cache[key] = png
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+            return png
+
+        try:
+            return await asyncio.shield(future)
+        except Exception:
+            return None
+
+    def close(self) -> None:
+        """Shut down the worker processes"""
+        if self._executor:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def stats(self) -> Dict[str, Any]:
+        """Get renderer metrics"""
+        return {
+            "available": self.available,
+            "cached": len(self._cache),
+            "renders": self.renders,
+            "hits": self.hits,
+            "failures": self.failures,
+            "render_time": self.render_time.snapshot()
+        }
@@ -0,0 +1,249 @@
+import asyncio
+import logging
+import random
+from typing import Any, Dict, List, Optional, Set
+
+import discord
+
+from utils.metrics import Histogram
+
+logger = logging.getLogger('discord')
+
+class VoiceConnectionManager:
+    """Owns one voice connection per guild for the welcome system
+
+    A bot can only be in one voice channel per guild, so guilds with several
+    welcome channels share a connection that is moved between them instead of
+    being torn down and reconnected.
+
+    Connects are single-flight: concurrent callers for the same guild wait on
+    one in-flight attempt, which retries with jittered exponential backoff.
+    Reconnects are driven by disconnect events rather than polling.
+
+    Attributes:
+        bot: Discord bot instance
+        timeout: Voice connect timeout in seconds
+        base_delay: Initial retry delay in seconds
+        max_delay: Retry delay cap in seconds
+        max_attempts: Connect attempts before giving up
+        _connections: Voice client per guild ID
+        _channels: Welcome channel IDs per guild ID
+        _channel_guilds: Guild ID per welcome channel ID
+        _wanted: Channel each guild should be connected to, cleared on release
+        _inflight: In-flight connect task per guild ID
+        _disconnected_at: Loop time each guild lost its connection
+    """
+
+    def __init__(
+        self,
+        bot: discord.Client,
+        timeout: float = 30.0,
+        base_delay: float = 5.0,
+        max_delay: float = 60.0,
+        max_attempts: int = 5
+    ) -> None:
+        self.bot = bot
+        self.timeout = timeout
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_attempts = max(1, max_attempts)
+        self._connections: Dict[int, discord.VoiceClient] = {}
+        self._channels: Dict[int, List[int]] = {}
+        self._channel_guilds: Dict[int, int] = {}
+        self._wanted: Dict[int, int] = {}
+        self._inflight: Dict[int, asyncio.Task] = {}
+        self._disconnected_at: Dict[int, float] = {}
+        self._locks: Dict[int, asyncio.Lock] = {}
+        self.connect_attempts = 0
+        self.connect_failures = 0
+        self.disconnects = 0
+        self.reconnects = 0
+        self.time_to_reconnect = Histogram(buckets=(0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0))
+
+    def register_channel(self, guild_id: int, channel_id: int) -> None:
+        """Register a welcome channel for a guild"""
+        if channel_id in self._channel_guilds:
+            return
+        self._channel_guilds[channel_id] = guild_id
+        self._channels.setdefault(guild_id, []).append(channel_id)
+
+    def is_welcome_channel(self, channel_id: int) -> bool:
+        """Check if a channel is a registered welcome channel"""
+        return channel_id in self._channel_guilds
+
+    def guild_for(self, channel_id: int) -> Optional[int]:
+        """Get the guild a welcome channel belongs to"""
+        return self._channel_guilds.get(channel_id)
+
+    def guild_channels(self, guild_id: int) -> List[int]:
+        """Get the welcome channels registered for a guild, primary first"""
+        return self._channels.get(guild_id, [])
+
+    def primary_channel(self, guild_id: int) -> Optional[int]:
+        """Get the first registered welcome channel for a guild"""
+        channels = self._channels.get(guild_id)
+        return channels[0] if channels else None
+
+    @property
+    def guild_ids(self) -> Set[int]:
+        """Guilds with at least one welcome channel"""
+        return set(self._channels)
+
+    def get(self, guild_id: int) -> Optional[discord.VoiceClient]:
+        """Get the live voice client for a guild, if connected"""
+        voice_client = self._connections.get(guild_id)
+        if voice_client and voice_client.is_connected():
+            return voice_client
+        return None
+
+    def is_connecting(self, guild_id: int) -> bool:
+        """Check if a connect attempt is in flight for a guild"""
+        return guild_id in self._inflight
+
+    def _lock(self, guild_id: int) -> asyncio.Lock:
+        lock = self._locks.get(guild_id)
+        if lock is None:
+            lock = self._locks[guild_id] = asyncio.Lock()
+        return lock
+
+    def backoff(self, attempt: int) -> float:
+        """Get the jittered delay before retry number ``attempt`` (0-based)
+
+        Equal jitter: half the exponential delay is fixed, half is random, so
+        guilds dropped together don't retry in lockstep.
+        """
+        delay = min(self.max_delay, self.base_delay * (2 ** attempt))
+        return delay / 2 + random.uniform(0, delay / 2)
+
+    async def acquire(self, channel: discord.VoiceChannel) -> discord.VoiceClient:
+        """Get a voice connection in the given channel
+
+        Reuses the guild's connection when it is already in the channel and
+        moves it when it is in another one. Concurrent callers share a single
+        connect attempt.
+
+        Raises:
+            discord.ClientException: If the connection cannot be established
+            asyncio.TimeoutError: If connecting times out
+        """
+        guild = channel.guild
+        self._wanted[guild.id] = channel.id
+
+        # discord.py tracks the guild's voice client itself, no scan needed
+        voice_client = self.get(guild.id) or guild.voice_client
+        if not (voice_client and voice_client.is_connected()):
+            voice_client = await self._single_flight(channel)
+        self._connections[guild.id] = voice_client
+
+        if voice_client.channel.id != channel.id:
+            async with self._lock(guild.id):
+                if voice_client.channel.id != channel.id:
+                    await voice_client.move_to(channel)
+        return voice_client
+
+    async def _single_flight(self, channel: discord.VoiceChannel) -> discord.VoiceClient:
+        """Join the in-flight connect for the guild, starting one if needed"""
+        guild_id = channel.guild.id
+        task = self._inflight.get(guild_id)
+        if task is None:
+            task = asyncio.create_task(self._connect(channel))
+            self._inflight[guild_id] = task
+            task.add_done_callback(lambda done: self._inflight.pop(guild_id, None))
+        return await asyncio.shield(task)
+
+    async def _connect(self, channel: discord.VoiceChannel) -> discord.VoiceClient:
+        """Connect to a channel, retrying with backoff"""
+        guild = channel.guild
+        for attempt in range(self.max_attempts):
+            self.connect_attempts += 1
+            try:
+                stale = guild.voice_client
+                if stale and not stale.is_connected():
+                    # Left over from a dropped connection
+                    await stale.disconnect(force=True)
+
+                voice_client = await channel.connect(
+                    timeout=self.timeout,
+                    reconnect=True,
+                    self_deaf=False,
+                    self_mute=False
+                )
+            except Exception as e:
+                self.connect_failures += 1
+                if attempt + 1 >= self.max_attempts:
+                    logger.error(f"Giving up connecting to {channel.name} after {attempt + 1} attempts: {e}")
+                    raise
+                delay = self.backoff(attempt)
+                logger.warning(f"Failed to connect to {channel.name} ({e}), retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+                continue
+
+            self._connections[guild.id] = voice_client
+            disconnected_at = self._disconnected_at.pop(guild.id, None)
+            if disconnected_at is not None:
+                self.reconnects += 1
+                self.time_to_reconnect.observe(asyncio.get_running_loop().time() - disconnected_at)
+            logger.info(f"Connected to welcome channel: {channel.name}")
+            return voice_client
+
+        raise discord.ClientException(f"Could not connect to {channel.name}")
+
+    def handle_disconnect(self, guild_id: int) -> None:
+        """React to the bot leaving voice in a guild
+
+        Schedules a reconnect to the wanted channel unless the connection was
+        released on purpose.
+        """
+        self._connections.pop(guild_id, None)
+        channel_id = self._wanted.get(guild_id)
+        if channel_id is None:
+            return
+
+        self.disconnects += 1
+        self._disconnected_at.setdefault(guild_id, asyncio.get_running_loop().time())
+        channel = self.bot.get_channel(channel_id)
+        if not isinstance(channel, discord.VoiceChannel):
+            logger.error(f"Could not find welcome voice channel with ID {channel_id}")
+            return
+        if guild_id not in self._inflight:
+            asyncio.create_task(self._reconnect(channel))
+
+    async def _reconnect(self, channel: discord.VoiceChannel) -> None:
+        """Reconnect after a disconnect event"""
+        try:
+            await self.acquire(channel)
+        except Exception as e:
+            logger.error(f"Failed to reconnect to {channel.name}: {e}")
+
+    async def release(self, guild_id: int) -> None:
+        """Disconnect and forget the voice connection for a guild"""
+        self._wanted.pop(guild_id, None)
+        self._disconnected_at.pop(guild_id, None)
+        async with self._lock(guild_id):
+            voice_client = self._connections.pop(guild_id, None)
+            if voice_client:
+                try:
+                    await voice_client.disconnect(force=True)
+                except Exception as e:
+                    logger.error(f"Error disconnecting voice in guild {guild_id}: {e}")
+
+    async def close(self) -> None:
+        """Release every voice connection"""
+        for task in list(self._inflight.values()):
+            task.cancel()
+        for guild_id in list(self._connections):
+            await self.release(guild_id)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get connection manager metrics"""
+        return {
+            "guilds": len(self._channels),
+            "welcome_channels": len(self._channel_guilds),
+            "connected": sum(1 for vc in self._connections.values() if vc.is_connected()),
+            "connecting": len(self._inflight),
+            "connect_attempts": self.connect_attempts,
+            "connect_failures": self.connect_failures,
+            "disconnects": self.disconnects,
+            "reconnects": self.reconnects,
+            "time_to_reconnect": self.time_to_reconnect.snapshot()
+        }
@@ -0,0 +1,117 @@
+import time
+from typing import Any, Callable, Dict, Iterable, List
+
+class VoicePresencePolicy:
+    """Decides when the welcome connection should be held, dropped or pre-warmed
+
+    Pure bookkeeping, the caller does the actual connecting. A guild goes idle
+    once nothing has happened in it for ``idle_timeout`` seconds. Signals that
+    predict a join (activity in a neighbouring voice channel) open a
+    pre-warm window. A welcome join inside the window is a hit; a window
+    that runs out without one is a miss. A join that finds no connection at
+    all is a cold start.
+
+    Attributes:
+        idle_timeout: Seconds without activity before a guild is idle (0 never idles)
+        prewarm_window: Seconds a pre-warm waits for a join
+        clock: Monotonic time source
+        _last_activity: Clock time of the last activity per guild ID
+        _prewarmed: Clock time each guild's pending pre-warm started
+    """
+
+    def __init__(self, idle_timeout: float = 0, prewarm_window: float = 120, clock: Callable[[], float] = time.monotonic) -> None:
+        self.idle_timeout = idle_timeout
+        self.prewarm_window = prewarm_window
+        self.clock = clock
+        self._last_activity: Dict[int, float] = {}
+        self._prewarmed: Dict[int, float] = {}
+        self.joins = 0
+        self.prewarms = 0
+        self.prewarm_skips = 0
+        self.prewarm_hits = 0
+        self.prewarm_misses = 0
+        self.cold_starts = 0
+        self.idle_disconnects = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.idle_timeout > 0
+
+    def touch(self, guild_id: int) -> None:
+        """Record activity that keeps a guild's connection alive"""
+        self._last_activity[guild_id] = self.clock()
+
+    def prewarm(self, guild_id: int, connected: bool = False) -> bool:
+        """Open a pre-warm window for a guild
+
+        A guild that is already connected has nothing to warm, the signal only
+        counts as activity so hit and miss rates reflect real pre-warms.
+
+        Returns:
+            True if a new window was opened, False if one was already pending
+            or the guild is connected
+        """
+        self.touch(guild_id)
+        if connected:
+            self.prewarm_skips += 1
+            return False
+        if guild_id in self._prewarmed:
+            return False
+        self._prewarmed[guild_id] = self.clock()
+        self.prewarms += 1
+        return True
+
+    def join(self, guild_id: int, connected: bool) -> None:
+        """Record a welcome channel join and whether it found a live connection"""
+        self.joins += 1
+        self.touch(guild_id)
+        if self._prewarmed.pop(guild_id, None) is not None:
+            self.prewarm_hits += 1
+        if not connected:
+            self.cold_starts += 1
+
+    def expire(self) -> List[int]:
+        """Close pre-warm windows that ran out without a join
+
+        Returns:
+            Guild IDs whose pre-warm was a miss
+        """
+        cutoff = self.clock() - self.prewarm_window
+        missed = [guild_id for guild_id, started in self._prewarmed.items() if started <= cutoff]
+        for guild_id in missed:
+            del self._prewarmed[guild_id]
+        self.prewarm_misses += len(missed)
+        return missed
+
+    def idle_guilds(self, connected: Iterable[int]) -> List[int]:
+        """Get connected guilds that have gone idle and can be disconnected"""
+        if not self.enabled:
+            return []
+        cutoff = self.clock() - self.idle_timeout
+        return [
+            guild_id for guild_id in connected
+            if guild_id not in self._prewarmed and self._last_activity.get(guild_id, 0) <= cutoff
+        ]
+
+    def disconnected(self, guild_id: int) -> None:
+        """Record an idle disconnect"""
+        self.idle_disconnects += 1
+        self._last_activity.pop(guild_id, None)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get idle and pre-warm metrics"""
+        judged = self.prewarm_hits + self.prewarm_misses
+        return {
+            "idle_timeout": self.idle_timeout,
+            "prewarm_window": self.prewarm_window,
+            "joins": self.joins,
+            "prewarms": self.prewarms,
+            "prewarm_skips": self.prewarm_skips,
+            "prewarm_pending": len(self._prewarmed),
+            "prewarm_hits": self.prewarm_hits,
+            "prewarm_misses": self.prewarm_misses,
+            "prewarm_hit_rate": self.prewarm_hits / judged if judged else None,
+            "cold_starts": self.cold_starts,
+            "cold_start_rate": self.cold_starts / self.joins if self.joins else None,
+            "idle_disconnects": self.idle_disconnects
+        }
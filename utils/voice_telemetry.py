@@ -0,0 +1,160 @@
+import asyncio
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Optional
+
+import discord
+from discord.opus import Encoder as OpusEncoder
+
+from utils.metrics import Histogram
+
+logger = logging.getLogger('discord')
+
+FRAME_INTERVAL = OpusEncoder.FRAME_LENGTH / 1000  # 20ms
+
+_FRAME_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.015, 0.02, 0.025, 0.03, 0.04, 0.06, 0.1, 0.25)
+_READ_BUCKETS = (0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.02)
+
+class InstrumentedSource(discord.AudioSource):
+    """Audio source wrapper timing frames as the player thread pulls them
+
+    The voice player reads one frame per 20ms tick, so the spacing between
+    reads is the send cadence. Time spent inside the wrapped ``read`` is the
+    per-frame preparation cost (decode, transform or encode work done by
+    the source; zero-work for pre-encoded Opus clips).
+    """
+
+    def __init__(self, source: discord.AudioSource, telemetry: 'VoiceTelemetry') -> None:
+        self.source = source
+        self.telemetry = telemetry
+        self._last_read: Optional[float] = None
+
+    def read(self) -> bytes:
+        started = time.perf_counter()
+        frame = self.source.read()
+        finished = time.perf_counter()
+        if frame:
+            self.telemetry.record_frame(started, finished - started, self._last_read)
+            self._last_read = started
+        return frame
+
+    def is_opus(self) -> bool:
+        return self.source.is_opus()
+
+    def cleanup(self) -> None:
+        self.source.cleanup()
+
+class VoiceTelemetry:
+    """Playback health telemetry for the welcome voice player
+
+    Frame timings are recorded from the player thread. A monitor task samples
+    voice websocket latency and event loop lag every ``interval`` seconds and
+    warns when frame jitter over the interval crosses ``jitter_warn``.
+
+    Attributes:
+        interval: Seconds between samples
+        jitter_warn: Mean jitter (seconds) over an interval that triggers a warning
+        late_threshold: Extra delay beyond 20ms before a frame counts as late
+    """
+
+    def __init__(self, interval: float = 5.0, jitter_warn: float = 0.01, late_threshold: float = 0.01) -> None:
+        self.interval = interval
+        self.jitter_warn = jitter_warn
+        self.late_threshold = late_threshold
+        self.frame_interval = Histogram(_FRAME_BUCKETS)
+        self.jitter = Histogram(_FRAME_BUCKETS)
+        self.read_time = Histogram(_READ_BUCKETS)
+        self.ws_latency = Histogram()
+        self.loop_lag = Histogram(_FRAME_BUCKETS)
+        self.frames = 0
+        self.late_frames = 0
+        self.skipped_frames = 0
+        self.jitter_warnings = 0
+        self._window_jitter = 0.0
+        self._window_frames = 0
+        self._window_lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    def wrap(self, source: discord.AudioSource) -> InstrumentedSource:
+        """Wrap a source so its frames are timed"""
+        return InstrumentedSource(source, self)
+
+    def record_frame(self, started: float, read_time: float, last_read: Optional[float]) -> None:
+        """Record one frame pulled by the player thread"""
+        self.frames += 1
+        self.read_time.observe(read_time)
+        if last_read is None:
+            return
+
+        interval = started - last_read
+        jitter = abs(interval - FRAME_INTERVAL)
+        self.frame_interval.observe(interval)
+        self.jitter.observe(jitter)
+        if interval > FRAME_INTERVAL + self.late_threshold:
+            self.late_frames += 1
+            # Whole frame slots that passed without a send (rounded first so
+            # a 60ms gap isn't floored from 2.999 slots)
+            self.skipped_frames += max(0, int(round(interval / FRAME_INTERVAL, 6)) - 1)
+        with self._window_lock:
+            self._window_jitter += jitter
+            self._window_frames += 1
+
+    def start(self, voice_clients: Callable[[], Iterable[discord.VoiceClient]]) -> None:
+        """Start the sampling task
+
+        Args:
+            voice_clients: Returns the voice clients to sample latency from
+        """
+        if self.interval > 0 and (self._task is None or self._task.done()):
+            self._task = asyncio.create_task(self._monitor(voice_clients))
+
+    def stop(self) -> None:
+        """Stop the sampling task"""
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    async def _monitor(self, voice_clients: Callable[[], Iterable[discord.VoiceClient]]) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            try:
+                # How late the loop woke us up, a proxy for event loop load
+                lag = max(0.0, loop.time() - expected)
+                self.loop_lag.observe(lag)
+                self.sample(voice_clients(), lag)
+            except Exception as e:
+                logger.error(f"Error sampling voice telemetry: {e}")
+
+    def sample(self, voice_clients: Iterable[discord.VoiceClient], loop_lag: float = 0.0) -> None:
+        """Sample websocket latency and check jitter for the last interval"""
+        for voice_client in voice_clients:
+            latency = voice_client.latency
+            if voice_client.is_connected() and latency != float('inf'):
+                self.ws_latency.observe(latency)
+
+        with self._window_lock:
+            frames, total = self._window_frames, self._window_jitter
+            self._window_frames, self._window_jitter = 0, 0.0
+        if frames and total / frames > self.jitter_warn:
+            self.jitter_warnings += 1
+            logger.warning(
+                f"Voice frame jitter {total / frames * 1000:.1f}ms over {frames} frames "
+                f"(threshold {self.jitter_warn * 1000:.0f}ms, loop lag {loop_lag * 1000:.1f}ms)"
+            )
+
+    def stats(self) -> Dict[str, Any]:
+        """Get playback health metrics"""
+        return {
+            "frames": self.frames,
+            "late_frames": self.late_frames,
+            "skipped_frames": self.skipped_frames,
+            "jitter_warnings": self.jitter_warnings,
+            "frame_interval": self.frame_interval.snapshot(),
+            "jitter": self.jitter.snapshot(),
+            "read_time": self.read_time.snapshot(),
+            "ws_latency": self.ws_latency.snapshot(),
+            "loop_lag": self.loop_lag.snapshot()
+        }
@@ -0,0 +1,385 @@
+import asyncio
+import itertools
+import logging
+import multiprocessing
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import discord
+
+from config import Config
+from utils.audio_assets import AudioAssetCatalog
+from utils.audio_cache import OpusClipCache
+from utils.loudness import LoudnessProfile
+from utils.voice_manager import VoiceConnectionManager
+from utils.voice_telemetry import VoiceTelemetry
+
+logger = logging.getLogger('discord')
+
+# Job operations sent to the worker
+OP_PLAY = 'play'
+OP_CONNECT = 'connect'
+OP_DISCONNECT = 'disconnect'
+OP_SHUTDOWN = 'shutdown'
+
+# Statuses reported back by the worker
+STATUS_STARTED = 'started'
+STATUS_FINISHED = 'finished'
+STATUS_FAILED = 'failed'
+STATUS_FIRST_AUDIO = 'first_audio'
+STATUS_STATS = 'stats'
+
+class VoiceWorker(discord.Client):
+    """Welcome audio player running in its own process
+
+    Logs in with a minimal gateway session (guilds and voice states only)
+    and owns the welcome voice connections, so the audio player thread does
+    not share the GIL with commands, log shipping and database work in the
+    main bot. Jobs arrive over a multiprocessing queue and status is
+    reported back over another.
+    """
+
+    def __init__(self, jobs: multiprocessing.Queue, statuses: multiprocessing.Queue) -> None:
+        intents = discord.Intents.none()
+        intents.guilds = True
+        intents.voice_states = True
+        super().__init__(intents=intents)
+        self.jobs = jobs
+        self.statuses = statuses
+        self.voice_manager = VoiceConnectionManager(
+            self,
+            timeout=Config.VOICE_TIMEOUT,
+            base_delay=Config.RECONNECT_DELAY,
+            max_delay=Config.MAX_RECONNECT_DELAY,
+            max_attempts=Config.MAX_RECONNECT_ATTEMPTS
+        )
+        self.assets = AudioAssetCatalog(
+            OpusClipCache(
+                executable=Config.FFMPEG_PATH,
+                loudness=LoudnessProfile(
+                    mode=Config.WELCOME_SOUND_NORMALIZE,
+                    volume=Config.WELCOME_SOUND_VOLUME * 2.0,
+                    target_lufs=Config.WELCOME_SOUND_TARGET_LUFS,
+                    peak_db=Config.WELCOME_SOUND_PEAK_DB
+                ),
+                max_bytes=Config.WELCOME_SOUND_CACHE_BYTES
+            ),
+            default_path=Config.WELCOME_SOUND_PATH,
+            directory=Config.WELCOME_SOUND_DIR,
+            watch_interval=Config.WELCOME_SOUND_WATCH_INTERVAL
+        )
+        self.telemetry = VoiceTelemetry(
+            interval=Config.VOICE_HEALTH_CHECK_INTERVAL,
+            jitter_warn=Config.VOICE_JITTER_WARN_MS / 1000,
+            late_threshold=Config.VOICE_LATE_FRAME_MS / 1000
+        )
+
+    async def setup_hook(self) -> None:
+        discord.VoiceClient.warn_nacl = False
+        asyncio.create_task(self.assets.load())
+        self.assets.start()
+        self.telemetry.start(lambda: self.voice_clients)
+        asyncio.create_task(self._read_jobs())
+        asyncio.create_task(self._report_stats())
+
+    def report(self, status: Dict[str, Any]) -> None:
+        """Send a status message to the main process"""
+        try:
+            self.statuses.put_nowait(status)
+        except Exception as e:
+            logger.error(f"Failed to report voice worker status: {e}")
+
+    async def _read_jobs(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            job = await loop.run_in_executor(None, self.jobs.get)
+            if job['op'] == OP_SHUTDOWN:
+                await self.voice_manager.close()
+                await self.close()
+                return
+            asyncio.create_task(self._handle(job))
+
+    async def _report_stats(self) -> None:
+        while True:
+            await asyncio.sleep(Config.VOICE_HEALTH_CHECK_INTERVAL)
+            self.report({
+                'status': STATUS_STATS,
+                'stats': {
+                    'voice_connections': self.voice_manager.stats(),
+                    'welcome_assets': self.assets.stats(),
+                    'voice_playback': self.telemetry.stats()
+                }
+            })
+
+    async def _handle(self, job: Dict[str, Any]) -> None:
+        job_id = job.get('id')
+        try:
+            if job['op'] == OP_DISCONNECT:
+                await self.voice_manager.release(job['guild_id'])
+                return
+
+            channel = self.get_channel(job['channel_id'])
+            if not isinstance(channel, discord.VoiceChannel):
+                raise discord.ClientException(f"Could not find welcome voice channel with ID {job['channel_id']}")
+            voice_client = await self.voice_manager.acquire(channel)
+            if job['op'] == OP_CONNECT:
+                return
+
+            clip = await self.assets.get_clip(channel.id, job.get('role_ids', []))
+            if clip is None:
+                raise discord.ClientException("No welcome sound configured")
+
+            received_at = job['received_at']
+            source = clip.source(on_first_frame=lambda: self.report({
+                'id': job_id,
+                'status': STATUS_FIRST_AUDIO,
+                'latency': time.monotonic() - received_at
+            }))
+
+            def after_play(error):
+                self.report({'id': job_id, 'status': STATUS_FINISHED, 'error': str(error) if error else None})
+
+            if voice_client.is_playing():
+                voice_client.stop()
+            voice_client.play(self.telemetry.wrap(source), after=after_play)
+            self.report({'id': job_id, 'status': STATUS_STARTED})
+
+        except Exception as e:
+            logger.error(f"Voice worker failed {job['op']} job: {e}")
+            if job_id is not None:
+                self.report({'id': job_id, 'status': STATUS_FAILED, 'error': str(e)})
+
+    async def on_ready(self) -> None:
+        for channel_id in Config.WELCOME_VOICE_CHANNEL_IDS:
+            channel = self.get_channel(channel_id)
+            if isinstance(channel, discord.VoiceChannel):
+                self.voice_manager.register_channel(channel.guild.id, channel.id)
+        if Config.WELCOME_IDLE_DISCONNECT > 0:
+            # The bot process pre-warms connections on demand
+            logger.info("Voice worker ready")
+            return
+        for guild_id in self.voice_manager.guild_ids:
+            channel = self.get_channel(self.voice_manager.primary_channel(guild_id))
+            try:
+                await self.voice_manager.acquire(channel)
+            except Exception as e:
+                logger.error(f"Voice worker failed to connect to {channel.name}: {e}")
+        logger.info("Voice worker ready")
+
+    async def on_voice_state_update(self, member, before, after) -> None:
+        if member.id == self.user.id and before.channel and after.channel is None:
+            self.voice_manager.handle_disconnect(member.guild.id)
+
+def run_worker(jobs: multiprocessing.Queue, statuses: multiprocessing.Queue) -> None:
+    """Worker process entry point"""
+    logging.basicConfig(level=Config.LOG_LEVEL, format=Config.LOG_FORMAT)
+    try:
+        asyncio.run(VoiceWorker(jobs, statuses).start(Config.VOICE_WORKER_TOKEN))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        statuses.put(None)
+
+class VoiceWorkerClient:
+    """Main-process side of the voice worker
+
+    Starts the worker process, dispatches jobs and turns status messages back
+    into futures on the bot's event loop. A dead worker is restarted on the
+    next job.
+
+    Attributes:
+        on_first_audio: Called with the join-to-first-audio latency reported by the worker
+        start_timeout: Seconds to wait for the worker to start a clip
+    """
+
+    def __init__(self, on_first_audio: Optional[Callable[[float], None]] = None, start_timeout: float = 30.0) -> None:
+        self.on_first_audio = on_first_audio
+        self.start_timeout = start_timeout
+        self._context = multiprocessing.get_context('spawn')
+        self._process: Optional[multiprocessing.Process] = None
+        self._jobs: Optional[multiprocessing.Queue] = None
+        self._statuses: Optional[multiprocessing.Queue] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._ids = itertools.count(1)
+        self._started: Dict[int, asyncio.Future] = {}
+        self._finished: Dict[int, asyncio.Future] = {}
+        self._worker_stats: Dict[str, Any] = {}
+        self.dispatched = 0
+        self.failed = 0
+        self.restarts = 0
+
+    @property
+    def alive(self) -> bool:
+        return self._process is not None and self._process.is_alive()
+
+    def start(self) -> None:
+        """Start the worker process and status reader"""
+        self._loop = asyncio.get_running_loop()
+        self._jobs = self._context.Queue()
+        self._statuses = self._context.Queue()
+        self._process = self._context.Process(
+            target=run_worker,
+            args=(self._jobs, self._statuses),
+            name='voice-worker',
+            daemon=True
+        )
+        self._process.start()
+        threading.Thread(target=self._read_statuses, args=(self._statuses,), name='voice-worker-status', daemon=True).start()
+        logger.info(f"Started voice worker process {self._process.pid}")
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Ask the worker to disconnect and exit, killing it if it doesn't"""
+        if not self._process:
+            return
+        try:
+            self._jobs.put({'op': OP_SHUTDOWN})
+        except Exception:
+            pass
+        self._process.join(timeout)
+        if self._process.is_alive():
+            self._process.terminate()
+        self._process = None
+        self._release_statuses()
+        # May run in an executor thread, the futures belong to the event loop
+        try:
+            self._loop.call_soon_threadsafe(self._fail_pending, "Voice worker stopped")
+        except RuntimeError:
+            # Event loop already closed, nobody is waiting anymore
+            pass
+
+    def _release_statuses(self) -> None:
+        """Stop the status reader of the current process
+
+        A process that died never sends its end marker, so send it here.
+        """
+        if self._statuses is None:
+            return
+        try:
+            self._statuses.put(None)
+        except Exception:
+            pass
+        self._statuses = None
+
+    def _ensure_running(self) -> None:
+        if not self.alive:
+            if self._process is not None:
+                logger.error("Voice worker process died, restarting")
+                self.restarts += 1
+                self._release_statuses()
+                self._fail_pending("Voice worker restarted")
+            self.start()
+
+    def _send(self, job: Dict[str, Any]) -> None:
+        self._ensure_running()
+        self._jobs.put(job)
+
+    async def play(self, channel_id: int, role_ids: List[int], received_at: float) -> Optional[asyncio.Future]:
+        """Play the welcome clip in a channel
+
+        Args:
+            received_at: ``time.perf_counter()`` when the join arrived
+
+        Returns:
+            Future completed when the clip finishes, or None if it didn't start
+        """
+        # Restarting fails the jobs in flight, so do it before this one is registered
+        self._ensure_running()
+        job_id = next(self._ids)
+        started = self._loop.create_future()
+        finished = self._loop.create_future()
+        self._started[job_id] = started
+        self._finished[job_id] = finished
+        self.dispatched += 1
+
+        # perf_counter isn't comparable across processes, hand over a monotonic timestamp
+        received_monotonic = time.monotonic() - (time.perf_counter() - received_at)
+        self._send({
+            'id': job_id,
+            'op': OP_PLAY,
+            'channel_id': channel_id,
+            'role_ids': role_ids,
+            'received_at': received_monotonic
+        })
+
+        try:
+            await asyncio.wait_for(started, self.start_timeout)
+            return finished
+        except Exception as e:
+            self.failed += 1
+            logger.error(f"Voice worker could not play in {channel_id}: {e}")
+            self._finished.pop(job_id, None)
+            return None
+        finally:
+            self._started.pop(job_id, None)
+
+    def connect(self, channel_id: int) -> None:
+        """Ask the worker to connect to a channel without playing"""
+        self._send({'op': OP_CONNECT, 'channel_id': channel_id})
+
+    def disconnect(self, guild_id: int) -> None:
+        """Ask the worker to leave voice in a guild"""
+        self._send({'op': OP_DISCONNECT, 'guild_id': guild_id})
+
+    def _read_statuses(self, statuses: multiprocessing.Queue) -> None:
+        """Forward worker statuses to the event loop (reader thread)"""
+        while True:
+            try:
+                status = statuses.get()
+            except (EOFError, OSError):
+                return
+            if status is None:
+                return
+            try:
+                self._loop.call_soon_threadsafe(self._handle_status, status)
+            except RuntimeError:
+                # Event loop closed during shutdown
+                return
+
+    def _handle_status(self, status: Dict[str, Any]) -> None:
+        kind = status['status']
+        if kind == STATUS_STATS:
+            self._worker_stats = status['stats']
+            return
+
+        job_id = status.get('id')
+        if kind == STATUS_FIRST_AUDIO:
+            if self.on_first_audio:
+                self.on_first_audio(status['latency'])
+        elif kind == STATUS_STARTED:
+            future = self._started.get(job_id)
+            if future and not future.done():
+                future.set_result(None)
+        elif kind == STATUS_FAILED:
+            future = self._started.get(job_id)
+            if future and not future.done():
+                future.set_exception(discord.ClientException(status.get('error') or 'failed'))
+            self._finished.pop(job_id, None)
+        elif kind == STATUS_FINISHED:
+            if status.get('error'):
+                logger.error(f"Error playing welcome sound: {status['error']}")
+            future = self._finished.pop(job_id, None)
+            if future and not future.done():
+                future.set_result(None)
+
+    def _fail_pending(self, reason: str) -> None:
+        for future in list(self._started.values()):
+            if not future.done():
+                future.set_exception(discord.ClientException(reason))
+        for future in list(self._finished.values()):
+            if not future.done():
+                future.set_result(None)
+        self._started.clear()
+        self._finished.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Get dispatcher counters and the worker's latest metrics"""
+        return {
+            "alive": self.alive,
+            "pid": self._process.pid if self._process else None,
+            "dispatched": self.dispatched,
+            "failed": self.failed,
+            "restarts": self.restarts,
+            "in_flight": len(self._finished),
+            "worker": self._worker_stats
+        }
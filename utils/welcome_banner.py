@@ -0,0 +1,254 @@
+import asyncio
+import io
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import discord
+
+from utils.imaging import Image, ImageDraw, RENDERING_AVAILABLE, circle_mask, draw_text
+from utils.metrics import Histogram
+
+try:
+    from PIL import ImageOps
+except ImportError:
+    ImageOps = None
+
+logger = logging.getLogger('discord')
+
+BANNER_SIZE = (1000, 360)
+BACKGROUND_COLOR = (24, 26, 33, 255)
+OVERLAY_COLOR = (0, 0, 0, 110)
+ACCENT_COLOR = (8, 194, 153, 255)
+AVATAR_SIZE = 170
+AVATAR_TOP = 52
+
+def normalize_background(data: bytes) -> bytes:
+    """Crop an uploaded background to the banner size and re-encode it as PNG (blocking)
+
+    Raises:
+        OSError: If the data is not an image Pillow can read
+    """
+    image = Image.open(io.BytesIO(data))
+    image = ImageOps.fit(image.convert('RGBA'), BANNER_SIZE)
+    output = io.BytesIO()
+    image.save(output, format='PNG')
+    return output.getvalue()
+
+# Per-process cache: one pre-composited layer per guild background, keyed by
+# path and mtime so a replaced background is picked up without invalidation
+@lru_cache(maxsize=32)
+def _base_layer(background: Optional[str], mtime: float, title: str):
+    """Background, darkening overlay, avatar ring and title, everything except the member"""
+    if background:
+        base = ImageOps.fit(Image.open(background).convert('RGBA'), BANNER_SIZE)
+    else:
+        base = Image.new('RGBA', BANNER_SIZE, BACKGROUND_COLOR)
+    base = Image.alpha_composite(base, Image.new('RGBA', BANNER_SIZE, OVERLAY_COLOR))
+
+    draw = ImageDraw.Draw(base)
+    left = (BANNER_SIZE[0] - AVATAR_SIZE) // 2
+    draw.ellipse(
+        (left - 6, AVATAR_TOP - 6, left + AVATAR_SIZE + 5, AVATAR_TOP + AVATAR_SIZE + 5),
+        fill=ACCENT_COLOR
+    )
+    draw_text(draw, (BANNER_SIZE[0] / 2, 34), title, 26, BANNER_SIZE[0] - 60, (220, 220, 220, 255), center=True)
+    return base
+
+def render_banner(
+    background: Optional[str],
+    mtime: float,
+    title: str,
+    name: str,
+    subtitle: str,
+    avatar: Optional[bytes] = None
+) -> bytes:
+    """Render a welcome banner to PNG bytes (blocking, runs in the process pool)
+
+    Only the avatar and text are drawn per join, the rest comes from the
+    cached base layer.
+
+    Args:
+        background: Guild background file, or None for the plain default
+        mtime: Background modification time, part of the layer cache key
+        title: Line above the avatar
+        name: Member display name
+        subtitle: Line under the name
+        avatar: Member avatar image bytes
+    """
+    banner = _base_layer(background, mtime, title).copy()
+    left = (BANNER_SIZE[0] - AVATAR_SIZE) // 2
+    if avatar:
+        try:
+            image = Image.open(io.BytesIO(avatar)).convert('RGBA').resize((AVATAR_SIZE, AVATAR_SIZE))
+            banner.paste(image, (left, AVATAR_TOP), circle_mask(AVATAR_SIZE))
+        except Exception as e:
+            logger.warning(f"Could not draw avatar on welcome banner: {e}")
+
+    draw = ImageDraw.Draw(banner)
+    center = BANNER_SIZE[0] / 2
+    draw_text(draw, (center, AVATAR_TOP + AVATAR_SIZE + 54), name, 48, BANNER_SIZE[0] - 80, (255, 255, 255, 255), center=True)
+    draw_text(draw, (center, AVATAR_TOP + AVATAR_SIZE + 94), subtitle, 26, BANNER_SIZE[0] - 80, ACCENT_COLOR, center=True)
+
+    output = io.BytesIO()
+    banner.convert('RGB').save(output, format='PNG')
+    return output.getvalue()
+
+class BannerJob:
+    """A welcome banner waiting to be rendered
+
+    Attributes:
+        background: Guild background file, or None
+        title: Line above the avatar
+        name: Member display name
+        subtitle: Line under the name
+        avatar: Avatar asset, fetched by the worker that renders the job
+        deliver: Called with the PNG bytes once rendered
+        queued_at: Monotonic time the job was queued
+    """
+
+    __slots__ = ('background', 'title', 'name', 'subtitle', 'avatar', 'deliver', 'queued_at')
+
+    def __init__(
+        self,
+        background: Optional[str],
+        title: str,
+        name: str,
+        subtitle: str,
+        avatar: Optional[discord.Asset],
+        deliver: Callable[[bytes], Awaitable[Any]]
+    ) -> None:
+        self.background = background
+        self.title = title
+        self.name = name
+        self.subtitle = subtitle
+        self.avatar = avatar
+        self.deliver = deliver
+        self.queued_at = time.monotonic()
+
+class WelcomeBannerPipeline:
+    """Renders welcome banners with a fixed worker pool behind a bounded queue
+
+    A join raid fills the queue and further banners are dropped instead of
+    piling up render work, memory and late messages. Workers fetch the avatar,
+    render in a process pool and hand the PNG to the job's ``deliver``.
+
+    Attributes:
+        workers: Concurrent render workers, also the process pool size
+        queue_size: Jobs that can wait before new ones are dropped
+    """
+
+    def __init__(self, workers: int = 2, queue_size: int = 20) -> None:
+        self.workers = max(1, workers)
+        self.queue_size = queue_size
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._mtimes: Dict[str, float] = {}
+        self.queue_wait = Histogram()
+        self.render_time = Histogram()
+        self.rendered = 0
+        self.dropped = 0
+        self.failures = 0
+
+    @property
+    def available(self) -> bool:
+        return RENDERING_AVAILABLE
+
+    def start(self) -> None:
+        """Start the render workers"""
+        if self._tasks or not self.available:
+            return
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        # Spawned, not forked: a fork would copy locks held by the bot's other threads
+        self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context('spawn'))
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    def stop(self) -> None:
+        """Stop the workers and drop queued jobs"""
+        for task in self._tasks:
+            task.cancel()
+        self._tasks = []
+        if self._executor:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def background_changed(self, path: str) -> None:
+        """Forget the cached mtime of a background that was replaced"""
+        self._mtimes.pop(path, None)
+
+    def _mtime(self, path: Optional[str]) -> float:
+        """Background mtime, stat'ed once and then remembered"""
+        if not path:
+            return 0.0
+        mtime = self._mtimes.get(path)
+        if mtime is None:
+            mtime = self._mtimes[path] = os.path.getmtime(path)
+        return mtime
+
+    def submit(self, job: BannerJob) -> bool:
+        """Queue a banner
+
+        Returns:
+            False if the queue is full (or rendering is unavailable) and the job was dropped
+        """
+        if self._queue is None:
+            return False
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            self.dropped += 1
+            return False
+        return True
+
+    async def _worker(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            job = await self._queue.get()
+            try:
+                self.queue_wait.observe(time.monotonic() - job.queued_at)
+                avatar = None
+                if job.avatar:
+                    try:
+                        avatar = await job.avatar.read()
+                    except discord.HTTPException as e:
+                        logger.warning(f"Could not fetch avatar for welcome banner: {e}")
+
+                started = time.perf_counter()
+                png = await loop.run_in_executor(
+                    self._executor,
+                    render_banner,
+                    job.background,
+                    self._mtime(job.background),
+                    job.title,
+                    job.name,
+                    job.subtitle,
+                    avatar
+                )
+                self.render_time.observe(time.perf_counter() - started)
+                self.rendered += 1
+                await job.deliver(png)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.failures += 1
+                logger.error(f"Failed to render welcome banner: {e}")
+            finally:
+                self._queue.task_done()
+
+    def stats(self) -> Dict[str, Any]:
+        """Get banner pipeline metrics"""
+        return {
+            "available": self.available,
+            "queued": self._queue.qsize() if self._queue else 0,
+            "queue_size": self.queue_size,
+            "rendered": self.rendered,
+            "dropped": self.dropped,
+            "failures": self.failures,
+            "queue_wait": self.queue_wait.snapshot(),
+            "render_time": self.render_time.snapshot()
+        }
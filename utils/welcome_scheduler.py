@@ -0,0 +1,166 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Hashable, Optional
+
+logger = logging.getLogger('discord')
+
+# Burst merge policies
+POLICY_ONCE = 'once'          # Play once for the burst, joins during playback are absorbed
+POLICY_FINISH = 'finish'      # Let the current clip finish, then play once for joins that arrived
+POLICY_RESTART = 'restart'    # Cut the current clip and restart it for each burst
+POLICIES = (POLICY_ONCE, POLICY_FINISH, POLICY_RESTART)
+
+StartPlayback = Callable[[Hashable, float, Any], Awaitable[Optional[asyncio.Future]]]
+
+class _Burst:
+    """Joins merged into a single playback"""
+
+    __slots__ = ('joins', 'received_at', 'context')
+
+    def __init__(self, received_at: float, context: Any) -> None:
+        self.joins = 1
+        self.received_at = received_at
+        self.context = context
+
+class _ChannelState:
+    """Playback state for a single channel"""
+
+    def __init__(self) -> None:
+        self.bursts: Deque[_Burst] = deque()
+        self.burst_started: float = 0.0
+        self.last_request: float = float('-inf')
+        self.playing: bool = False
+        self.task: Optional[asyncio.Task] = None
+
+class WelcomeScheduler:
+    """Per-channel welcome playback scheduler that coalesces join bursts
+
+    The first join on an idle channel plays immediately. Joins arriving while
+    a clip is playing, or within the debounce window of the previous one, are
+    merged into a burst that plays once according to the policy. At most
+    ``max_queue`` bursts wait per channel, extra joins fold into the last one.
+
+    Attributes:
+        start: Coroutine starting playback for a channel, given the receipt
+            time and context of the burst's first join, returning a future
+            that completes when the clip ends (or None if nothing played)
+        debounce: Quiet period in seconds that closes a burst
+        max_delay: Longest a burst may be held open by a stream of joins
+        max_queue: Maximum number of pending bursts per channel
+        policy: One of ``POLICIES``
+    """
+
+    def __init__(
+        self,
+        start: StartPlayback,
+        debounce: float = 0.75,
+        max_delay: float = 2.0,
+        max_queue: int = 2,
+        policy: str = POLICY_FINISH
+    ) -> None:
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown burst policy: {policy}")
+        if max_queue < 1:
+            raise ValueError("Max queue depth must be at least 1")
+
+        self.start = start
+        self.debounce = debounce
+        self.max_delay = max(max_delay, debounce)
+        self.max_queue = max_queue
+        self.policy = policy
+        self._channels: Dict[Hashable, _ChannelState] = {}
+        self.requested = 0
+        self.played = 0
+        self.coalesced = 0
+        self.failed = 0
+
+    def request(self, channel: Hashable, received_at: Optional[float] = None, context: Any = None) -> None:
+        """Register a join for a channel and schedule playback
+
+        Args:
+            channel: Channel key to play in
+            received_at: ``time.perf_counter()`` when the join event arrived
+            context: Opaque data passed to ``start`` for the burst's first join
+        """
+        state = self._channels.setdefault(channel, _ChannelState())
+        now = asyncio.get_running_loop().time()
+        if received_at is None:
+            received_at = time.perf_counter()
+        self.requested += 1
+
+        if state.playing and self.policy == POLICY_ONCE:
+            # The clip already playing covers this join
+            self.coalesced += 1
+        elif state.bursts and (now - state.last_request < self.debounce or len(state.bursts) >= self.max_queue):
+            state.bursts[-1].joins += 1
+        else:
+            state.bursts.append(_Burst(received_at, context))
+            if len(state.bursts) == 1:
+                state.burst_started = now
+
+        idle = not state.playing and now - state.last_request >= self.debounce
+        state.last_request = now
+
+        if state.task is None or state.task.done():
+            state.task = asyncio.create_task(self._run(channel, state, immediate=idle))
+
+    async def _run(self, channel: Hashable, state: _ChannelState, immediate: bool) -> None:
+        """Drain pending bursts for a channel"""
+        loop = asyncio.get_running_loop()
+        while state.bursts:
+            if not immediate:
+                # Hold the burst open until joins go quiet or it has waited long enough
+                while True:
+                    now = loop.time()
+                    deadline = min(state.last_request + self.debounce, state.burst_started + self.max_delay)
+                    if len(state.bursts) > 1 or now >= deadline:
+                        break
+                    await asyncio.sleep(deadline - now)
+            immediate = False
+
+            burst = state.bursts.popleft()
+            state.burst_started = loop.time()
+            self.coalesced += burst.joins - 1
+
+            try:
+                finished = await self.start(channel, burst.received_at, burst.context)
+            except Exception as e:
+                self.failed += 1
+                logger.error(f"Error starting welcome playback in {channel}: {e}")
+                continue
+
+            if finished is None:
+                self.failed += 1
+                continue
+
+            self.played += 1
+            if self.policy == POLICY_RESTART:
+                continue
+
+            state.playing = True
+            try:
+                await finished
+            except Exception as e:
+                logger.error(f"Welcome playback in {channel} ended with error: {e}")
+            finally:
+                state.playing = False
+
+    def cancel(self) -> None:
+        """Cancel all pending playback"""
+        for state in self._channels.values():
+            state.bursts.clear()
+            if state.task and not state.task.done():
+                state.task.cancel()
+
+    def stats(self) -> Dict[str, Any]:
+        """Get scheduler counters"""
+        return {
+            "policy": self.policy,
+            "requested": self.requested,
+            "played": self.played,
+            "coalesced": self.coalesced,
+            "failed": self.failed,
+            "pending": {str(channel): sum(burst.joins for burst in state.bursts) for channel, state in self._channels.items() if state.bursts}
+        }
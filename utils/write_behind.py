@@ -0,0 +1,126 @@
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+from utils.metrics import Histogram
+
+logger = logging.getLogger('discord')
+
+WriteBatch = Callable[[Any, Dict[Hashable, Any]], Awaitable[None]]
+Merge = Callable[[Any, Any], Any]
+
+class WriteBehindBuffer:
+    """Collects keyed records in memory and writes them in one transaction
+
+    Records for the same key replace each other (or are combined by
+    ``merge``), so an add followed by a remove of the same row inside one
+    batch is written once, as the final state. A batch is flushed every
+    ``flush_interval`` seconds or as soon as ``max_batch`` keys are
+    waiting, whichever comes first, and on close.
+    A failed batch is merged back under anything recorded since.
+
+    Attributes:
+        db: Database providing ``transaction()``
+        write: Coroutine writing a batch (key -> latest record) with a cursor
+        flush_interval: Seconds between background flushes
+        max_batch: Keys that trigger an immediate flush
+        merge: Optional (pending, new) -> record combining two records for a key
+    """
+
+    def __init__(self, db, write: WriteBatch, flush_interval: float = 0.25, max_batch: int = 500, merge: Optional[Merge] = None) -> None:
+        self.db = db
+        self.write = write
+        self.merge = merge
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self._pending: Dict[Hashable, Any] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._wake = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self.flush_time = Histogram()
+        self.records = 0
+        self.collapsed = 0
+        self.written = 0
+        self.flushes = 0
+        self.failures = 0
+
+    def start(self) -> None:
+        """Start the background flush task"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    def put(self, key: Hashable, record: Any) -> None:
+        """Buffer a record, replacing any pending one for the same key"""
+        self.records += 1
+        if key in self._pending:
+            self.collapsed += 1
+            # Move to the end so the batch keeps the order of last changes
+            pending = self._pending.pop(key)
+            if self.merge:
+                record = self.merge(pending, record)
+        self._pending[key] = record
+        if len(self._pending) >= self.max_batch:
+            self._wake.set()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            await self.flush()
+
+    async def flush(self) -> None:
+        """Write everything buffered so far"""
+        async with self._flush_lock:
+            if not self._pending:
+                return
+            batch, self._pending = self._pending, {}
+            start = time.perf_counter()
+            try:
+                async with self.db.transaction() as cursor:
+                    await self.write(cursor, batch)
+            except asyncio.CancelledError:
+                self._requeue(batch)
+                raise
+            except Exception as e:
+                self.failures += 1
+                logger.error(f"Failed to write {len(batch)} buffered records: {e}")
+                self._requeue(batch)
+                return
+            self.flush_time.observe(time.perf_counter() - start)
+            self.written += len(batch)
+            self.flushes += 1
+
+    def _requeue(self, batch: Dict[Hashable, Any]) -> None:
+        """Put a failed batch back, records made since it was taken win"""
+        for key, record in self._pending.items():
+            batch[key] = self.merge(batch[key], record) if self.merge and key in batch else record
+        self._pending = batch
+
+    @property
+    def depth(self) -> int:
+        """Keys waiting to be written"""
+        return len(self._pending)
+
+    async def close(self) -> None:
+        """Stop the background task and flush what is left"""
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self.flush()
+
+    def stats(self) -> Dict[str, Any]:
+        """Get buffer metrics"""
+        return {
+            "queue_depth": self.depth,
+            "records": self.records,
+            "collapsed": self.collapsed,
+            "written": self.written,
+            "flushes": self.flushes,
+            "failures": self.failures,
+            "flush_time": self.flush_time.snapshot()
+        }